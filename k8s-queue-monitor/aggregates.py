@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Running, mergeable queue time aggregates per namespace and hour.
+
+Each (hour, namespace) bucket holds count, sum, min, max and a log-bucketed
+quantile sketch, plus one such sketch per queue phase (pod_parser's
+PHASE_COLUMNS) over the pods whose phase is known. Buckets merge by adding
+counts, so a 7-day report only has to merge ~168 small buckets per namespace
+instead of scanning every raw row.
+
+Quantile error bound: the sketch maps a value v > 0 to bucket
+ceil(log(v) / log(GAMMA)) with GAMMA = (1 + ALPHA) / (1 - ALPHA), and answers
+with the bucket's midpoint. Any quantile it returns is within ALPHA (1%)
+relative error of the exact value at the same (lower nearest) rank. Values
+<= 0 are counted exactly in a separate zero bucket. Count, sum, mean, min and
+max are exact.
+
+Layout under the aggregates root, one small file per day:
+
+    2026-10-16.json      {"18": {"team-a": {sketch}, "prod/team-b": {sketch}, ...}, ...}
+
+A sketch's phases are stored under its "ph" key, {"ScheduleWait": {sketch}, ...}.
+"""
+import datetime
+import json
+import math
+import os
+
+from history_store import collection_timestamps
+from pod_parser import PHASE_COLUMNS
+
+ALPHA = 0.01
+GAMMA = (1 + ALPHA) / (1 - ALPHA)
+_LOG_GAMMA = math.log(GAMMA)
+
+DAY_FORMAT = "%Y-%m-%d"
+
+# Percentiles reported per namespace
+PERCENTILES = [0.5, 0.9, 0.99, 0.999]
+
+# Bucket indexes of values seen by add_values(); queue times and phases are
+# whole seconds, so a few thousand distinct values cover nearly every pod.
+# The cache stops growing at _INDEX_CACHE_MAX values (about 10 MB); values
+# beyond those are indexed without it.
+_INDEX_CACHE = {}
+_INDEX_CACHE_MAX = 100000
+
+
+def percentile_label(q):
+    """Column label for a percentile: 0.5 -> 'p50', 0.999 -> 'p999'"""
+    return "p" + f"{q * 100:g}".replace(".", "")
+
+
+def namespace_label(cluster, namespace):
+    """Report key for a namespace, prefixed with its cluster in multi-cluster setups"""
+    return f"{cluster}/{namespace}" if isinstance(cluster, str) and cluster else namespace
+
+
+class QueueTimeSketch:
+    """Count/sum/min/max plus a relative-error quantile sketch of queue times"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.zero_count = 0
+        self.buckets = {}
+        self.phases = {}
+
+    def add(self, value):
+        """Add one queue time in seconds"""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / _LOG_GAMMA)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def add_values(self, values):
+        """Add a list of queue times in seconds; the same result as add() for each, faster"""
+        if not values:
+            return
+        self.count += len(values)
+        self.total += sum(values)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+        buckets = self.buckets
+        for value in values:
+            index = _INDEX_CACHE.get(value)
+            if index is None:
+                if value <= 0:
+                    self.zero_count += 1
+                    continue
+                index = math.ceil(math.log(value) / _LOG_GAMMA)
+                if len(_INDEX_CACHE) < _INDEX_CACHE_MAX:
+                    _INDEX_CACHE[value] = index
+            buckets[index] = buckets.get(index, 0) + 1
+
+    def add_phase_values(self, name, values):
+        """Add a list of pods' seconds in a queue phase"""
+        sketch = self.phases.get(name)
+        if sketch is None:
+            sketch = self.phases[name] = QueueTimeSketch()
+        sketch.add_values(values)
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        for name, sketch in other.phases.items():
+            # Copied, so later merges into this sketch leave `other` untouched
+            self.phases.setdefault(name, QueueTimeSketch()).merge(sketch)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), within ALPHA relative error"""
+        if not self.count:
+            return math.nan
+
+        # Lower nearest rank, e.g. the lower median for an even count
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return min(max(0.0, self.min), self.max)
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                estimate = 2 * GAMMA ** index / (GAMMA + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def histogram(self):
+        """(lower, upper, count) per non-empty bucket, ascending; values <= 0 are reported as (0, 0, count)"""
+        rows = [(0.0, 0.0, self.zero_count)] if self.zero_count else []
+        for index in sorted(self.buckets):
+            rows.append((GAMMA ** (index - 1), GAMMA ** index, self.buckets[index]))
+        return rows
+
+    def to_dict(self):
+        data = {"n": self.count, "s": self.total, "lo": self.min, "hi": self.max,
+                "z": self.zero_count, "b": {str(i): c for i, c in self.buckets.items()}}
+        if self.phases:
+            data["ph"] = {name: sketch.to_dict() for name, sketch in self.phases.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.count = data["n"]
+        sketch.total = data["s"]
+        sketch.min = data["lo"]
+        sketch.max = data["hi"]
+        sketch.zero_count = data["z"]
+        sketch.buckets = {int(i): c for i, c in data["b"].items()}
+        sketch.phases = {name: cls.from_dict(phase) for name, phase in data.get("ph", {}).items()}
+        return sketch
+
+
+class AggregateStore:
+    def __init__(self, root, retention_days=7):
+        """
+        Initialize the store
+
+        Args:
+            root: Directory holding one aggregate file per day (created if missing)
+            retention_days: Day files older than this are removed by expire()
+        """
+        self.root = root
+        self.retention_days = retention_days
+        os.makedirs(self.root, exist_ok=True)
+
+    def day_path(self, day):
+        return os.path.join(self.root, f"{day}.json")
+
+    def days(self):
+        """Sorted days with aggregate files (oldest first)"""
+        return sorted(name[:-5] for name in os.listdir(self.root)
+                      if name.endswith(".json") and not name.startswith("."))
+
+    def load_day(self, day):
+        """{hour: {namespace: QueueTimeSketch}} for one day"""
+        path = self.day_path(day)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            data = json.load(f)
+        return {hour: {ns: QueueTimeSketch.from_dict(s) for ns, s in namespaces.items()}
+                for hour, namespaces in data.items()}
+
+    def save_day(self, day, hours):
+        """Atomically write one day's buckets"""
+        data = {hour: {ns: sketch.to_dict() for ns, sketch in namespaces.items()}
+                for hour, namespaces in hours.items()}
+        tmp_path = os.path.join(self.root, f".tmp-{day}.json")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.day_path(day))
+
+    def row_labels(self, df, clusters):
+        """Bucket label of each row, its namespace_label; None leaves a row out"""
+        return [namespace_label(cluster, namespace) for cluster, namespace in zip(clusters, df['Namespace'])]
+
+    def add(self, df):
+        """
+        Fold new rows (QueueTimeRows or a DataFrame with Timestamp, [Cluster,]
+        Namespace, QueueTime, [phases]) into their hourly buckets; returns the days touched
+        """
+        if df.empty:
+            return []
+
+        clusters = df['Cluster'] if 'Cluster' in df else [""] * len(df)
+        labels = self.row_labels(df, clusters)
+        timestamps = list(df['Timestamp'])
+        if not isinstance(timestamps[0], str):
+            # History loads Timestamp as epoch seconds
+            timestamps = collection_timestamps(timestamps)
+        phase_names = [name for name in PHASE_COLUMNS if name in df]
+        phases = zip(*(df[name] for name in phase_names)) if phase_names else [()] * len(df)
+        # Values are gathered per bucket first and folded in with add_values
+        values = {}
+        for timestamp, label, queue_time, pod_phases in zip(timestamps, labels, df['QueueTime'], phases):
+            if label is None:
+                continue
+            key = (timestamp[:10], timestamp[11:13], label)
+            bucket = values.get(key)
+            if bucket is None:
+                bucket = values[key] = ([], [[] for _ in phase_names])
+            bucket[0].append(float(queue_time))
+            for phase_values, seconds in zip(bucket[1], pod_phases):
+                # NaN: the pod had not reached the phase's condition when stored
+                if seconds == seconds:
+                    phase_values.append(float(seconds))
+
+        updates = {}
+        for (day, hour, label), (queue_times, phase_values) in values.items():
+            sketch = updates.setdefault(day, {}).setdefault(hour, {})[label] = QueueTimeSketch()
+            sketch.add_values(queue_times)
+            for name, seconds in zip(phase_names, phase_values):
+                sketch.add_phase_values(name, seconds)
+
+        # Only the touched days are read and rewritten, each a few KB
+        for day, new_hours in updates.items():
+            hours = self.load_day(day)
+            for hour, namespaces in new_hours.items():
+                existing = hours.setdefault(hour, {})
+                for namespace, sketch in namespaces.items():
+                    if namespace in existing:
+                        existing[namespace].merge(sketch)
+                    else:
+                        existing[namespace] = sketch
+            self.save_day(day, hours)
+        return sorted(updates)
+
+    def merged(self, since=None, until=None):
+        """
+        Merge the buckets of hours from `since` up to (not including) `until`
+        (datetimes, either open) into {namespace: QueueTimeSketch}
+        """
+        since_key = since.strftime(f"{DAY_FORMAT}T%H") if since else None
+        until_key = until.strftime(f"{DAY_FORMAT}T%H") if until else None
+
+        result = {}
+        for day in self.days():
+            if (since_key and day < since_key[:10]) or (until_key and day > until_key[:10]):
+                continue
+            for hour, namespaces in self.load_day(day).items():
+                key = f"{day}T{hour}"
+                if (since_key and key < since_key) or (until_key and key >= until_key):
+                    continue
+                for namespace, sketch in namespaces.items():
+                    if namespace in result:
+                        result[namespace].merge(sketch)
+                    else:
+                        result[namespace] = sketch
+        return result
+
+    def expire(self, now=None):
+        """Remove day files older than the retention window"""
+        now = now or datetime.datetime.now()
+        cutoff = (now - datetime.timedelta(days=self.retention_days)).strftime(DAY_FORMAT)
+        expired = [day for day in self.days() if day < cutoff]
+        for day in expired:
+            os.remove(self.day_path(day))
+        return expired
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Peak memory and run time of the 12-hour collector's accumulation
+
+Simulates a run of 720 one-minute ticks over 20k pods that appear during the
+run and stay visible for ~30 minutes each. The baseline is the old loop:
+format every visible pod and pd.concat it onto the growing frame each tick.
+The buffered mode records each new pod once in a PodBuffer and formats at
+report time. Each mode runs in a fresh child process and reports how far its
+peak RSS grew above the simulated cluster's own footprint.
+"""
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+EXCLUDE = ['kube-system']
+
+
+def simulated_ticks(pod_count, ticks, seed=0):
+    """Visible pruned pods per tick, for pod_count pods spread over the run"""
+    from synthetic_pods import make_pod
+    from pod_parser import prune_pod
+
+    random.seed(seed)
+    start = datetime.datetime(2024, 1, 8, tzinfo=datetime.timezone.utc)
+    visible = [[] for _ in range(ticks)]
+    for index in range(pod_count):
+        first = random.randrange(ticks)
+        last = min(ticks - 1, first + int(random.expovariate(1 / 30)))
+        created = start + datetime.timedelta(minutes=first) - datetime.timedelta(seconds=random.randint(0, 600))
+        pod = make_pod(index, f"team-{index % 20:02d}", created, int(random.expovariate(1 / 120)))
+        pod = prune_pod(pod)
+        for tick in range(first, last + 1):
+            visible[tick].append(pod)
+    return visible
+
+
+def measure(mode, pod_count, ticks):
+    """Child process body: run the simulated collection, print seconds and peak RSS above the fixture's"""
+    import pandas as pd
+    from bench_stream_memory import peak_rss_mib
+    from pod_buffer import PodBuffer
+    from pod_parser import MAX_QUEUE_TIME_SECS, extract_pod_columns, queue_time_frame
+    from queue_stats_collector import QueueTimeStatsCollector
+
+    visible_by_tick = simulated_ticks(pod_count, ticks)
+    # Only the formatting/report methods are used, so skip __init__'s kubeconfig setup
+    collector = QueueTimeStatsCollector.__new__(QueueTimeStatsCollector)
+    collector.buffer = PodBuffer()
+    all_data = pd.DataFrame()
+    base_mib = peak_rss_mib()
+
+    started = time.perf_counter()
+    for tick, visible in enumerate(visible_by_tick):
+        timestamp = f"2024-01-08 {tick // 60:02d}:{tick % 60:02d}:00"
+        if mode == "concat":
+            df = queue_time_frame(extract_pod_columns(visible, EXCLUDE), timestamp)
+            if df.empty:
+                continue
+            df = df[df['QueueTime'] <= MAX_QUEUE_TIME_SECS].reset_index(drop=True)
+            df = pd.concat([df[['Timestamp', 'Namespace', 'Pod', 'QueueTime']],
+                            collector.format_time_columns(df['QueueTime']),
+                            df[['CreationTime', 'StartTime']]], axis=1)
+            all_data = pd.concat([all_data, df], ignore_index=True)
+        else:
+            df = queue_time_frame(extract_pod_columns(visible, EXCLUDE, skip_uids=collector.buffer), timestamp)
+            if not df.empty:
+                collector.buffer.add_frame(df[df['QueueTime'] <= MAX_QUEUE_TIME_SECS])
+
+    if mode != "concat":
+        all_data = collector.build_report_frame()
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({"rows": len(all_data), "secs": elapsed, "growth_mib": peak_rss_mib() - base_mib}))
+
+
+def main():
+    pod_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 720
+    print(f"{pod_count} pods, {ticks} ticks")
+    print(f"{'mode':>8} {'rows':>9} {'time':>9} {'growth':>10}")
+    for mode in ("concat", "buffered"):
+        out = subprocess.run([sys.executable, __file__, "--measure", mode, str(pod_count), str(ticks)],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out)
+        print(f"{mode:>8} {result['rows']:>9} {result['secs']:>8.1f}s {result['growth_mib']:>8.1f}Mi")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Bytes fetched and parse time per collection: full JSON listing vs selectors + projection
+
+The fixture cluster dump has kube-system and Pending pods mixed in. The
+baseline is the old `kubectl get pods --all-namespaces -o json` output. The
+new listing applies the collectors' field selector (as the API server would)
+and prints only the POD_CUSTOM_COLUMNS fields. Both are parsed through the
+collectors' own code with `cat <file>` standing in for kubectl.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+from pod_parser import extract_pod_columns, stream_pod_rows, stream_pods
+from synthetic_pods import make_pod_list
+
+EXCLUDE = ['kube-system']
+PENDING_FRACTION = 0.2
+
+
+def selected(items):
+    """What the API server returns for pod_field_selector(EXCLUDE)"""
+    return [pod for pod in items
+            if pod['metadata']['namespace'] not in EXCLUDE and pod['status']['phase'] != "Pending"]
+
+
+def custom_columns_row(pod):
+    """One line of `kubectl get pods -o custom-columns=... --no-headers`"""
+    metadata = pod['metadata']
+    return "   ".join([metadata['namespace'], metadata['name'], metadata['uid'],
+                       metadata['creationTimestamp'], pod['status'].get('startTime') or "<none>"])
+
+
+def timed_extract(pods):
+    start = time.perf_counter()
+    columns = extract_pod_columns(pods, EXCLUDE)
+    return len(columns['Pod']), time.perf_counter() - start
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    print(f"{'pods':>8} {'json':>10} {'selected':>10} {'columns':>10} {'json parse':>11} {'rows parse':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            pod_list = make_pod_list(size, pending_fraction=PENDING_FRACTION)
+            full_path = os.path.join(tmp, "full.json")
+            with open(full_path, "w") as f:
+                json.dump(pod_list, f, indent=4)
+
+            items = selected(pod_list['items'])
+            # The API path still receives JSON, but only for the selected pods
+            selected_bytes = len(json.dumps({**pod_list, "items": items}))
+            rows_path = os.path.join(tmp, "rows.txt")
+            with open(rows_path, "w") as f:
+                f.writelines(custom_columns_row(pod) + "\n" for pod in items)
+
+            full_count, full_secs = timed_extract(stream_pods(["cat", full_path]))
+            rows_count, rows_secs = timed_extract(stream_pod_rows(["cat", rows_path]))
+            assert full_count == rows_count
+
+            print(f"{size:>8} {os.path.getsize(full_path) / 2**20:>8.1f}Mi {selected_bytes / 2**20:>8.1f}Mi "
+                  f"{os.path.getsize(rows_path) / 2**20:>8.1f}Mi {full_secs:>10.3f}s {rows_secs:>10.3f}s")
+
+
+if __name__ == "__main__":
+    main()
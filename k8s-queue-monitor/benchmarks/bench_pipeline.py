@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput, per-stage latency and peak memory of both collectors
+and the report generator, against a synthetic cluster
+
+kubectl is replaced by fake_kubectl.py, which replays a generated fixture
+through a real pipe. Each pipeline runs in a fresh child process with
+instrumentation on, so the per-stage times are the ones --instrument logs:
+
+    collector      queue_time_collector.py one-shot runs, a new process state per
+                   run as under cron: the first run stores every pod (cold),
+                   later runs find them all stored (warm)
+    cron           the same runs as separate `python3 queue_time_collector.py`
+                   processes, so interpreter start and imports are included;
+                   peak RSS is the largest run's
+    report         process_logs.main() over the collector's data (aggregates)
+    report-exact   process_logs.main() --exact (full history scan)
+    report-chunked process_logs.main() --chunked (chunk-at-a-time history scan)
+    stats          queue_stats_collector.py: --ticks polling ticks, then reports
+
+Results are appended to results/bench_pipeline.jsonl (or --results; ignored by
+git, as results are host-specific) and each run is compared with the last stored run of the same parameters on the same
+host; --check exits non-zero when a wall time or peak RSS regressed by more
+than --tolerance.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MONITOR_DIR = os.path.dirname(BENCH_DIR)
+REPO_DIR = os.path.dirname(MONITOR_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, MONITOR_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+PIPELINES = ["collector", "cron", "report", "report-exact", "report-chunked", "stats"]
+
+# Stages faster than this in the stored run are too noisy to compare
+MIN_STAGE_SECS = 0.02
+DEFAULT_RESULTS = os.path.join(BENCH_DIR, "results", "bench_pipeline.jsonl")
+
+
+def read_records(log_path):
+    if not os.path.exists(log_path):
+        return []
+    with open(log_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def summarize(records, kind):
+    """Wall time and per-stage seconds of the ticks of one kind"""
+    ticks = [record for record in records if record["kind"] == kind]
+    return [{"secs": tick["secs"], "counts": tick["counts"],
+             "stages": {name: stage["secs"] for name, stage in tick["stages"].items()}} for tick in ticks]
+
+
+def measure(pipeline, work_dir, ticks):
+    """Child process body: run one pipeline, print its result as JSON"""
+    from bench_stream_memory import peak_rss_mib
+    from instrumentation import Instrumentation
+
+    data_dir = os.path.join(work_dir, "data")
+    log_path = os.path.join(work_dir, f"{pipeline}.jsonl")
+    instrumentation = Instrumentation(log_path)
+    result = {}
+
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if pipeline == "collector":
+            from queue_time_collector import QueueTimeCollector
+
+            for _ in range(ticks):
+                run_started = time.perf_counter()
+                collector = QueueTimeCollector(output_dir=data_dir, instrumentation=instrumentation)
+                startup = time.perf_counter() - run_started
+                collector.run_collection()
+                result.setdefault("startup_secs", []).append(round(startup, 6))
+            runs = summarize(read_records(log_path), "collection")
+
+        elif pipeline == "cron":
+            # Each run logs its tick to the data directory's instrumentation.jsonl
+            cron_log = os.path.join(data_dir, "instrumentation.jsonl")
+            done = len(summarize(read_records(cron_log), "collection"))
+            for _ in range(ticks):
+                run_started = time.perf_counter()
+                subprocess.run([sys.executable, os.path.join(MONITOR_DIR, "queue_time_collector.py"), "--instrument"],
+                               check=True, stdout=devnull)
+                result.setdefault("process_secs", []).append(round(time.perf_counter() - run_started, 6))
+            runs = summarize(read_records(cron_log), "collection")[done:]
+            for run, process_secs in zip(runs, result["process_secs"]):
+                run["stages"]["startup"] = round(process_secs - run["secs"], 6)
+            # ru_maxrss is the largest finished child's, in KiB on Linux
+            result["peak_rss_mib"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+
+        elif pipeline.startswith("report"):
+            import process_logs
+
+            # main() logs its own run to the data directory's instrumentation.jsonl
+            sys.argv = ["process_logs.py", os.path.join(data_dir, "history"), "--instrument"]
+            if pipeline != "report":
+                sys.argv.append("--" + pipeline.split("-")[1])
+            process_logs.main()
+            runs = summarize(read_records(os.path.join(data_dir, "instrumentation.jsonl")), "report")[-1:]
+
+        else:
+            from queue_stats_collector import QueueTimeStatsCollector
+
+            interval = 0.05
+            collector = QueueTimeStatsCollector(duration_mins=ticks * interval / 60, interval_secs=interval,
+                                                output_dir=os.path.join(work_dir, "stats"))
+            collector.api_client = None
+            collector.instrumentation = instrumentation
+            collector.run()
+            runs = summarize(read_records(log_path), "collection") + summarize(read_records(log_path), "report")
+    elapsed = time.perf_counter() - started
+
+    result.setdefault("peak_rss_mib", round(peak_rss_mib(), 1))
+    result.update({"secs": round(elapsed, 6), "runs": runs})
+    print(json.dumps(result))
+
+
+def run_pipeline(pipeline, work_dir, fixture_dir, ticks):
+    """Run one pipeline in a child process with kubectl stubbed out"""
+    bin_dir = os.path.join(work_dir, "bin")
+    env = dict(os.environ,
+               K8S_QUEUE_MONITOR_API="off",
+               K8S_QUEUE_MONITOR_KUBECTL_PATH=os.path.join(bin_dir, "kubectl"),
+               K8S_QUEUE_MONITOR_BENCH_FIXTURE=fixture_dir,
+               K8S_QUEUE_MONITOR_OUTPUT_DIR=os.path.join(work_dir, "data"),
+               PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""))
+    env.pop("K8S_QUEUE_MONITOR_CONTEXTS", None)
+    env.pop("K8S_QUEUE_MONITOR_INSTRUMENT", None)
+    env.pop("K8S_QUEUE_MONITOR_PROFILE", None)
+    proc = subprocess.run([sys.executable, __file__, "--measure", pipeline, work_dir, str(ticks)],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{pipeline} failed: {(proc.stderr.strip().splitlines() or ['?'])[-1]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def prepare(work_dir, args):
+    """Write the fixture and a kubectl shim that runs fake_kubectl.py"""
+    from synthetic_pods import make_pod_list, write_kubectl_fixture
+
+    fixture_dir = os.path.join(work_dir, "fixture")
+    write_kubectl_fixture(fixture_dir, make_pod_list(args.pods, args.namespaces, args.seed,
+                                                     args.pending, args.skew))
+    bin_dir = os.path.join(work_dir, "bin")
+    os.makedirs(bin_dir)
+    shim = os.path.join(bin_dir, "kubectl")
+    with open(shim, "w") as f:
+        f.write(f"#!/bin/sh\nexec {sys.executable} {os.path.join(BENCH_DIR, 'fake_kubectl.py')} \"$@\"\n")
+    os.chmod(shim, 0o755)
+    return fixture_dir
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def previous_result(results_path, params):
+    """Last stored result with the same parameters from this host"""
+    previous = None
+    for record in read_records(results_path):
+        if record["params"] == params and record["host"] == platform.node():
+            previous = record
+    return previous
+
+
+def stage_totals(result):
+    """Seconds per stage, summed over a pipeline's runs"""
+    totals = {}
+    for run in result["runs"]:
+        for name, secs in run["stages"].items():
+            totals[name] = totals.get(name, 0.0) + secs
+    return totals
+
+
+def compare(current, previous, tolerance):
+    """Lines describing wall time, peak RSS and stage time changes; True if any regressed beyond tolerance"""
+    lines, regressed = [], False
+    for pipeline, result in current.items():
+        old = previous["pipelines"].get(pipeline)
+        if not old:
+            continue
+        values = {"secs": result["secs"], "peak_rss_mib": result["peak_rss_mib"]}
+        old_values = {"secs": old["secs"], "peak_rss_mib": old["peak_rss_mib"]}
+        new_stages, old_stages = stage_totals(result), stage_totals(old)
+        for name, secs in old_stages.items():
+            if secs >= MIN_STAGE_SECS and name in new_stages:
+                values[f"stage {name}"], old_values[f"stage {name}"] = new_stages[name], secs
+
+        for key, value in values.items():
+            change = value / old_values[key] - 1
+            flag = ""
+            if change > tolerance:
+                flag, regressed = "  REGRESSION", True
+            lines.append(f"{pipeline:<14} {key:<24} {old_values[key]:>9.3f} -> {value:>9.3f} ({change:+.0%}){flag}")
+    return lines, regressed
+
+
+def print_result(pipeline, result, pods):
+    runs = result["runs"]
+    print(f"\n{pipeline}: {result['secs']:.2f}s total, peak RSS {result['peak_rss_mib']:.0f} MiB")
+    for index, run in enumerate(runs):
+        new_pods = run["counts"].get("new_pods")
+        rate = f", {pods / run['secs']:,.0f} listed pods/s" if new_pods is not None and run["secs"] else ""
+        top = sorted(run["stages"].items(), key=lambda item: -item[1])[:5]
+        stages = ", ".join(f"{name} {secs:.3f}s" for name, secs in top)
+        print(f"  run {index + 1}: {run['secs']:.3f}s{rate}")
+        print(f"    {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pods", type=int, default=20000, help="Pods in the synthetic cluster (default: 20000)")
+    parser.add_argument("--namespaces", type=int, default=20, help="Namespaces (default: 20, plus kube-system)")
+    parser.add_argument("--pending", type=float, default=0.1, help="Fraction of Pending pods (default: 0.1)")
+    parser.add_argument("--skew", type=int, default=0,
+                        help="Start time clock skew, +/- seconds (default: 0)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=3,
+                        help="Collector runs / polling ticks per pipeline (default: 3)")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES),
+                        help=f"Comma-separated subset of {', '.join(PIPELINES)}")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSON-lines file results are stored in")
+    parser.add_argument("--no-save", action="store_true", help="Compare with stored results but don't store")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a pipeline regressed beyond --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown or RSS growth vs the last stored run (default: 0.25)")
+    args = parser.parse_args()
+
+    pipelines = [p.strip() for p in args.pipelines.split(",") if p.strip() in PIPELINES]
+    # The reports read the collector's data
+    if any(p.startswith("report") for p in pipelines) and "collector" not in pipelines:
+        pipelines.insert(0, "collector")
+    params = {"pods": args.pods, "namespaces": args.namespaces, "pending": args.pending, "skew": args.skew,
+              "seed": args.seed, "ticks": args.ticks}
+    print(f"Synthetic cluster: {args.pods:,} pods, {args.namespaces} namespaces, "
+          f"{args.pending:.0%} Pending, +/-{args.skew}s skew; {args.ticks} ticks")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixture_dir = prepare(work_dir, args)
+        for pipeline in pipelines:
+            results[pipeline] = run_pipeline(pipeline, work_dir, fixture_dir, args.ticks)
+            print_result(pipeline, results[pipeline], args.pods)
+
+    previous = previous_result(args.results, params)
+    regressed = False
+    if previous:
+        print(f"\nCompared with {previous['time']} ({previous.get('revision') or 'unknown revision'}):")
+        lines, regressed = compare(results, previous, args.tolerance)
+        for line in lines:
+            print(f"  {line}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        record = {"time": datetime.datetime.now().isoformat(timespec="seconds"), "revision": git_revision(),
+                  "host": platform.node(), "python": platform.python_version(), "params": params,
+                  "pipelines": results}
+        with open(args.results, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"\nResults stored in {args.results}")
+
+    if args.check and regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main()
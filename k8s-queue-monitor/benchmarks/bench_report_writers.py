@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Write time, peak memory and file size of each raw-data report format
+
+The baseline is the old pandas `to_excel(engine='openpyxl')` call. Each
+measurement runs in a fresh child process on a synthetic report frame shaped
+like all_queue_times, and reports how far peak RSS grew while writing.
+"""
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+MODES = ["pandas-xlsx", "xlsx", "csv", "csv.gz", "parquet"]
+
+
+def report_frame(rows, seed=0):
+    """A frame with the all_queue_times columns and rows pods"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    queue_times = np.round(rng.exponential(120, rows), 1)
+    days, remainder = np.divmod(queue_times, 86400)
+    hours, remainder = np.divmod(remainder, 3600)
+    minutes, seconds = np.divmod(remainder, 60)
+    return pd.DataFrame({
+        'Timestamp': pd.Categorical(rng.choice([f"2024-01-08 {h:02d}:00:00" for h in range(12)], rows)),
+        'Namespace': pd.Categorical([f"team-{i:02d}" for i in rng.integers(0, 50, rows)]),
+        'Pod': [f"worker-{i:07d}" for i in range(rows)],
+        'QueueTime': queue_times,
+        'QueueTimeFormatted': [f"{int(d)}d {int(h)}h {int(m)}m {s}s" for d, h, m, s in zip(days, hours, minutes, seconds)],
+        'Days': days.astype(int),
+        'Hours': hours.astype(int),
+        'Minutes': minutes.astype(int),
+        'Seconds': seconds,
+        'CreationTime': "2024-01-08T00:00:00Z",
+        'StartTime': "2024-01-08T00:02:00Z",
+    })
+
+
+def reset_peak_rss():
+    """Current RSS in MiB, after resetting the peak (VmHWM) to it where Linux allows"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    from bench_stream_memory import peak_rss_mib
+    return peak_rss_mib()
+
+
+def measure(mode, rows, out_dir):
+    """Child process body: write the frame in one format, print seconds, RSS growth and size"""
+    from bench_stream_memory import peak_rss_mib
+    from report_writers import WRITERS
+
+    df = report_frame(rows)
+    gc.collect()
+    base_mib = reset_peak_rss()
+
+    if mode == "pandas-xlsx":
+        path = os.path.join(out_dir, "baseline.xlsx")
+        started = time.perf_counter()
+        df.to_excel(path, index=False, engine='openpyxl')
+    else:
+        path = os.path.join(out_dir, f"all_queue_times.{mode}")
+        started = time.perf_counter()
+        WRITERS[mode](df, path)
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({"secs": elapsed, "growth_mib": peak_rss_mib() - base_mib,
+                      "size_mib": os.path.getsize(path) / 2**20}))
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 500000]
+    print(f"{'rows':>8} {'format':>12} {'time':>9} {'growth':>10} {'size':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            for mode in MODES:
+                proc = subprocess.run([sys.executable, __file__, "--measure", mode, str(rows), tmp],
+                                      capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(f"{rows:>8} {mode:>12}   failed: {proc.stderr.strip().splitlines()[-1]}")
+                    continue
+                result = json.loads(proc.stdout)
+                print(f"{rows:>8} {mode:>12} {result['secs']:>8.1f}s {result['growth_mib']:>8.1f}Mi "
+                      f"{result['size_mib']:>8.1f}Mi")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+    else:
+        main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Peak memory of buffered vs streamed decoding of a kubectl pod list
+
+Each measurement runs in a fresh child process with `cat <file>` standing in
+for kubectl, and reports the child's peak RSS. The buffered mode is the old
+subprocess.run + json.loads path; the streamed mode is pod_parser.stream_pods.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+
+def peak_rss_mib():
+    """Peak RSS of this process; VmHWM resets on exec, unlike ru_maxrss after fork"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode, path):
+    """Child process body: extract columns from path and print peak RSS in MiB"""
+    from pod_parser import extract_pod_columns, stream_pods
+
+    kubectl_cmd = ["cat", path]
+    if mode == "buffered":
+        result = subprocess.run(kubectl_cmd, capture_output=True, text=True, check=True)
+        items = json.loads(result.stdout)['items']
+    else:
+        items = stream_pods(kubectl_cmd)
+    columns = extract_pod_columns(items, ['kube-system'])
+
+    print(json.dumps({"pods": len(columns['Pod']), "peak_mib": peak_rss_mib()}))
+
+
+def main():
+    from synthetic_pods import write_pod_list
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000, 100000]
+    print(f"{'pods':>8} {'payload':>10} {'buffered':>10} {'streamed':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"pods_{size}.json")
+            write_pod_list(path, size)
+            payload_mib = os.path.getsize(path) / 2**20
+
+            peaks = {}
+            for mode in ("buffered", "streamed"):
+                out = subprocess.run([sys.executable, __file__, "--measure", mode, path],
+                                     capture_output=True, text=True, check=True).stdout
+                peaks[mode] = json.loads(out)["peak_mib"]
+            print(f"{size:>8} {payload_mib:>8.1f}Mi {peaks['buffered']:>8.1f}Mi {peaks['streamed']:>8.1f}Mi")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Stand-in for `kubectl get pods` that replays a fixture written by
+synthetic_pods.write_kubectl_fixture from $K8S_QUEUE_MONITOR_BENCH_FIXTURE
+
+Pod listings built with pod_list_args get the custom-columns rows for their
+phase selector; `-o json` gets the full listing. Output is streamed through
+the pipe like kubectl's, so spawn and transfer costs stay in the measurements.
+Label selectors and other flags are ignored.
+"""
+import os
+import shutil
+import sys
+
+
+def fixture_file(args):
+    field_selector = next((arg.split("=", 1)[1] for arg in args if arg.startswith("--field-selector=")), "")
+    if "-o" in args and args[args.index("-o") + 1] == "json":
+        return "pods.json"
+    if "status.phase=Pending" in field_selector.split(","):
+        return "pending.txt"
+    return "started.txt"
+
+
+def main():
+    fixture_dir = os.environ.get("K8S_QUEUE_MONITOR_BENCH_FIXTURE")
+    if not fixture_dir:
+        print("K8S_QUEUE_MONITOR_BENCH_FIXTURE is not set", file=sys.stderr)
+        sys.exit(1)
+    with open(os.path.join(fixture_dir, fixture_file(sys.argv[1:]))) as f:
+        shutil.copyfileobj(f, sys.stdout, 64 * 1024)
+
+
+if __name__ == "__main__":
+    main()
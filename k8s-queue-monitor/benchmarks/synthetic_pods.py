@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Synthetic `kubectl get pods --all-namespaces -o json` payloads for benchmarks"""
+import datetime
+import json
+import os
+import random
+import uuid
+
+MISSING = "<none>"
+
+
+def make_pod(index, namespace, created, queue_secs):
+    """
+    One pod object shaped like kubectl's output, with typical metadata noise
+
+    queue_secs=None makes a Pending pod that has not been scheduled yet. A
+    started pod's conditions split its wait into scheduling (a share of the
+    queue time fixed by index, so the random sequence is unchanged), init and
+    container start. Pods belong to workloads of 50 consecutive indexes
+    (Jobs, ReplicaSets and StatefulSets in turn); every 97th pod is bare.
+    """
+    name = f"worker-{index:07d}"
+    pod = {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": str(uuid.UUID(int=random.getrandbits(128))),
+            "creationTimestamp": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "resourceVersion": str(1000 + index),
+            "labels": {"app": namespace, "pod-template-hash": "5d8f9c7b6d"},
+        },
+        "spec": {
+            "nodeName": f"node-{index % 500:03d}",
+            "containers": [{
+                "name": "main",
+                "image": "registry.example.com/team/trainer:1.2.3",
+                "resources": {"limits": {"cpu": "4", "memory": "16Gi"}},
+            }],
+        },
+        "status": {
+            "phase": "Running",
+            "podIP": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+            "containerStatuses": [{"name": "main", "ready": True, "restartCount": 0}],
+        },
+    }
+    if index % 97:
+        kind = ["Job", "ReplicaSet", "StatefulSet"][index // 50 % 3]
+        pod["metadata"]["ownerReferences"] = [{
+            "apiVersion": "apps/v1", "kind": kind, "name": f"{kind.lower()}-{index // 50:05d}",
+            "uid": str(uuid.UUID(int=index // 50)), "controller": True, "blockOwnerDeletion": True,
+        }]
+    if queue_secs is None:
+        del pod["spec"]["nodeName"]
+        pod["status"] = {"phase": "Pending", "conditions": [
+            {"type": "PodScheduled", "status": "False", "reason": "Unschedulable"}]}
+    else:
+        started = created + datetime.timedelta(seconds=queue_secs)
+        pod["status"]["startTime"] = started.strftime("%Y-%m-%dT%H:%M:%SZ")
+        scheduled = created + datetime.timedelta(seconds=max(queue_secs, 0) * (index % 10) // 10)
+        initialized = started + datetime.timedelta(seconds=(index % 3 == 0) * 4)
+        ready = initialized + datetime.timedelta(seconds=5 + index % 40)
+        pod["status"]["conditions"] = [
+            {"type": condition_type, "status": "True", "lastTransitionTime": at.strftime("%Y-%m-%dT%H:%M:%SZ")}
+            for condition_type, at in [("Initialized", initialized), ("Ready", ready),
+                                         ("ContainersReady", ready), ("PodScheduled", scheduled)]]
+    return pod
+
+
+def make_pod_list(pod_count, namespace_count=20, seed=0, pending_fraction=0.0, skew_secs=0):
+    """
+    A pod list dict with pod_count pods spread over namespace_count namespaces
+
+    pending_fraction of the pods are Pending (no startTime), the rest Running.
+    skew_secs shifts each startTime by up to +/- that many seconds, as clock
+    skew between the control plane and kubelets would, so some queue times
+    come out negative.
+    """
+    random.seed(seed)
+    now = datetime.datetime(2024, 1, 8, tzinfo=datetime.timezone.utc)
+    namespaces = [f"team-{i:02d}" for i in range(namespace_count)] + ["kube-system"]
+
+    items = []
+    for index in range(pod_count):
+        created = now - datetime.timedelta(seconds=random.randint(0, 7 * 86400))
+        queue_secs = int(random.expovariate(1 / 120))
+        if skew_secs:
+            queue_secs += random.randint(-skew_secs, skew_secs)
+        if pending_fraction and random.random() < pending_fraction:
+            queue_secs = None
+        items.append(make_pod(index, random.choice(namespaces), created, queue_secs))
+
+    return {"apiVersion": "v1", "items": items, "kind": "List", "metadata": {"resourceVersion": ""}}
+
+
+def write_pod_list(path, pod_count, namespace_count=20, seed=0, pending_fraction=0.0, skew_secs=0):
+    """Write a synthetic pod list to path as kubectl would print it"""
+    with open(path, "w") as f:
+        json.dump(make_pod_list(pod_count, namespace_count, seed, pending_fraction, skew_secs), f, indent=4)
+
+
+def write_kubectl_fixture(fixture_dir, pod_list, exclude_namespaces=("kube-system",)):
+    """
+    Write what kubectl prints for a pod list, for fake_kubectl.py to replay
+
+    pods.json is the full `-o json` listing. started.txt and pending.txt are the
+    `--no-headers -o custom-columns` rows for the collectors' two field
+    selectors (status.phase!=Pending and status.phase=Pending), with the
+    excluded namespaces already filtered out, as the API server would.
+    """
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(os.path.join(fixture_dir, "pods.json"), "w") as f:
+        json.dump(pod_list, f, indent=4)
+
+    with open(os.path.join(fixture_dir, "started.txt"), "w") as started, \
+            open(os.path.join(fixture_dir, "pending.txt"), "w") as pending:
+        for pod in pod_list["items"]:
+            metadata = pod["metadata"]
+            if metadata["namespace"] in exclude_namespaces:
+                continue
+            out = pending if pod["status"]["phase"] == "Pending" else started
+            true_conditions = [c for c in pod["status"].get("conditions", []) if c["status"] == "True"]
+            types = ",".join(c["type"] for c in true_conditions) or MISSING
+            transitions = ",".join(c["lastTransitionTime"] for c in true_conditions) or MISSING
+            owner = next((o for o in metadata.get("ownerReferences", []) if o.get("controller")), None)
+            owner_kind, owner_name = (owner["kind"], owner["name"]) if owner else (MISSING, MISSING)
+            out.write(f"{metadata['namespace']} {metadata['name']} {metadata['uid']} "
+                      f"{metadata['creationTimestamp']} {pod['status'].get('startTime', MISSING)} "
+                      f"{types} {transitions} {owner_kind} {owner_name}\n")
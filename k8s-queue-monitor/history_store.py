@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Append-only, hour-partitioned history store for queue time records.
+
+Layout under the store root:
+
+    2026-10-16T18/                      one partition per collection hour
+        20261016T184501-12345.qtc       one immutable chunk per append
+
+Each append writes new chunk files only (temp file + rename, so a crash never
+leaves a half-written chunk), and retention deletes whole partitions older than
+the window without reading or rewriting live data.
+
+Chunks use a small columnar format: magic bytes, a JSON header describing the
+columns, then one blob per column. Numeric columns are raw little-endian
+float64/int64 arrays (float32 for the queue phase durations), string columns
+are zlib-compressed JSON arrays. Chunks written before the phase columns
+existed lack them, and readers treat their phases as unknown.
+
+Times are stored as int64 epoch seconds, so loading history never parses a
+date: Timestamp (the local collection time), CreationTime and StartTime (UTC).
+Chunks written with string times are converted as they are read.
+"""
+import array
+import datetime
+import json
+import os
+import shutil
+import struct
+import sys
+import zlib
+
+from pod_parser import k8s_epoch, k8s_epochs
+
+MAGIC = b"QTC1"
+CHUNK_SUFFIX = ".qtc"
+PARTITION_FORMAT = "%Y-%m-%dT%H"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIME_COLUMNS = ['CreationTime', 'StartTime']
+
+
+def _partition_key(timestamp):
+    """Partition name for a 'YYYY-MM-DD HH:MM:SS' collection timestamp"""
+    return f"{timestamp[:10]}T{timestamp[11:13]}"
+
+
+def collection_epochs(values):
+    """Epoch seconds of local 'YYYY-MM-DD HH:MM:SS' collection timestamps, parsing each distinct value once"""
+    parsed = {}
+    result = []
+    for value in values:
+        epoch = parsed.get(value)
+        if epoch is None:
+            epoch = parsed[value] = int(datetime.datetime.strptime(value, TIMESTAMP_FORMAT).timestamp())
+        result.append(epoch)
+    return result
+
+
+def collection_timestamps(epochs):
+    """Local 'YYYY-MM-DD HH:MM:SS' strings of epoch collection timestamps, formatting each distinct value once"""
+    formatted = {}
+    result = []
+    for epoch in epochs:
+        epoch = int(epoch)
+        value = formatted.get(epoch)
+        if value is None:
+            value = formatted[epoch] = datetime.datetime.fromtimestamp(epoch).strftime(TIMESTAMP_FORMAT)
+        result.append(value)
+    return result
+
+
+def _encode_column(values):
+    """Encode a column as (type code, bytes)"""
+    if isinstance(values, array.array) and values.typecode in ('d', 'f', 'q'):
+        typecode = values.typecode
+    elif all(isinstance(v, float) for v in values):
+        typecode = 'd'
+    elif all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        typecode = 'q'
+    else:
+        return 's', zlib.compress(json.dumps(list(values), separators=(",", ":")).encode(), 1)
+
+    # Typed arrays (QueueTimeRows columns) are written without a copy
+    buf = values if isinstance(values, array.array) and values.typecode == typecode else array.array(typecode, values)
+    if sys.byteorder == "big":
+        buf = array.array(typecode, buf)
+        buf.byteswap()
+    return typecode, buf.tobytes()
+
+
+def _decode_column(typecode, blob):
+    """Decode a column blob back to a list-like (array for numerics)"""
+    if typecode == 's':
+        return json.loads(zlib.decompress(blob))
+
+    buf = array.array(typecode)
+    buf.frombytes(blob)
+    if sys.byteorder == "big":
+        buf.byteswap()
+    return buf
+
+
+def write_chunk(path, columns):
+    """Atomically write a dict of equal-length columns to path"""
+    names = list(columns)
+    rows = len(columns[names[0]]) if names else 0
+    encoded = [_encode_column(columns[name] if isinstance(columns[name], array.array) else list(columns[name]))
+               for name in names]
+    header = json.dumps({
+        "rows": rows,
+        "columns": [[name, typecode, len(blob)] for name, (typecode, blob) in zip(names, encoded)],
+    }).encode()
+
+    tmp_path = os.path.join(os.path.dirname(path), f".tmp-{os.path.basename(path)}")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for _, blob in encoded:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Leave neither the chunk nor a partial temp file behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _take(values, indices):
+    """The values at the given positions, keeping typed arrays typed"""
+    if isinstance(values, array.array):
+        return array.array(values.typecode, [values[i] for i in indices])
+    return [values[i] for i in indices]
+
+
+def read_chunk_header(f):
+    """Read and validate a chunk header from an open file"""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"Not a queue time chunk: {getattr(f, 'name', f)}")
+    (header_len,) = struct.unpack("<I", f.read(4))
+    return json.loads(f.read(header_len))
+
+
+def read_chunk(path, columns=None):
+    """Read a chunk as a dict of columns, optionally only the named ones"""
+    with open(path, "rb") as f:
+        header = read_chunk_header(f)
+        result = {}
+        for name, typecode, size in header["columns"]:
+            if columns is not None and name not in columns:
+                f.seek(size, os.SEEK_CUR)
+                continue
+            result[name] = _decode_column(typecode, f.read(size))
+    return result
+
+
+def read_frame(path, columns=None):
+    """Read a chunk as a DataFrame, with string times from older chunks converted to epoch seconds"""
+    import numpy as np
+    import pandas as pd
+
+    chunk = read_chunk(path, columns)
+    for name, values in chunk.items():
+        if isinstance(values, array.array):
+            # Numeric columns are wrapped without copying
+            chunk[name] = np.frombuffer(values, dtype=values.typecode)
+        elif name == 'Timestamp':
+            # Chunks written before times were stored as epochs
+            chunk[name] = np.array(collection_epochs(values), dtype=np.int64)
+        elif name in TIME_COLUMNS:
+            chunk[name] = k8s_epochs(values)
+    return pd.DataFrame(chunk)
+
+
+class HistoryStore:
+    def __init__(self, root, retention_days=7):
+        """
+        Initialize the store
+
+        Args:
+            root: Directory holding the partitions (created if missing)
+            retention_days: Partitions older than this are removed by expire()
+        """
+        self.root = root
+        self.retention_days = retention_days
+        os.makedirs(self.root, exist_ok=True)
+
+    def partitions(self):
+        """Sorted partition names (oldest first)"""
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, name)) and not name.startswith("."))
+
+    def chunk_paths(self, since=None):
+        """Chunk files in partition order, optionally only partitions at or after `since` (datetime)"""
+        since_key = since.strftime(PARTITION_FORMAT) if since else None
+        paths = []
+        for partition in self.partitions():
+            if since_key and partition < since_key:
+                continue
+            partition_dir = os.path.join(self.root, partition)
+            paths.extend(os.path.join(partition_dir, name) for name in sorted(os.listdir(partition_dir))
+                         if name.endswith(CHUNK_SUFFIX) and not name.startswith("."))
+        return paths
+
+    def append(self, rows):
+        """
+        Append new rows (QueueTimeRows, or a DataFrame with a string Timestamp
+        column); writes one chunk per partition, with the time columns as epoch seconds
+        """
+        if rows.empty:
+            return 0
+        if isinstance(rows.columns, dict):
+            columns = dict(rows.columns)
+        else:
+            columns = {name: rows[name].tolist() for name in rows.columns}
+
+        timestamps = [str(value) for value in columns['Timestamp']]
+        columns['Timestamp'] = array.array('q', collection_epochs(timestamps))
+        for name in TIME_COLUMNS:
+            values = columns.get(name)
+            if values is not None and isinstance(values[0], str):
+                columns[name] = array.array('q', [k8s_epoch(value) for value in values])
+
+        partitions = {}
+        for i, timestamp in enumerate(timestamps):
+            partitions.setdefault(_partition_key(timestamp), []).append(i)
+
+        stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+        for partition, indices in sorted(partitions.items()):
+            partition_dir = os.path.join(self.root, partition)
+            os.makedirs(partition_dir, exist_ok=True)
+
+            # Unique per writer and per append within the same second
+            name = f"{stamp}-{os.getpid()}"
+            suffix = 0
+            while os.path.exists(os.path.join(partition_dir, f"{name}{CHUNK_SUFFIX}")):
+                suffix += 1
+                name = f"{stamp}-{os.getpid()}-{suffix}"
+
+            if len(indices) == len(timestamps):
+                chunk = columns
+            else:
+                chunk = {column: _take(values, indices) for column, values in columns.items()}
+            write_chunk(os.path.join(partition_dir, f"{name}{CHUNK_SUFFIX}"), chunk)
+        return len(timestamps)
+
+    def expire(self, now=None):
+        """Remove whole partitions older than the retention window; returns their names"""
+        now = now or datetime.datetime.now()
+        cutoff_key = (now - datetime.timedelta(days=self.retention_days)).strftime(PARTITION_FORMAT)
+        expired = [p for p in self.partitions() if p < cutoff_key]
+        for partition in expired:
+            shutil.rmtree(os.path.join(self.root, partition), ignore_errors=True)
+        return expired
+
+    def count_rows(self):
+        """Total rows in the store, read from chunk headers only"""
+        total = 0
+        for path in self.chunk_paths():
+            with open(path, "rb") as f:
+                total += read_chunk_header(f)["rows"]
+        return total
+
+    def iter_frames(self, since=None, columns=None):
+        """Yield one DataFrame per chunk"""
+        for path in self.chunk_paths(since):
+            yield read_frame(path, columns)
+
+    def load(self, since=None, columns=None):
+        """Load the whole store (or partitions since a datetime) as one DataFrame"""
+        import pandas as pd
+
+        frames = list(self.iter_frames(since, columns))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
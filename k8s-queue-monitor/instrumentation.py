@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Per-stage timing and memory records for collection and report runs.
+
+Code marks its stages with `stage(name)` (a context manager) or
+`timed_iter(name, iterable)` (times only the work done inside the iterable's
+next()). While a tick is open, each stage's self time is accumulated: time
+spent in a nested stage counts only for the inner one, so the stages of a
+tick add up to its wall time (summed across threads when several clusters
+are collected at once). Outside a tick both are no-ops that cost one global
+lookup.
+
+At the end of each tick one JSON line is appended to the log:
+
+    {"time": "2026-10-16T18:00:00", "kind": "collection", "secs": 4.21,
+     "stages": {"kubectl_read": {"secs": 2.9, "calls": 61}, "parse": {...}, ...},
+     "counts": {"new_pods": 118}, "max_rss_mib": 212.4}
+
+Profiling adds, per tick, a cProfile dump ("cpu", main thread only, open with
+`python3 -m pstats`) and/or a tracemalloc top-allocations listing plus a
+per-stage "mem_mib" net allocation ("memory"), under profiles/.
+"""
+import contextlib
+import datetime
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+PROFILE_MODES = ['cpu', 'memory', 'all']
+
+_NULL = contextlib.nullcontext()
+
+# Instrumentation collecting the current tick, or None
+_active = None
+
+
+def stage(name):
+    """Context manager timing a stage of the current tick; a no-op outside a tick"""
+    if _active is None:
+        return _NULL
+    return _Stage(_active, name)
+
+
+def timed_iter(name, iterable):
+    """iterable, with the time spent producing each item counted as stage `name`"""
+    if _active is None:
+        return iterable
+    return _active.timed_iter(name, iterable)
+
+
+def count(name, n=1):
+    """Add n to a counter of the current tick"""
+    if _active is not None:
+        _active.count(name, n)
+
+
+class _Stage:
+    __slots__ = ('instrumentation', 'name', 'start', 'child', 'memory')
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        stack = self.instrumentation.stack()
+        stack.append(self)
+        self.child = 0.0
+        self.memory = self.instrumentation.traced_memory()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.instrumentation.stack()
+        stack.pop()
+        if stack:
+            stack[-1].child += elapsed
+        memory = self.instrumentation.traced_memory()
+        self.instrumentation.add(self.name, elapsed - self.child,
+                                 None if memory is None else memory - self.memory)
+        return False
+
+
+class Instrumentation:
+    def __init__(self, log_path=None, profile=None, profile_dir=None):
+        """
+        Initialize instrumentation; disabled unless log_path or profile is set
+
+        Args:
+            log_path: JSON-lines file each tick's record is appended to
+            profile: Also profile each tick: 'cpu' (cProfile), 'memory' (tracemalloc) or 'all'
+            profile_dir: Directory for the per-tick profile dumps (default: next to log_path)
+        """
+        self.log_path = log_path
+        self.profile = profile
+        self.profile_dir = profile_dir or (os.path.join(os.path.dirname(log_path) or ".", "profiles")
+                                           if log_path else "profiles")
+        self.enabled = bool(log_path or profile)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counts = {}
+        self.tracing = False
+
+    @classmethod
+    def from_settings(cls, output_dir, instrument=False, profile=None):
+        """Instrumentation logging to output_dir/instrumentation.jsonl when instrument or profile is set"""
+        if profile and profile not in PROFILE_MODES:
+            print(f"Unknown profile mode ignored: {profile} (choose from {', '.join(PROFILE_MODES)})")
+            profile = None
+        if not (instrument or profile):
+            return cls()
+        return cls(os.path.join(output_dir, "instrumentation.jsonl"), profile,
+                   os.path.join(output_dir, "profiles"))
+
+    def stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def traced_memory(self):
+        if not self.tracing:
+            return None
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[0]
+
+    def add(self, name, seconds, memory=None):
+        with self.lock:
+            totals = self.stages.get(name)
+            if totals is None:
+                totals = self.stages[name] = [0.0, 0, 0]
+            totals[0] += seconds
+            totals[1] += 1
+            if memory is not None:
+                totals[2] += memory
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            with _Stage(self, name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def tick(self, kind):
+        """Context manager recording one tick of the given kind; a no-op when disabled"""
+        if not self.enabled:
+            return _NULL
+        return self._tick(kind)
+
+    @contextlib.contextmanager
+    def _tick(self, kind):
+        global _active
+        self.stages, self.counts = {}, {}
+        profiler = None
+        if self.profile in ('cpu', 'all'):
+            import cProfile
+            profiler = cProfile.Profile()
+        if self.profile in ('memory', 'all'):
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.tracing = True
+
+        started_at = datetime.datetime.now()
+        started = time.perf_counter()
+        _active = self
+        if profiler:
+            profiler.enable()
+        try:
+            with _Stage(self, "other"):
+                yield self
+        finally:
+            if profiler:
+                profiler.disable()
+            _active = None
+            elapsed = time.perf_counter() - started
+            self.write_record(kind, started_at, elapsed, profiler)
+
+    def write_record(self, kind, started_at, elapsed, profiler=None):
+        """Append the tick's JSON line and write its profile dumps"""
+        stages = {}
+        for name, (seconds, calls, memory) in sorted(self.stages.items(), key=lambda item: -item[1][0]):
+            stages[name] = {"secs": round(seconds, 6), "calls": calls}
+            if self.tracing:
+                stages[name]["mem_mib"] = round(memory / 2**20, 3)
+
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        record = {"time": started_at.isoformat(timespec="seconds"), "kind": kind, "secs": round(elapsed, 6),
+                  "stages": stages, "counts": dict(self.counts),
+                  "max_rss_mib": round(max_rss / (2**20 if sys.platform == "darwin" else 2**10), 1)}
+
+        name = f"{started_at:%Y%m%d_%H%M%S}_{kind}"
+        if profiler or self.tracing:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        if profiler:
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+        if self.tracing:
+            import tracemalloc
+            record["traced_peak_mib"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+            top = tracemalloc.take_snapshot().statistics("lineno")[:25]
+            with open(os.path.join(self.profile_dir, f"{name}.tracemalloc.txt"), "w") as f:
+                f.writelines(f"{stat}\n" for stat in top)
+
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        return record
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Minimal in-process Kubernetes API client for listing pods.
+
+Reads the kubeconfig once and keeps a single keep-alive HTTPS connection to
+the API server. It then pages through /api/v1/pods with limit/continue, so no
+single response holds every pod. This avoids a kubectl process launch,
+kubeconfig parse and TLS handshake on every collection.
+
+Only static credentials are supported (bearer token, token file, client
+certificate, basic auth). Kubeconfigs that need an exec/auth-provider plugin
+(EKS, GKE, OCI, ...) raise KubeApiUnavailable, and callers fall back to
+kubectl.
+"""
+import base64
+import gzip
+import http.client
+import json
+import os
+import socket
+import ssl
+import tempfile
+import urllib.parse
+
+from instrumentation import stage
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DEFAULT_PAGE_SIZE = 500
+
+
+class KubeApiUnavailable(Exception):
+    """The kubeconfig can't be used without kubectl"""
+
+
+class KubeApiError(Exception):
+    """An API request failed"""
+
+
+def _read_kubeconfig(path):
+    with open(path) as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    if yaml is None:
+        raise KubeApiUnavailable("PyYAML is not installed, can't read a YAML kubeconfig")
+    return yaml.safe_load(text)
+
+
+def _named(entries, name, kind):
+    for entry in entries or []:
+        if entry.get('name') == name:
+            return entry.get(kind) or {}
+    raise KubeApiUnavailable(f"{kind} '{name}' not found in kubeconfig")
+
+
+def _resolve_path(value, base_dir):
+    return value if os.path.isabs(value) else os.path.join(base_dir, value)
+
+
+def load_kubeconfig(path, context=None):
+    """
+    Resolve a kubeconfig context to (server, ssl_context, headers)
+
+    Raises KubeApiUnavailable if the credentials need kubectl.
+    """
+    config = _read_kubeconfig(path)
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    context_name = context or config.get('current-context')
+    if not context_name:
+        raise KubeApiUnavailable("kubeconfig has no current-context")
+    ctx = _named(config.get('contexts'), context_name, 'context')
+    cluster = _named(config.get('clusters'), ctx.get('cluster'), 'cluster')
+    user = _named(config.get('users'), ctx.get('user'), 'user') if ctx.get('user') else {}
+
+    if 'exec' in user or 'auth-provider' in user:
+        raise KubeApiUnavailable(f"context '{context_name}' uses an exec/auth-provider plugin")
+
+    server = cluster.get('server')
+    if not server:
+        raise KubeApiUnavailable(f"context '{context_name}' has no server")
+
+    ssl_context = None
+    if server.startswith("https://"):
+        ssl_context = ssl.create_default_context()
+        if cluster.get('insecure-skip-tls-verify'):
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        elif cluster.get('certificate-authority-data'):
+            ssl_context.load_verify_locations(
+                cadata=base64.b64decode(cluster['certificate-authority-data']).decode())
+        elif cluster.get('certificate-authority'):
+            ssl_context.load_verify_locations(cafile=_resolve_path(cluster['certificate-authority'], base_dir))
+
+        if user.get('client-certificate-data') or user.get('client-certificate'):
+            _load_client_cert(ssl_context, user, base_dir)
+
+    headers = {}
+    if user.get('token'):
+        headers['Authorization'] = f"Bearer {user['token']}"
+    elif user.get('tokenFile'):
+        with open(_resolve_path(user['tokenFile'], base_dir)) as f:
+            headers['Authorization'] = f"Bearer {f.read().strip()}"
+    elif user.get('username') and user.get('password'):
+        credentials = base64.b64encode(f"{user['username']}:{user['password']}".encode()).decode()
+        headers['Authorization'] = f"Basic {credentials}"
+
+    return server, ssl_context, headers
+
+
+def _load_client_cert(ssl_context, user, base_dir):
+    """load_cert_chain only takes file paths, so inline cert/key data goes through temp files"""
+    temp_paths = []
+    try:
+        paths = []
+        for key in ('client-certificate', 'client-key'):
+            if user.get(f'{key}-data'):
+                with tempfile.NamedTemporaryFile("wb", delete=False) as f:
+                    f.write(base64.b64decode(user[f'{key}-data']))
+                temp_paths.append(f.name)
+                paths.append(f.name)
+            else:
+                paths.append(_resolve_path(user[key], base_dir) if user.get(key) else None)
+        ssl_context.load_cert_chain(paths[0], paths[1])
+    finally:
+        for temp_path in temp_paths:
+            os.remove(temp_path)
+
+
+class KubeApiClient:
+    def __init__(self, server, ssl_context=None, headers=None, page_size=DEFAULT_PAGE_SIZE, timeout=60):
+        """
+        Initialize the client (no connection is made until the first request)
+
+        Args:
+            server: API server URL, e.g. https://10.0.0.1:6443 or http://127.0.0.1:8001
+            ssl_context: SSLContext for https servers
+            headers: Extra request headers (e.g. Authorization)
+            page_size: Pods per page (the `limit` parameter)
+            timeout: Socket timeout in seconds
+        """
+        parsed = urllib.parse.urlsplit(server)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip("/")
+        self.ssl_context = ssl_context
+        self.headers = dict(headers or {})
+        self.page_size = page_size
+        self.timeout = timeout
+        self.connection = None
+
+    @classmethod
+    def from_kubeconfig(cls, path, context=None, **kwargs):
+        server, ssl_context, headers = load_kubeconfig(path, context)
+        return cls(server, ssl_context, headers, **kwargs)
+
+    def _connect(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def abort(self):
+        """Make a request blocked on another thread fail now; shutting the socket down wakes its read"""
+        connection = self.connection
+        sock = connection.sock if connection is not None else None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def get_json(self, path, params=None, cancelled=None):
+        """
+        GET a path on the pooled connection and decode the JSON body
+
+        Once the `cancelled` Event is set the request is not retried, and
+        KubeApiError is raised instead.
+        """
+        url = self.base_path + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip", **self.headers}
+
+        # One retry on a fresh connection, for keep-alive connections the server closed
+        for attempt in range(2):
+            if cancelled is not None and cancelled.is_set():
+                self.close()
+                raise KubeApiError(f"GET {url} cancelled")
+            if self.connection is None:
+                self.connection = self._connect()
+            try:
+                with stage("api_transfer"):
+                    self.connection.request("GET", url, headers=headers)
+                    response = self.connection.getresponse()
+                    body = response.read()
+                break
+            except (http.client.HTTPException, OSError) as e:
+                self.close()
+                if attempt:
+                    raise KubeApiError(f"GET {url} failed: {e}") from e
+
+        with stage("api_decode"):
+            if response.getheader("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            if response.status != 200:
+                raise KubeApiError(f"GET {url} returned {response.status}: {body[:200].decode(errors='replace')}")
+            return json.loads(body)
+
+    def iter_pods(self, params=None, cancelled=None):
+        """Yield every pod across all namespaces, one page of page_size pods at a time (see get_json for cancelled)"""
+        params = dict(params or {})
+        params['limit'] = self.page_size
+        while True:
+            page = self.get_json("/api/v1/pods", params, cancelled)
+            yield from page.get('items') or []
+
+            token = page.get('metadata', {}).get('continue')
+            if not token:
+                return
+            params['continue'] = token
+
+
+def connect(kubeconfig, context=None, **kwargs):
+    """KubeApiClient for a kubeconfig context, or None (reason printed) when only kubectl can be used"""
+    try:
+        return KubeApiClient.from_kubeconfig(kubeconfig, context, **kwargs)
+    except Exception as e:
+        print(f"Direct API access unavailable ({e}), using kubectl")
+        return None
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Incremental decoding of kubectl's JSON output.
+
+kubectl's stdout is read from the pipe in fixed-size chunks, and values are
+decoded as soon as they are complete. Neither the whole payload nor the whole
+object tree is ever held in memory at once.
+"""
+import json
+import subprocess
+import tempfile
+
+from instrumentation import stage
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",]}"
+
+
+class _ChunkReader:
+    """Cursor over a stream of text chunks that decodes one JSON value at a time"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Append the next chunk to the unread part of the buffer; False at end of stream"""
+        for chunk in self.chunks:
+            if chunk:
+                self.buf = self.buf[self.pos:] + chunk
+                self.pos = 0
+                return True
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at end of stream)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        """Consume the next non-whitespace character, which must be one of chars"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value, read more unless there is nothing left
+                if not self._fill():
+                    raise
+                continue
+            # A bare number/literal cut by a chunk boundary ("1." + "5e3") decodes
+            # as a shorter value; only accept it once a delimiter follows.
+            # Objects, arrays and strings are self-delimiting.
+            if self.buf[end - 1] not in '}]"' and (end == len(self.buf) or self.buf[end] not in _DELIMITERS):
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_json_values(chunks):
+    """Decode a stream of concatenated JSON values from an iterable of text chunks"""
+    reader = _ChunkReader(chunks)
+    while reader.peek():
+        yield reader.value()
+
+
+def iter_list_items(chunks, key='items'):
+    """
+    Yield the elements of the `key` array of a top-level JSON object one at a time
+
+    Other top-level fields (apiVersion, kind, metadata) are decoded and discarded.
+    """
+    reader = _ChunkReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            reader.value()
+
+        if reader.expect(",}") == "}":
+            return
+
+
+def iter_lines(chunks):
+    """Yield complete lines (without the newline) from an iterable of text chunks"""
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def kubectl_chunks(kubectl_cmd, chunk_size=CHUNK_SIZE, on_spawn=None):
+    """
+    Run kubectl and yield its stdout in chunks as it is produced
+
+    on_spawn, if given, is called with the Popen (e.g. to kill kubectl when a
+    deadline passes). Raises CalledProcessError (with stderr) if kubectl exits
+    non-zero.
+    """
+    # stderr goes to a file so a chatty kubectl can't block on a full pipe
+    with tempfile.TemporaryFile(mode="w+") as stderr:
+        with stage("kubectl_spawn"):
+            proc = subprocess.Popen(kubectl_cmd, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        if on_spawn is not None:
+            on_spawn(proc)
+        try:
+            # The first read waits for kubectl's startup and the API server's response
+            read_stage = "kubectl_first_byte"
+            while True:
+                with stage(read_stage):
+                    chunk = proc.stdout.read(chunk_size)
+                read_stage = "kubectl_read"
+                if not chunk:
+                    break
+                yield chunk
+            proc.wait()
+        finally:
+            if proc.poll() is None:
+                # Consumer stopped before the end of the output
+                proc.terminate()
+                proc.wait()
+            proc.stdout.close()
+
+        if proc.returncode != 0:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(proc.returncode, kubectl_cmd, stderr=stderr.read())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Prometheus text-format /metrics endpoint for the resident collector modes.
+
+Metrics are updated in place as pods are observed (a bisect and two integer
+increments per pod). The exposition text is rendered only when something
+changed since the last scrape, so a scrape normally just returns cached bytes,
+whatever the cluster size.
+
+    k8s_queue_monitor_queue_time_seconds{cluster,namespace}        histogram
+    k8s_queue_monitor_pending_pods{cluster,namespace}              gauge
+    k8s_queue_monitor_pending_oldest_wait_seconds{cluster,namespace} gauge
+    k8s_queue_monitor_collection_duration_seconds                  summary
+    k8s_queue_monitor_last_collection_duration_seconds             gauge
+    k8s_queue_monitor_fetch_duration_seconds{cluster,source}       summary
+    k8s_queue_monitor_collection_errors_total{cluster}             counter
+    k8s_queue_monitor_collection_interval_seconds                  gauge
+    k8s_queue_monitor_estimated_coverage_loss                      gauge
+"""
+import bisect
+import http.server
+import threading
+
+# Histogram bucket upper bounds in seconds, from seconds up to a day
+QUEUE_TIME_BUCKETS = [1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400, 28800, 86400]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "k8s_queue_monitor"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class QueueTimeMetrics:
+    def __init__(self, buckets=None):
+        """
+        Initialize empty metrics
+
+        Args:
+            buckets: Queue time histogram bucket upper bounds in seconds
+        """
+        self.buckets = list(buckets or QUEUE_TIME_BUCKETS)
+        self.lock = threading.Lock()
+
+        # (cluster, namespace) -> [per-bucket counts (last is +Inf), sum]
+        self.queue_times = {}
+        self.pending = {}  # (cluster, namespace) -> (count, oldest wait)
+        self.collections = [0, 0.0, 0.0]  # count, sum, last
+        self.fetches = {}  # (cluster, source) -> [count, sum]
+        self.errors = {}
+        self.schedule = None  # (interval secs, estimated coverage loss)
+
+        self.rendered = None
+
+    def observe(self, cluster, namespace, seconds):
+        """Count one pod's queue time"""
+        with self.lock:
+            series = self.queue_times.get((cluster, namespace))
+            if series is None:
+                series = self.queue_times[(cluster, namespace)] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, seconds)] += 1
+            series[1] += seconds
+            self.rendered = None
+
+    def set_pending(self, cluster, counts, oldest=None):
+        """Replace one cluster's pending pod counts ({namespace: count}) and oldest waits ({namespace: secs})"""
+        oldest = oldest or {}
+        with self.lock:
+            for key in [key for key in self.pending if key[0] == cluster]:
+                del self.pending[key]
+            for namespace, count in counts.items():
+                self.pending[(cluster, namespace)] = (count, oldest.get(namespace, 0.0))
+            self.rendered = None
+
+    def record_collection(self, seconds):
+        with self.lock:
+            self.collections[0] += 1
+            self.collections[1] += seconds
+            self.collections[2] = seconds
+            self.rendered = None
+
+    def record_fetch(self, cluster, source, seconds):
+        """Time taken to list one cluster's pods through `source` (api or kubectl)"""
+        with self.lock:
+            totals = self.fetches.setdefault((cluster, source), [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            self.rendered = None
+
+    def record_error(self, cluster):
+        with self.lock:
+            self.errors[cluster] = self.errors.get(cluster, 0) + 1
+            self.rendered = None
+
+    def set_schedule(self, interval_secs, coverage_loss):
+        """Current collection interval and estimated fraction of pods missed between listings"""
+        with self.lock:
+            self.schedule = (interval_secs, coverage_loss)
+            self.rendered = None
+
+    def render(self):
+        """Exposition text as bytes, re-rendered only after an update"""
+        with self.lock:
+            if self.rendered is None:
+                self.rendered = "\n".join(self._lines()).encode() + b"\n"
+            return self.rendered
+
+    def _lines(self):
+        name = f"{PREFIX}_queue_time_seconds"
+        yield f"# HELP {name} Time from pod creation to start, per pod."
+        yield f"# TYPE {name} histogram"
+        for (cluster, namespace), (counts, total) in sorted(self.queue_times.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ["+Inf"], counts):
+                cumulative += count
+                yield f"{name}_bucket{_labels(cluster=cluster, namespace=namespace, le=bound)} {cumulative}"
+            yield f"{name}_sum{_labels(cluster=cluster, namespace=namespace)} {total}"
+            yield f"{name}_count{_labels(cluster=cluster, namespace=namespace)} {cumulative}"
+
+        name = f"{PREFIX}_pending_pods"
+        yield f"# HELP {name} Pods currently in the Pending phase."
+        yield f"# TYPE {name} gauge"
+        for (cluster, namespace), (count, _) in sorted(self.pending.items()):
+            yield f"{name}{_labels(cluster=cluster, namespace=namespace)} {count}"
+
+        name = f"{PREFIX}_pending_oldest_wait_seconds"
+        yield f"# HELP {name} How long the oldest Pending pod has been waiting."
+        yield f"# TYPE {name} gauge"
+        for (cluster, namespace), (_, oldest) in sorted(self.pending.items()):
+            yield f"{name}{_labels(cluster=cluster, namespace=namespace)} {oldest}"
+
+        name = f"{PREFIX}_collection_duration_seconds"
+        yield f"# HELP {name} Wall time of collection ticks."
+        yield f"# TYPE {name} summary"
+        yield f"{name}_sum {self.collections[1]}"
+        yield f"{name}_count {self.collections[0]}"
+
+        name = f"{PREFIX}_last_collection_duration_seconds"
+        yield f"# HELP {name} Wall time of the most recent collection tick."
+        yield f"# TYPE {name} gauge"
+        yield f"{name} {self.collections[2]}"
+
+        name = f"{PREFIX}_fetch_duration_seconds"
+        yield f"# HELP {name} Time to list pods from a cluster, by source (api or kubectl)."
+        yield f"# TYPE {name} summary"
+        for (cluster, source), (count, total) in sorted(self.fetches.items()):
+            yield f"{name}_sum{_labels(cluster=cluster, source=source)} {total}"
+            yield f"{name}_count{_labels(cluster=cluster, source=source)} {count}"
+
+        name = f"{PREFIX}_collection_errors_total"
+        yield f"# HELP {name} Failed or timed out cluster collections."
+        yield f"# TYPE {name} counter"
+        for cluster, count in sorted(self.errors.items()):
+            yield f"{name}{_labels(cluster=cluster)} {count}"
+
+        if self.schedule:
+            name = f"{PREFIX}_collection_interval_seconds"
+            yield f"# HELP {name} Current seconds between collection ticks."
+            yield f"# TYPE {name} gauge"
+            yield f"{name} {self.schedule[0]}"
+
+            name = f"{PREFIX}_estimated_coverage_loss"
+            yield f"# HELP {name} Estimated fraction of pods that started and left between listings unseen."
+            yield f"# TYPE {name} gauge"
+            yield f"{name} {self.schedule[1]}"
+
+
+def serve_metrics(metrics, port, host=""):
+    """Serve metrics.render() at /metrics from a daemon thread; returns the server"""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"Serving metrics on http://{host or '0.0.0.0'}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Pods that are waiting in the queue right now, keyed by UID.
+
+The collectors only store a pod once it has a start time, so pods stuck in
+Pending are otherwise invisible. Each tick the Pending pods of a cluster are
+listed (a separate, server-filtered listing) and diffed against the index by
+UID: only new UIDs have their creation time parsed; UIDs that are no longer
+Pending leave the index and are returned as completed waits.
+
+The index is saved as one small JSON file so one-shot (cron) runs pick up
+where the previous run stopped:
+
+    {"saved": 1760641200, "pods": {"<uid>": ["cluster", "namespace", "pod", created_epoch], ...}}
+
+Completed waits go to one append-only CSV per day, kept as long as history:
+
+    pending_exits/
+        2026-10-16.csv   Timestamp,Cluster,Namespace,Pod,PodUID,WaitSeconds,Outcome
+
+Outcome is "started" when the pod was collected with a start time, otherwise
+"gone" (deleted or finished before a listing saw it start). WaitSeconds runs
+up to the listing that found the pod gone, so it is an upper bound; the exact
+queue time of a started pod is in history.
+"""
+import csv
+import datetime
+import json
+import os
+import threading
+
+from aggregates import DAY_FORMAT, PERCENTILES, QueueTimeSketch, percentile_label
+from pod_parser import parse_k8s_time
+
+EXIT_COLUMNS = ['Timestamp', 'Cluster', 'Namespace', 'Pod', 'PodUID', 'WaitSeconds', 'Outcome']
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _epoch_seconds(value):
+    return (parse_k8s_time(value) - EPOCH).total_seconds()
+
+
+class PendingPodIndex:
+    def __init__(self, path=None):
+        """
+        Load the index
+
+        Args:
+            path: JSON file the index is loaded from and saved to (None: memory only)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.pods = {}
+        self.saved = None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.pods = {uid: tuple(record) for uid, record in data.get("pods", {}).items()}
+            self.saved = data.get("saved")
+
+    def __len__(self):
+        return len(self.pods)
+
+    def update(self, cluster, pending_pods, now=None):
+        """
+        Replace one cluster's pending set with the pruned pods of a fresh listing
+
+        Returns the pods that left the pending set as (uid, cluster, namespace,
+        pod, wait_secs) tuples, wait_secs measured up to now.
+        """
+        now = now if now is not None else datetime.datetime.now(datetime.timezone.utc).timestamp()
+        current = set()
+        with self.lock:
+            for pod in pending_pods:
+                metadata = pod['metadata']
+                uid = metadata['uid']
+                current.add(uid)
+                if uid not in self.pods:
+                    self.pods[uid] = (cluster, metadata['namespace'], metadata['name'],
+                                      _epoch_seconds(metadata['creationTimestamp']))
+
+            left = [uid for uid, record in self.pods.items() if record[0] == cluster and uid not in current]
+            exits = []
+            for uid in left:
+                _, namespace, name, created = self.pods.pop(uid)
+                exits.append((uid, cluster, namespace, name, max(0.0, now - created)))
+        return exits
+
+    def waits(self, now=None):
+        """(cluster, namespace, pod, uid, wait_secs) for every pending pod"""
+        now = now if now is not None else datetime.datetime.now(datetime.timezone.utc).timestamp()
+        with self.lock:
+            return [(cluster, namespace, name, uid, max(0.0, now - created))
+                    for uid, (cluster, namespace, name, created) in self.pods.items()]
+
+    def backlog(self, now=None):
+        """{(cluster, namespace): (pending_count, oldest_wait_secs, QueueTimeSketch of waits)}"""
+        result = {}
+        for cluster, namespace, _, _, wait in self.waits(now):
+            count, oldest, sketch = result.get((cluster, namespace), (0, 0.0, None))
+            sketch = sketch or QueueTimeSketch()
+            sketch.add(wait)
+            result[(cluster, namespace)] = (count + 1, max(oldest, wait), sketch)
+        return result
+
+    def oldest(self, n=10, now=None):
+        """The n longest-waiting pods, longest first"""
+        return sorted(self.waits(now), key=lambda row: row[4], reverse=True)[:n]
+
+    def save(self, now=None):
+        """Atomically write the index to its path"""
+        if not self.path:
+            return
+        now = now if now is not None else datetime.datetime.now(datetime.timezone.utc).timestamp()
+        with self.lock:
+            data = {"saved": int(now), "pods": {uid: list(record) for uid, record in self.pods.items()}}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.saved = int(now)
+
+
+class PendingExitLog:
+    def __init__(self, root, retention_days=7):
+        """
+        Initialize the log
+
+        Args:
+            root: Directory holding one exits file per day (created if missing)
+            retention_days: Day files older than this are removed by expire()
+        """
+        self.root = root
+        self.retention_days = retention_days
+        os.makedirs(self.root, exist_ok=True)
+
+    def days(self):
+        """Sorted days with exit files (oldest first)"""
+        return sorted(name[:-4] for name in os.listdir(self.root) if name.endswith(".csv"))
+
+    def append(self, rows):
+        """Append exit rows (values in EXIT_COLUMNS order) to the file of each row's day"""
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[0][:10], []).append(row)
+        for day, day_rows in sorted(by_day.items()):
+            path = os.path.join(self.root, f"{day}.csv")
+            new_file = not os.path.exists(path)
+            with open(path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(EXIT_COLUMNS)
+                writer.writerows(day_rows)
+
+    def load(self):
+        """Every logged exit as a DataFrame"""
+        import pandas as pd
+
+        frames = [pd.read_csv(os.path.join(self.root, f"{day}.csv"), dtype={'Cluster': str, 'Namespace': str})
+                  for day in self.days()]
+        if not frames:
+            return pd.DataFrame(columns=EXIT_COLUMNS)
+        return pd.concat(frames, ignore_index=True).fillna({'Cluster': ""})
+
+    def expire(self, now=None):
+        """Remove day files older than the retention window"""
+        now = now or datetime.datetime.now()
+        cutoff = (now - datetime.timedelta(days=self.retention_days)).strftime(DAY_FORMAT)
+        expired = [day for day in self.days() if day < cutoff]
+        for day in expired:
+            os.remove(os.path.join(self.root, f"{day}.csv"))
+        return expired
+
+
+def backlog_frame(index, now=None):
+    """Per-namespace pending counts and wait percentiles, longest oldest wait first"""
+    import pandas as pd
+
+    rows = []
+    for (cluster, namespace), (count, oldest, sketch) in index.backlog(now).items():
+        row = {'Cluster': cluster, 'Namespace': namespace, 'Pending': count,
+               'Oldest_Wait_Seconds': round(oldest, 2), 'Mean_Wait_Seconds': round(sketch.mean, 2)}
+        for q in PERCENTILES:
+            row[f'{percentile_label(q).upper()}_Wait_Seconds'] = round(sketch.quantile(q), 2)
+        rows.append(row)
+    if not rows:
+        return pd.DataFrame(columns=['Cluster', 'Namespace', 'Pending', 'Oldest_Wait_Seconds', 'Mean_Wait_Seconds']
+                            + [f'{percentile_label(q).upper()}_Wait_Seconds' for q in PERCENTILES])
+    return pd.DataFrame(rows).sort_values('Oldest_Wait_Seconds', ascending=False, ignore_index=True)
+
+
+def oldest_frame(index, n=10, now=None):
+    """The n longest-waiting pending pods"""
+    import pandas as pd
+
+    rows = [(cluster, namespace, name, uid, round(wait, 2)) for cluster, namespace, name, uid, wait in index.oldest(n, now)]
+    return pd.DataFrame(rows, columns=['Cluster', 'Namespace', 'Pod', 'PodUID', 'Wait_Seconds'])
+
+
+def wait_summary(index, now=None):
+    """Sketch of every pending pod's current wait, for the overall distribution"""
+    sketch = QueueTimeSketch()
+    for *_, wait in index.waits(now):
+        sketch.add(wait)
+    return sketch
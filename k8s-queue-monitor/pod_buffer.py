@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Compact in-memory record of every pod seen during a collection run.
+
+A pod's queue time never changes once it has started, so each pod is stored
+once, the first time it is seen, however many ticks it stays visible. Rows are
+appended to typed arrays (amortized O(1) per pod, no frame copies). Namespaces
+owners and collection timestamps are stored as small integer codes into lists
+of distinct values. Creation/start times are kept as epoch seconds and queue
+phase durations as float32 seconds (NaN when unknown). Formatting
+into strings and time components happens once, at report time, in to_frame().
+"""
+import datetime
+import math
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from pod_parser import PHASE_COLUMNS, parse_k8s_time
+from uid_index import uid_key
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+K8S_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _epoch_seconds(value):
+    """Epoch seconds of a k8s timestamp string; queue_time_frame() rows already hold them"""
+    if isinstance(value, str):
+        return int((parse_k8s_time(value) - EPOCH).total_seconds())
+    return int(value)
+
+
+class _Codes:
+    """Distinct values and an array of per-row codes into them"""
+
+    def __init__(self):
+        self.values = []
+        self.lookup = {}
+        self.codes = array('i')
+
+    def append(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def categorical(self):
+        return pd.Categorical.from_codes(np.array(self.codes, dtype=np.int32), categories=self.values)
+
+
+class PodBuffer:
+    def __init__(self):
+        """Initialize an empty buffer"""
+        self.seen = set()
+        self.timestamps = _Codes()
+        self.namespaces = _Codes()
+        self.owners = _Codes()
+        self.pods = []
+        self.queue_times = array('d')
+        self.created = array('q')
+        self.started = array('q')
+        self.phases = [array('f') for _ in PHASE_COLUMNS]
+
+    def __len__(self):
+        return len(self.pods)
+
+    def __contains__(self, pod_uid):
+        return uid_key(pod_uid) in self.seen
+
+    def add(self, timestamp, namespace, pod, pod_uid, queue_time, creation_time, start_time, phases=None, owner=""):
+        """Record one pod, phases in PHASE_COLUMNS order (default unknown); False if its UID was already recorded"""
+        key = uid_key(pod_uid if pod_uid else f"{namespace}/{pod}")
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+
+        self.timestamps.append(timestamp)
+        self.namespaces.append(namespace)
+        self.owners.append(owner)
+        self.pods.append(pod)
+        self.queue_times.append(queue_time)
+        self.created.append(_epoch_seconds(creation_time))
+        self.started.append(_epoch_seconds(start_time))
+        for values, seconds in zip(self.phases, phases or [math.nan] * len(PHASE_COLUMNS)):
+            values.append(seconds)
+        return True
+
+    def add_frame(self, df):
+        """Record the pods of a queue_time_frame() result; returns how many were new"""
+        added = 0
+        phases = zip(*(df[name] for name in PHASE_COLUMNS)) if PHASE_COLUMNS[0] in df else [None] * len(df)
+        owners = df['Owner'] if 'Owner' in df else [""] * len(df)
+        for *row, pod_phases, owner in zip(df['Timestamp'], df['Namespace'], df['Pod'], df['PodUID'], df['QueueTime'],
+                                           df['CreationTime'], df['StartTime'], phases, owners):
+            added += self.add(*row, phases=pod_phases, owner=owner)
+        return added
+
+    def to_frame(self):
+        """
+        One row per pod: Timestamp (first seen), Namespace, Pod, Owner, QueueTime,
+        CreationTime, StartTime and the phases, with Namespace and Owner as categoricals
+
+        The arrays are copied, so the buffer can keep growing afterwards.
+        """
+        def k8s_times(epochs):
+            seconds = np.array(epochs, dtype=np.int64)
+            return pd.to_datetime(seconds, unit='s').strftime(K8S_TIME_FORMAT)
+
+        return pd.DataFrame({
+            'Timestamp': self.timestamps.categorical().astype(object),
+            'Namespace': self.namespaces.categorical(),
+            'Pod': self.pods,
+            'Owner': self.owners.categorical(),
+            'QueueTime': np.array(self.queue_times, dtype=np.float64),
+            'CreationTime': k8s_times(self.created),
+            'StartTime': k8s_times(self.started),
+            **{name: np.array(values, dtype=np.float32) for name, values in zip(PHASE_COLUMNS, self.phases)},
+        })
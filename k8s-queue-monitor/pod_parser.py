@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""Batch extraction of queue times from pod listings.
+
+The pod list is walked once to pull the needed fields into column lists; the
+timestamps are then parsed with datetime.fromisoformat and queue times kept in
+QueueTimeRows, typed column arrays that need neither pandas nor numpy, so a
+one-shot collection never imports them. queue_time_frame() wraps the same
+rows in a DataFrame for the report code.
+
+Listings are filtered on the API server with field/label selectors, and kubectl
+prints only the needed fields per pod (custom-columns) rather than the
+full pod JSON.
+
+The same pass keeps each new pod's status.conditions, and the transition
+times of the conditions that are True split the wait into phases:
+
+    ScheduleWait     creationTimestamp -> PodScheduled     scheduler backlog
+    InitWait         PodScheduled -> Initialized           kubelet pickup, init containers
+    ContainersWait   Initialized -> ContainersReady        image pulls, container start, probes
+    ReadyWait        ContainersReady -> Ready              readiness gates
+
+A phase whose end (or start) condition is not True yet is NaN; a pod is
+stored once, so phases it had not finished when first listed stay NaN.
+
+Each pod's controlling owner (the ownerReference with controller: true) is
+kept as 'Kind/name' in the Owner column, '' for a bare pod, for the
+per-workload aggregates.
+"""
+import datetime
+import math
+from array import array
+
+from kubectl_stream import iter_lines, iter_list_items, kubectl_chunks
+
+# Unreasonable queue times (more than 30 days) are skipped by the collectors
+MAX_QUEUE_TIME_SECS = 30 * 24 * 60 * 60
+
+POD_COLUMNS = ['Namespace', 'Pod', 'PodUID', 'Owner', 'CreationTime', 'StartTime', 'Conditions']
+
+# Pod conditions ending each queue phase, and the phase duration columns (seconds)
+PHASE_CONDITIONS = ['PodScheduled', 'Initialized', 'ContainersReady', 'Ready']
+PHASE_COLUMNS = ['ScheduleWait', 'InitWait', 'ContainersWait', 'ReadyWait']
+_UNKNOWN_PHASES = (math.nan,) * len(PHASE_COLUMNS)
+_UNKNOWN_ENDS = (None,) * len(PHASE_CONDITIONS)
+
+# Phase positions in the packed condition types kubectl prints, by types
+# string; nearly every pod of a cluster lists the same conditions in the same order
+_PACKED_LAYOUTS = {}
+_PACKED_LAYOUTS_MAX = 1000
+
+# Columns of QueueTimeRows, in the order history chunks are written
+ROW_COLUMNS = ['Timestamp', 'Cluster', 'Namespace', 'Pod', 'PodUID', 'Owner', 'QueueTime', 'CreationTime',
+               'StartTime'] + PHASE_COLUMNS
+
+# Typecodes of the numeric row columns; the others are lists of strings.
+# Phases are whole seconds (or NaN), exact in float32 up to ~190 days
+_ROW_TYPECODES = {'QueueTime': 'd', 'CreationTime': 'q', 'StartTime': 'q',
+                  **{name: 'f' for name in PHASE_COLUMNS}}
+
+
+# kubectl output projection matching POD_COLUMNS, one whitespace-separated line per pod.
+# The True conditions come as two comma-separated lists, types and transition times,
+# and the controlling owner as its kind and name
+_CUSTOM_COLUMNS = [
+    "NAMESPACE:.metadata.namespace",
+    "NAME:.metadata.name",
+    "UID:.metadata.uid",
+    "CREATED:.metadata.creationTimestamp",
+    "STARTED:.status.startTime",
+    'CONDITIONS:.status.conditions[?(@.status=="True")].type',
+    'TRANSITIONS:.status.conditions[?(@.status=="True")].lastTransitionTime',
+    'OWNER_KIND:.metadata.ownerReferences[?(@.controller==true)].kind',
+    'OWNER_NAME:.metadata.ownerReferences[?(@.controller==true)].name',
+]
+POD_CUSTOM_COLUMNS = "custom-columns=" + ",".join(_CUSTOM_COLUMNS)
+
+# What kubectl prints for a missing custom-columns field
+_MISSING = "<none>"
+
+class QueueTimeRows:
+    """Queue time records as ROW_COLUMNS lists and typed arrays; a pandas-free stand-in for a DataFrame"""
+
+    def __init__(self, columns=None):
+        """
+        Initialize the rows
+
+        Args:
+            columns: Dict of equal-length ROW_COLUMNS sequences (default: no rows)
+        """
+        self.columns = {}
+        for name in ROW_COLUMNS:
+            values = columns[name] if columns else []
+            typecode = _ROW_TYPECODES.get(name)
+            self.columns[name] = array(typecode, values) if typecode else list(values)
+
+    def __len__(self):
+        return len(self.columns['PodUID'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def empty(self):
+        return not len(self)
+
+    def append(self, row):
+        """Append one row, a dict of ROW_COLUMNS values"""
+        for name, values in self.columns.items():
+            values.append(row[name])
+
+    def extend(self, other):
+        """Append the rows of another QueueTimeRows"""
+        for name, values in self.columns.items():
+            values.extend(other.columns[name])
+        return self
+
+    def take(self, indices):
+        """New rows holding the given row positions"""
+        return QueueTimeRows({name: [values[i] for i in indices] for name, values in self.columns.items()})
+
+    def to_frame(self, columns=ROW_COLUMNS):
+        """The rows as a DataFrame (imports pandas)"""
+        import numpy as np
+        import pandas as pd
+
+        return pd.DataFrame({name: np.frombuffer(self.columns[name], dtype=self.columns[name].typecode).copy()
+                             if name in _ROW_TYPECODES else self.columns[name] for name in columns})
+
+
+def pod_field_selector(exclude_namespaces):
+    """
+    Field selector that drops excluded namespaces and Pending pods on the API server
+
+    Pending pods rarely have a startTime yet; those that do are picked up once
+    they leave Pending, since startTime never changes.
+    """
+    terms = [f"metadata.namespace!={namespace}" for namespace in exclude_namespaces]
+    terms.append("status.phase!=Pending")
+    return ",".join(terms)
+
+
+def pending_field_selector(exclude_namespaces):
+    """Field selector for the Pending pods outside the excluded namespaces"""
+    terms = [f"metadata.namespace!={namespace}" for namespace in exclude_namespaces]
+    terms.append("status.phase=Pending")
+    return ",".join(terms)
+
+
+def pod_list_params(field_selector=None, label_selector=None):
+    """Query parameters for /api/v1/pods with the given selectors"""
+    params = {}
+    if field_selector:
+        params['fieldSelector'] = field_selector
+    if label_selector:
+        params['labelSelector'] = label_selector
+    return params
+
+
+def pod_list_args(field_selector=None, label_selector=None):
+    """kubectl arguments that list pods in all namespaces as POD_CUSTOM_COLUMNS rows"""
+    args = ["get", "pods", "--all-namespaces", "--no-headers", "-o", POD_CUSTOM_COLUMNS]
+    if field_selector:
+        args.append(f"--field-selector={field_selector}")
+    if label_selector:
+        args.append(f"--selector={label_selector}")
+    return args
+
+
+def parse_k8s_time(value):
+    """Parse a single RFC 3339 timestamp as written by the API server"""
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def k8s_epoch(value):
+    """Whole epoch seconds of an RFC 3339 timestamp"""
+    # parse_k8s_time inlined; this runs several times per new pod
+    return int(datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+def _packed_phase_ends(types, times):
+    """Transition times ending each phase (None if unknown) from stream_pod_rows' packed conditions"""
+    layout = _PACKED_LAYOUTS.get(types)
+    if layout is None:
+        names = types.split(",")
+        layout = (len(names), [names.index(name) if name in names else None for name in PHASE_CONDITIONS])
+        if len(_PACKED_LAYOUTS) < _PACKED_LAYOUTS_MAX:
+            _PACKED_LAYOUTS[types] = layout
+    times = times.split(",")
+    # A True condition without a transition time would shift the lists
+    if len(times) != layout[0]:
+        return _UNKNOWN_ENDS
+    return [None if position is None else times[position] for position in layout[1]]
+
+
+def queue_phases(conditions, creation_time, parsed=None):
+    """
+    Seconds of each PHASE_COLUMNS phase from a pod's status.conditions (a list,
+    or the packed pair of stream_pod_rows)
+
+    A phase runs from the previous condition (creation for the first) turning
+    True to its own turning True, and is NaN while either is unknown. `parsed`
+    maps timestamp strings already parsed to epoch seconds and is filled in;
+    pods of one rollout share transition times, and sharing it across a
+    listing saves parsing them again.
+    """
+    if not conditions:
+        return _UNKNOWN_PHASES
+    if isinstance(conditions, tuple):
+        ends = _packed_phase_ends(*conditions)
+    else:
+        # type and status are required fields of a pod condition
+        transitions = {condition['type']: condition.get('lastTransitionTime')
+                       for condition in conditions if condition['status'] == "True"}
+        ends = [transitions.get(condition_type) for condition_type in PHASE_CONDITIONS]
+
+    parsed = {} if parsed is None else parsed
+    previous = parsed.get(creation_time)
+    if previous is None:
+        previous = parsed[creation_time] = k8s_epoch(creation_time)
+    phases = []
+    for value in ends:
+        if value:
+            current = parsed.get(value)
+            if current is None:
+                current = parsed[value] = k8s_epoch(value)
+            phases.append(math.nan if previous is None else current - previous)
+            previous = current
+        else:
+            phases.append(math.nan)
+            previous = None
+    return phases
+
+
+def pod_owner(owner_references):
+    """
+    'Kind/name' of a pod's controlling owner, '' if it has none, from its
+    metadata.ownerReferences (or the packed pair of stream_pod_rows)
+    """
+    if not owner_references:
+        return ""
+    if isinstance(owner_references, tuple):
+        return "/".join(owner_references)
+    for reference in owner_references:
+        if reference.get('controller'):
+            return f"{reference['kind']}/{reference['name']}"
+    return ""
+
+
+def prune_pod(pod):
+    """Keep only the pod fields the collectors read, in the same nested shape"""
+    metadata = pod.get('metadata', {})
+    status = pod.get('status', {})
+    return {
+        'metadata': {
+            'name': metadata.get('name'),
+            'namespace': metadata.get('namespace'),
+            'uid': metadata.get('uid'),
+            'creationTimestamp': metadata.get('creationTimestamp'),
+            'ownerReferences': metadata.get('ownerReferences'),
+        },
+        'status': {'startTime': status.get('startTime'), 'conditions': status.get('conditions')},
+    }
+
+
+def stream_pods(kubectl_cmd):
+    """
+    Run a `kubectl get pods -o json` command and yield pruned pods one at a time
+
+    kubectl's stdout is decoded as it arrives, so memory stays flat as the
+    pod count grows instead of holding the whole payload and object tree.
+    """
+    for pod in iter_list_items(kubectl_chunks(kubectl_cmd)):
+        yield prune_pod(pod)
+
+
+def stream_pod_rows(kubectl_cmd, on_spawn=None):
+    """
+    Run a kubectl command built with pod_list_args and yield pruned pods
+
+    Each output line holds the _CUSTOM_COLUMNS fields; the pods are yielded in
+    the same nested shape as prune_pod, except that the conditions are left
+    packed as kubectl printed them, a (types, transition times) pair of
+    comma-separated strings for the True conditions, and the ownerReferences
+    as the controller's (kind, name). Most listed pods are skipped as already
+    stored, so only queue_phases() and pod_owner() unpack them. on_spawn is
+    passed to kubectl_chunks.
+    """
+    for line in iter_lines(kubectl_chunks(kubectl_cmd, on_spawn=on_spawn)):
+        fields = line.split()
+        if len(fields) != len(_CUSTOM_COLUMNS):
+            continue
+        namespace, name, uid, created, started, types, transitions, owner_kind, owner_name = fields
+        yield {
+            'metadata': {'name': name, 'namespace': namespace, 'uid': uid, 'creationTimestamp': created,
+                         'ownerReferences': None if owner_kind == _MISSING else (owner_kind, owner_name)},
+            'status': {'startTime': None if started == _MISSING else started,
+                       'conditions': None if types == _MISSING else (types, transitions)},
+        }
+
+
+def extract_pod_columns(items, exclude_namespaces, skip_uids=None, listed_uids=None):
+    """
+    Pull name/namespace/uid/owner/timestamps/conditions of started pods into column lists in one pass
+
+    Pods whose UID is in skip_uids (e.g. already stored) are dropped before
+    any timestamp parsing. The UID of every started pod, skipped or not, is
+    appended to listed_uids when given (for a ChurnTracker). Conditions are
+    kept as listed and only read by queue_time_rows().
+    """
+    namespaces, names, uids, owners, created, started, conditions = [], [], [], [], [], [], []
+
+    for pod in items:
+        metadata = pod['metadata']
+        namespace = metadata['namespace']
+
+        # Skip excluded namespaces and pods that have not started yet
+        if namespace in exclude_namespaces:
+            continue
+        status = pod.get('status', {})
+        start_time = status.get('startTime')
+        if not start_time:
+            continue
+        if listed_uids is not None:
+            listed_uids.append(metadata.get('uid'))
+        if skip_uids is not None and metadata.get('uid') in skip_uids:
+            continue
+
+        namespaces.append(namespace)
+        names.append(metadata['name'])
+        uids.append(metadata.get('uid'))
+        owners.append(pod_owner(metadata.get('ownerReferences')))
+        created.append(metadata['creationTimestamp'])
+        started.append(start_time)
+        conditions.append(status.get('conditions'))
+
+    return dict(zip(POD_COLUMNS, [namespaces, names, uids, owners, created, started, conditions]))
+
+
+def k8s_epochs(values):
+    """Whole epoch seconds (int64 array) of RFC 3339 timestamps, parsed column-wise"""
+    import numpy as np
+    import pandas as pd
+
+    times = pd.to_datetime(pd.Series(values, dtype=object), utc=True, format='ISO8601')
+    return ((times - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def queue_time_rows(columns, timestamp, cluster=""):
+    """
+    Build QueueTimeRows from extracted pod columns
+
+    CreationTime and StartTime are parsed into epoch seconds; QueueTime is
+    start minus creation in seconds, and PHASE_COLUMNS come from the
+    conditions (see queue_phases). Callers pass only pods not stored yet
+    (extract_pod_columns' skip_uids), so every pod is parsed once. Rows are
+    not filtered, callers drop QueueTime > MAX_QUEUE_TIME_SECS.
+    """
+    created = array('q')
+    started = array('q')
+    pod_phases = []
+    # Transition times parsed in this listing, by string (see queue_phases)
+    parsed = {}
+    pod_conditions = columns.get('Conditions') or [None] * len(columns['PodUID'])
+    for creation_time, start_time, conditions in zip(columns['CreationTime'], columns['StartTime'], pod_conditions):
+        created_epoch, started_epoch = k8s_epoch(creation_time), k8s_epoch(start_time)
+        parsed[creation_time], parsed[start_time] = created_epoch, started_epoch
+        created.append(created_epoch)
+        started.append(started_epoch)
+        pod_phases.append(queue_phases(conditions, creation_time, parsed))
+    phases = [array('f', values) for values in zip(*pod_phases)] or [array('f') for _ in PHASE_COLUMNS]
+
+    count = len(created)
+    return QueueTimeRows({
+        'Timestamp': [timestamp] * count,
+        'Cluster': [cluster] * count,
+        'Namespace': columns['Namespace'],
+        'Pod': columns['Pod'],
+        'PodUID': columns['PodUID'],
+        'Owner': columns.get('Owner') or [""] * count,
+        'QueueTime': array('d', [end - begin for begin, end in zip(created, started)]),
+        'CreationTime': created,
+        'StartTime': started,
+        **dict(zip(PHASE_COLUMNS, phases)),
+    })
+
+
+def queue_time_frame(columns, timestamp):
+    """
+    Build a DataFrame of queue times from extracted pod columns
+
+    The queue_time_rows() columns without Cluster; CreationTime and StartTime
+    are int64 epoch seconds, the phases float32 seconds.
+    """
+    if not columns['Namespace']:
+        import pandas as pd
+        return pd.DataFrame()
+    return queue_time_rows(columns, timestamp).to_frame(
+        [name for name in ROW_COLUMNS if name != 'Cluster'])
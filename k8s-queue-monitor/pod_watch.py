@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Incremental pod collection over the Kubernetes watch API.
+
+Instead of listing every pod on each tick, a single long-lived watch on
+/api/v1/pods is kept open through `kubectl get --raw`. A pod's queue time is
+recorded once, the first time it is seen with status.startTime, and the watch
+resumes from the last resourceVersion after a disconnect.
+"""
+import subprocess
+import tempfile
+import time
+import urllib.parse
+
+from kubectl_stream import iter_json_values
+from pod_parser import MAX_QUEUE_TIME_SECS, parse_k8s_time, pod_field_selector, pod_list_params
+
+# The API server closes the watch after this long; we then reconnect from the
+# last resourceVersion, which also gives callers a chance to stop or flush
+WATCH_TIMEOUT_SECS = 300
+
+
+class PodWatcher:
+    def __init__(self, kubectl_path="kubectl", kubeconfig=None, exclude_namespaces=None, open_stream=None,
+                 label_selector=None, context=None):
+        """
+        Initialize the watcher
+
+        Args:
+            kubectl_path: kubectl binary used to open the watch
+            kubeconfig: Path to kubeconfig file (default: kubectl's own resolution)
+            exclude_namespaces: List of namespaces to ignore (default: ['kube-system'])
+            open_stream: Callable (resource_version, timeout_secs) -> iterable of text
+                chunks. Defaults to a `kubectl get --raw` watch; pass a recorded or
+                fake stream here to replay events without a cluster.
+            label_selector: Only watch pods matching this label selector
+            context: kubeconfig context to watch (default: the current context)
+        """
+        self.kubectl_path = kubectl_path
+        self.kubeconfig = kubeconfig
+        self.exclude_namespaces = exclude_namespaces or ['kube-system']
+        self.label_selector = label_selector
+        self.context = context
+        self.open_stream = open_stream or self._open_kubectl_stream
+
+        # Last resourceVersion seen; None means start with a fresh list
+        self.resource_version = None
+        # UIDs whose queue time has already been recorded
+        self.recorded_uids = set()
+
+    def watch_path(self, resource_version, timeout_secs):
+        """API path for a pod watch starting after resource_version"""
+        path = f"/api/v1/pods?watch=1&allowWatchBookmarks=true&timeoutSeconds={int(timeout_secs)}"
+        selectors = pod_list_params(pod_field_selector(self.exclude_namespaces), self.label_selector)
+        path += "&" + urllib.parse.urlencode(selectors)
+        if resource_version:
+            path += f"&resourceVersion={resource_version}"
+        return path
+
+    def _open_kubectl_stream(self, resource_version, timeout_secs):
+        """Stream raw watch events from the API server through kubectl"""
+        kubectl_cmd = [self.kubectl_path]
+        if self.kubeconfig:
+            kubectl_cmd.append(f"--kubeconfig={self.kubeconfig}")
+        if self.context:
+            kubectl_cmd.append(f"--context={self.context}")
+        kubectl_cmd += ["get", "--raw", self.watch_path(resource_version, timeout_secs)]
+
+        # stderr goes to a file so a chatty kubectl can't block on a full pipe
+        with tempfile.TemporaryFile(mode="w+") as stderr:
+            proc = subprocess.Popen(kubectl_cmd, stdout=subprocess.PIPE, stderr=stderr, text=True)
+            try:
+                # The watch response is one JSON event per line
+                for line in proc.stdout:
+                    yield line
+            finally:
+                if proc.poll() is None:
+                    proc.terminate()
+                proc.wait()
+                proc.stdout.close()
+                if proc.returncode not in (0, -15):
+                    stderr.seek(0)
+                    raise subprocess.CalledProcessError(proc.returncode, kubectl_cmd, stderr=stderr.read())
+
+    def handle_event(self, event):
+        """
+        Apply one watch event
+
+        Returns (pod, queue_time) the first time a pod is seen started, else None.
+        """
+        event_type = event.get('type')
+        obj = event.get('object') or {}
+
+        if event_type == 'ERROR':
+            # 410 Gone: our resourceVersion is too old, relist from scratch.
+            # Already-recorded pods are skipped when they are re-added.
+            if obj.get('code') == 410:
+                self.resource_version = None
+            else:
+                print(f"Watch error: {obj.get('message', obj)}")
+            return None
+
+        metadata = obj.get('metadata', {})
+        if metadata.get('resourceVersion'):
+            self.resource_version = metadata['resourceVersion']
+
+        if event_type == 'BOOKMARK':
+            return None
+
+        pod_uid = metadata.get('uid')
+        if event_type == 'DELETED':
+            # No more events will arrive for this pod
+            self.recorded_uids.discard(pod_uid)
+            return None
+
+        if metadata.get('namespace') in self.exclude_namespaces or pod_uid in self.recorded_uids:
+            return None
+
+        start_time = obj.get('status', {}).get('startTime')
+        if not start_time:
+            return None
+
+        self.recorded_uids.add(pod_uid)
+        queue_time = (parse_k8s_time(start_time) - parse_k8s_time(metadata['creationTimestamp'])).total_seconds()
+        if queue_time > MAX_QUEUE_TIME_SECS:
+            return None
+        return obj, queue_time
+
+    def run(self, on_record, should_stop=None, deadline=None, timeout_secs=WATCH_TIMEOUT_SECS, retry_secs=5):
+        """
+        Watch pods until should_stop() returns True or the monotonic deadline passes,
+        calling on_record(pod, queue_time) once for every pod that starts.
+        Reconnects after the stream ends or fails.
+        """
+        def stopped():
+            if deadline is not None and time.monotonic() >= deadline:
+                return True
+            return should_stop is not None and should_stop()
+
+        while not stopped():
+            # Never hold a watch open past the deadline
+            request_timeout = timeout_secs
+            if deadline is not None:
+                request_timeout = max(1, min(timeout_secs, deadline - time.monotonic()))
+            try:
+                stream = self.open_stream(self.resource_version, request_timeout)
+                for event in iter_json_values(stream):
+                    record = self.handle_event(event)
+                    if record:
+                        on_record(*record)
+                    if stopped():
+                        break
+                if hasattr(stream, 'close'):
+                    stream.close()
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                print(f"Watch interrupted: {e}")
+                if stopped():
+                    break
+                time.sleep(retry_secs)
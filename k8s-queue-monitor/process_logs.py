@@ -3,6 +3,30 @@ import pandas as pd
 import os
 import datetime
 import sys
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from aggregates import PERCENTILES, AggregateStore, QueueTimeSketch, namespace_label, percentile_label
+from history_store import TIME_COLUMNS, HistoryStore, collection_epochs, collection_timestamps, read_frame
+from instrumentation import PROFILE_MODES, Instrumentation, stage
+from pending_index import PendingExitLog, PendingPodIndex, backlog_frame, oldest_frame, wait_summary
+from pod_parser import PHASE_COLUMNS
+from rollups import RollupStore
+from uid_index import uid_key
+from workloads import WorkloadStore, top_workloads, workload_frame
+
+# Default --trend windows
+TREND_DAYS = {'hourly': 7, 'daily': 90}
+
+# Columns a --chunked scan reads, and the rows per chunk read from a CSV file
+FOLD_COLUMNS = ['Timestamp', 'Cluster', 'Namespace', 'PodUID', 'QueueTime'] + PHASE_COLUMNS
+DEFAULT_CHUNK_ROWS = 100000
+
+# Per-namespace statistics of each queue phase, over the pods whose phase is known
+PHASE_QUANTILE = 0.9
+PHASE_STATS = ['mean', percentile_label(PHASE_QUANTILE)]
+PHASE_STAT_COLUMNS = [f'{name}_{stat}' for name in PHASE_COLUMNS for stat in PHASE_STATS]
 
 def format_time(seconds):
     """Format seconds into hours, minutes, seconds"""
@@ -10,15 +34,446 @@ def format_time(seconds):
     minutes, seconds = divmod(remainder, 60)
     return f"{int(hours)}h {int(minutes)}m {round(seconds, 2)}s"
 
+def readable_times(df):
+    """Copy of history rows with epoch times formatted back to the collector's strings"""
+    df = df.copy()
+    df['Timestamp'] = collection_timestamps(df['Timestamp'])
+    for column in TIME_COLUMNS:
+        if column in df and df[column].dtype.kind in 'iuf':
+            df[column] = pd.to_datetime(df[column], unit='s').dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return df
+
+def exact_stats(raw_logs_path, since=None, until=None):
+    """Overall and per-namespace stats from a full scan of the raw history"""
+    # Load the raw data: a partitioned history store directory or a single CSV file
+    print(f"Loading data from: {raw_logs_path}")
+    with stage("load"):
+        if os.path.isdir(raw_logs_path):
+            raw_data = HistoryStore(raw_logs_path).load()
+        else:
+            raw_data = pd.read_csv(raw_logs_path)
+
+    # Check if data was loaded successfully
+    if raw_data.empty:
+        print("No data found in the raw logs")
+        sys.exit(1)
+
+    print(f"Number of records in raw data: {len(raw_data)}")
+
+    with stage("compute"):
+        return _exact_stats(raw_data, since, until)
+
+def _exact_stats(raw_data, since, until):
+    # History loads Timestamp as epoch seconds; a CSV holds the collection time strings
+    if raw_data['Timestamp'].dtype.kind not in 'iuf':
+        raw_data['Timestamp'] = collection_epochs(raw_data['Timestamp'].astype(str))
+    if since:
+        raw_data = raw_data[raw_data['Timestamp'] >= int(since.timestamp())]
+    if until:
+        raw_data = raw_data[raw_data['Timestamp'] < int(until.timestamp())]
+    if raw_data.empty:
+        print("No data found in the requested window")
+        sys.exit(1)
+
+    # Deduplicate by keeping only the first occurrence of each pod
+    dedup_data = raw_data.sort_values('Timestamp').drop_duplicates(subset=['PodUID'])
+
+    overall = {
+        'count': len(dedup_data),
+        'mean': dedup_data['QueueTime'].mean(),
+        'max': dedup_data['QueueTime'].max(),
+        'min': dedup_data['QueueTime'].min(),
+        'median': dedup_data['QueueTime'].median(),
+    }
+    # Namespaces of different clusters are reported separately as cluster/namespace
+    if 'Cluster' in dedup_data:
+        labels = [namespace_label(c, ns) for c, ns in zip(dedup_data['Cluster'], dedup_data['Namespace'])]
+    else:
+        labels = dedup_data['Namespace']
+    labels = pd.Series(labels, index=dedup_data.index, name='Namespace')
+    grouped = dedup_data.groupby(labels)['QueueTime']
+    ns_stats = grouped.agg(['mean', 'max', 'count'])
+    # Lower nearest rank, the same rank the aggregate sketches report
+    for q in PERCENTILES:
+        ns_stats[percentile_label(q)] = grouped.quantile(q, interpolation='lower')
+    # Phases are NaN for pods that had not reached them, and pandas skips those
+    # (CSV files and older history may have no phase columns at all)
+    for name in PHASE_COLUMNS:
+        phase = dedup_data[name] if name in dedup_data else pd.Series(float('nan'), index=dedup_data.index)
+        grouped_phase = phase.groupby(labels)
+        ns_stats[f'{name}_mean'] = grouped_phase.mean()
+        ns_stats[f'{name}_{PHASE_STATS[1]}'] = grouped_phase.quantile(PHASE_QUANTILE, interpolation='lower')
+
+    # Histograms use the sketch bucketing, so both modes export the same layout
+    sketches = {}
+    for namespace, queue_time in zip(labels, dedup_data['QueueTime']):
+        sketches.setdefault(namespace, QueueTimeSketch()).add(float(queue_time))
+    return overall, ns_stats, dedup_data, sketches
+
+def aggregate_stats(aggregates_path, since, until=None):
+    """Overall and per-namespace stats merged from hourly aggregates (median and percentiles within 1%)"""
+    print(f"Merging hourly aggregates from: {aggregates_path}")
+    with stage("load"):
+        by_namespace = AggregateStore(aggregates_path).merged(since, until)
+    if not by_namespace:
+        print("No data found in the aggregates")
+        sys.exit(1)
+
+    overall, ns_stats = sketch_stats(by_namespace)
+    return overall, ns_stats, by_namespace
+
+def sketch_stats(by_namespace):
+    """Overall and per-namespace stats from {namespace: QueueTimeSketch}"""
+    total = QueueTimeSketch()
+    for sketch in by_namespace.values():
+        total.merge(sketch)
+
+    overall = {
+        'count': total.count,
+        'mean': total.mean,
+        'max': total.max,
+        'min': total.min,
+        'median': total.quantile(0.5),
+    }
+    ns_stats = pd.DataFrame(
+        [(s.mean, s.max, s.count, *(s.quantile(q) for q in PERCENTILES), *phase_stats(s))
+         for s in by_namespace.values()],
+        index=pd.Index(list(by_namespace), name='Namespace'),
+        columns=['mean', 'max', 'count'] + [percentile_label(q) for q in PERCENTILES] + PHASE_STAT_COLUMNS)
+    return overall, ns_stats
+
+def phase_stats(sketch):
+    """PHASE_STAT_COLUMNS values of a namespace sketch (NaN for phases no pod reached)"""
+    values = []
+    for name in PHASE_COLUMNS:
+        phase = sketch.phases.get(name) or QueueTimeSketch()
+        values += [phase.mean, phase.quantile(PHASE_QUANTILE)]
+    return values
+
+def fold_chunk(source, since=None, until=None, skip=None):
+    """
+    Fold one history chunk (a path) or CSV chunk (a DataFrame) into per-namespace sketches
+
+    Rows are filtered to the window (epoch seconds) and deduplicated by
+    PodUID within the chunk; pods whose key is in `skip` are left out.
+    Returns (uid_keys, {namespace: QueueTimeSketch}), the keys in first-seen order.
+    """
+    with stage("load"):
+        df = read_frame(source, FOLD_COLUMNS) if isinstance(source, str) else source
+    with stage("compute"):
+        if df['Timestamp'].dtype.kind not in 'iuf':
+            df = df.assign(Timestamp=collection_epochs(df['Timestamp'].astype(str)))
+        if since is not None:
+            df = df[df['Timestamp'] >= since]
+        if until is not None:
+            df = df[df['Timestamp'] < until]
+        df = df.sort_values('Timestamp', kind='stable').drop_duplicates(subset=['PodUID'])
+
+        # Plain lists iterate much faster than the frame's columns
+        keys = [uid_key(uid) for uid in df['PodUID'].tolist()]
+        clusters = df['Cluster'].tolist() if 'Cluster' in df else [""] * len(df)
+        phase_names = [name for name in PHASE_COLUMNS if name in df]
+        phases = zip(*(df[name].tolist() for name in phase_names)) if phase_names else [()] * len(df)
+        values = {}
+        for key, cluster, namespace, queue_time, pod_phases in zip(keys, clusters, df['Namespace'].tolist(),
+                                                                   df['QueueTime'].tolist(), phases):
+            if skip is not None and key in skip:
+                continue
+            label = namespace_label(cluster, namespace)
+            bucket = values.get(label)
+            if bucket is None:
+                bucket = values[label] = ([], [[] for _ in phase_names])
+            bucket[0].append(queue_time)
+            for phase_values, seconds in zip(bucket[1], pod_phases):
+                if seconds == seconds:
+                    phase_values.append(seconds)
+
+        sketches = {}
+        for label, (queue_times, phase_values) in values.items():
+            sketch = sketches[label] = QueueTimeSketch()
+            sketch.add_values(queue_times)
+            for name, seconds in zip(phase_names, phase_values):
+                sketch.add_phase_values(name, seconds)
+    return keys, sketches
+
+def history_chunks(raw_logs_path, since, chunk_rows):
+    """The chunks of a history directory (paths) or a CSV file (DataFrames of chunk_rows rows)"""
+    if os.path.isdir(raw_logs_path):
+        yield from HistoryStore(raw_logs_path).chunk_paths(since)
+        return
+    yield from pd.read_csv(raw_logs_path, usecols=lambda column: column in FOLD_COLUMNS, chunksize=chunk_rows,
+                           dtype={'Timestamp': str, 'Cluster': str, 'Namespace': str, 'PodUID': str})
+
+def chunked_stats(raw_logs_path, since=None, until=None, workers=1, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Overall and per-namespace stats from a chunk-at-a-time scan of the raw history
+
+    Only a chunk's rows (a few per worker with --workers) and one 16-byte key
+    per pod seen so far are held, so memory is bounded by one chunk plus about
+    80 bytes per distinct pod (the key and its set entry), not by the rows.
+    Chunks are merged in history order, so the first chunk holding a pod wins;
+    a chunk repeating pods already seen is folded again without them.
+    """
+    print(f"Scanning history in chunks from: {raw_logs_path}" + (f" ({workers} workers)" if workers > 1 else ""))
+    since_epoch = int(since.timestamp()) if since else None
+    until_epoch = int(until.timestamp()) if until else None
+    seen = set()
+    by_namespace = {}
+    chunks = 0
+
+    def merge(source, keys, sketches):
+        if not seen.isdisjoint(keys):
+            _, sketches = fold_chunk(source, since_epoch, until_epoch, skip=seen)
+        seen.update(keys)
+        for namespace, sketch in sketches.items():
+            if namespace in by_namespace:
+                by_namespace[namespace].merge(sketch)
+            else:
+                by_namespace[namespace] = sketch
+
+    sources = history_chunks(raw_logs_path, since, chunk_rows)
+    if workers > 1:
+        # At most two chunks per worker in flight, so finished results never pile up
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for source in sources:
+                in_flight.append((source, executor.submit(fold_chunk, source, since_epoch, until_epoch)))
+                if len(in_flight) >= 2 * workers:
+                    source, future = in_flight.popleft()
+                    merge(source, *future.result())
+                    chunks += 1
+            while in_flight:
+                source, future = in_flight.popleft()
+                merge(source, *future.result())
+                chunks += 1
+    else:
+        for source in sources:
+            merge(source, *fold_chunk(source, since_epoch, until_epoch))
+            chunks += 1
+
+    print(f"Number of unique pods in {chunks} chunks: {len(seen)}")
+    if not by_namespace:
+        print("No data found in the requested window")
+        sys.exit(1)
+    overall, ns_stats = sketch_stats(by_namespace)
+    return overall, ns_stats, by_namespace
+
+def histogram_frame(sketches):
+    """Long-format histogram export: one row per namespace and non-empty bucket"""
+    rows = []
+    for namespace in sorted(sketches):
+        for lower, upper, count in sketches[namespace].histogram():
+            rows.append((namespace, round(lower, 3), round(upper, 3), count))
+    return pd.DataFrame(rows, columns=['Namespace', 'Lower_Seconds', 'Upper_Seconds', 'Pod_Count'])
+
+def trend_report(rollups_path, granularity, since, until, output_dir):
+    """Per-period trend table, CSVs and (with matplotlib) a p95 chart, read from the rollups only"""
+    print(f"Loading {granularity} rollups from: {rollups_path}")
+    rollups = RollupStore(rollups_path).load("hour" if granularity == "hourly" else "day", since, until)
+    if rollups.empty:
+        print("No rollups found in the requested window")
+        sys.exit(1)
+
+    # Per-period totals across namespaces; the mean is weighted by pod count
+    rollups['Total'] = rollups['Mean'] * rollups['Count']
+    periods = rollups.groupby('Period').agg(Count=('Count', 'sum'), Total=('Total', 'sum'), Max=('Max', 'max'))
+    worst = rollups.loc[rollups.groupby('Period')['P95'].idxmax(), ['Period', 'Namespace', 'P95']].set_index('Period')
+    rollups = rollups.drop(columns='Total')
+
+    print("\n" + "="*70)
+    print(f"{granularity.upper()} QUEUE TIME TREND ({since:%Y-%m-%d %H:%M} TO {until or 'now'})")
+    print("="*70)
+    print(f"{'Period':<15} {'Pods':>7} {'Average':<15} {'Max':<15} Worst p95 namespace")
+    for period, row in periods.iterrows():
+        print(f"{period:<15} {int(row['Count']):>7} {format_time(row['Total'] / row['Count']):<15} "
+              f"{format_time(row['Max']):<15} {worst.loc[period, 'Namespace']} "
+              f"({format_time(worst.loc[period, 'P95'])})")
+    print("="*70)
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    trend_file = os.path.join(output_dir, f"trend_{granularity}_{timestamp}.csv")
+    rollups.to_csv(trend_file, index=False)
+    p95 = rollups.pivot(index='Period', columns='Namespace', values='P95')
+    p95_file = os.path.join(output_dir, f"trend_{granularity}_p95_{timestamp}.csv")
+    p95.to_csv(p95_file)
+
+    print(f"\nReports saved to: {output_dir}")
+    print(f"- Trend (count, mean, p95, max per namespace): {os.path.basename(trend_file)}")
+    print(f"- p95 by namespace: {os.path.basename(p95_file)}")
+
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("- Chart skipped (pip install matplotlib to plot trends)")
+        return
+
+    # Chart the busiest namespaces, a line each
+    busiest = rollups.groupby('Namespace')['Count'].sum().nlargest(10).index
+    fig, ax = plt.subplots(figsize=(12, 6))
+    p95[busiest].plot(ax=ax, marker=".")
+    ax.set_ylabel("p95 queue time (s)")
+    ax.set_title(f"{granularity.capitalize()} p95 queue time, 10 busiest namespaces")
+    fig.autofmt_xdate()
+    chart_file = os.path.join(output_dir, f"trend_{granularity}_{timestamp}.png")
+    fig.savefig(chart_file, bbox_inches="tight")
+    plt.close(fig)
+    print(f"- Chart: {os.path.basename(chart_file)}")
+
+def pending_report(data_dir, output_dir):
+    """Backlog, wait distribution and oldest pods from the collector's pending index"""
+    index_path = os.path.join(data_dir, "pending_pods.json")
+    if not os.path.exists(index_path):
+        print(f"No pending pod index found at {index_path}; run the collector first")
+        sys.exit(1)
+    index = PendingPodIndex(index_path)
+
+    # Waits as of the collector's last listing, not of this report
+    as_of = index.saved
+    backlog = backlog_frame(index, as_of)
+    oldest = oldest_frame(index, 10, as_of)
+    waits = wait_summary(index, as_of)
+    exits = PendingExitLog(os.path.join(data_dir, "pending_exits")).load()
+
+    print("\n" + "="*70)
+    print(f"PENDING PODS AS OF {datetime.datetime.fromtimestamp(as_of):%Y-%m-%d %H:%M:%S}")
+    print("="*70)
+    print(f"Pending pods: {len(index):,} in {len(backlog)} namespaces")
+    if waits.count:
+        print("Current wait: " + ", ".join(f"{percentile_label(q)} {format_time(waits.quantile(q))}"
+                                           for q in PERCENTILES) + f", max {format_time(waits.max)}")
+
+    print(f"\nLARGEST BACKLOGS BY OLDEST WAIT:")
+    print("-"*70)
+    print(f"{'Namespace':<25} {'Oldest':<15} {'p50':<15} Pending")
+    for _, row in backlog.head(10).iterrows():
+        ns_name = namespace_label(row['Cluster'], row['Namespace'])[:25]
+        print(f"{ns_name:<25} {format_time(row['Oldest_Wait_Seconds']):<15} "
+              f"{format_time(row['P50_Wait_Seconds']):<15} {row['Pending']}")
+
+    print(f"\nLONGEST-WAITING PODS:")
+    print("-"*70)
+    for _, row in oldest.iterrows():
+        print(f"{format_time(row['Wait_Seconds']):<15} {namespace_label(row['Cluster'], row['Namespace'])}/{row['Pod']}")
+
+    if not exits.empty:
+        print(f"\nCOMPLETED WAITS (last {len(exits['Timestamp'].str[:10].unique())} days):")
+        print("-"*70)
+        for outcome, group in exits.groupby('Outcome'):
+            print(f"{outcome:<10} {len(group):>7} pods, average wait {format_time(group['WaitSeconds'].mean())}, "
+                  f"max {format_time(group['WaitSeconds'].max())}")
+    print("="*70)
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    backlog_file = os.path.join(output_dir, f"pending_backlog_{timestamp}.csv")
+    backlog.to_csv(backlog_file, index=False)
+    oldest_file = os.path.join(output_dir, f"pending_oldest_{timestamp}.csv")
+    oldest.to_csv(oldest_file, index=False)
+
+    print(f"\nReports saved to: {output_dir}")
+    print(f"- Backlog by namespace: {os.path.basename(backlog_file)}")
+    print(f"- Oldest pending pods: {os.path.basename(oldest_file)}")
+
+def workload_report(workloads_path, since, until, top, output_dir):
+    """Per-workload stats and the slowest workloads, merged from the collector's workload aggregates"""
+    print(f"Merging hourly workload aggregates from: {workloads_path}")
+    with stage("load"):
+        sketches = WorkloadStore(workloads_path).merged(since, until)
+    if not sketches:
+        print("No workload aggregates found in the requested window")
+        sys.exit(1)
+
+    with stage("compute"):
+        slowest = workload_frame(sketches, top_workloads(sketches, top))
+        workloads = workload_frame(sketches)
+
+    print("\n" + "="*70)
+    print(f"TOP {len(slowest)} SLOWEST WORKLOADS BY AVERAGE QUEUE TIME ({since:%Y-%m-%d %H:%M} TO {until or 'now'})")
+    print("="*70)
+    print(f"Workloads: {len(sketches):,} in {workloads['Namespace'].nunique()} namespaces")
+    print(f"{'Workload':<40} {'Average':<15} {'p99':<15} Pods")
+    for _, row in slowest.iterrows():
+        name = f"{row['Namespace']}/{row['Kind']}/{row['Workload']}"
+        print(f"{name[:40]:<40} {format_time(row['Mean_Seconds']):<15} {format_time(row['P99_Seconds']):<15} "
+              f"({row['Pod_Count']} pods)")
+    print("="*70)
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    workloads_file = os.path.join(output_dir, f"workload_stats_{timestamp}.csv")
+    with stage("write"):
+        workloads.to_csv(workloads_file, index=False)
+    print(f"\nReports saved to: {output_dir}")
+    print(f"- Workload stats: {os.path.basename(workloads_file)}")
+
+def parse_time_arg(value):
+    """--since/--until value: an ISO date or date-time, e.g. 2026-10-01 or 2026-10-01T12:00"""
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date/time: {value}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate 7-day (or --since/--until) queue time reports")
+    parser.add_argument("path", nargs="?",
+                        help="History directory or CSV file (default: $K8S_QUEUE_MONITOR_OUTPUT_DIR/history)")
+    parser.add_argument("--exact", action="store_true",
+                        help="Scan the raw history instead of merging the collector's hourly aggregates")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Scan the raw history one chunk at a time, in memory bounded by one chunk plus "
+                             "a 16-byte key per distinct pod (median and percentiles within 1%%)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes folding chunks in parallel with --chunked (default: 1)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"Rows per chunk read from a CSV file with --chunked (default: {DEFAULT_CHUNK_ROWS})")
+    parser.add_argument("--since", type=parse_time_arg,
+                        help="Start of the report window (default: 7 days ago)")
+    parser.add_argument("--until", type=parse_time_arg,
+                        help="End of the report window, exclusive (default: now)")
+    parser.add_argument("--trend", choices=["hourly", "daily"],
+                        help="Report per-hour or per-day trends from the year-long rollups instead "
+                             f"(default window: {TREND_DAYS['hourly']} or {TREND_DAYS['daily']} days)")
+    parser.add_argument("--pending", action="store_true",
+                        help="Report the pods waiting in the queue right now and the waits that ended")
+    parser.add_argument("--workloads", action="store_true",
+                        help="Report queue times per workload (a pod's controlling owner) from the "
+                             "collector's workload aggregates")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Slowest workloads listed by --workloads (default: 10)")
+    parser.add_argument("--instrument", action="store_true",
+                        default=os.environ.get('K8S_QUEUE_MONITOR_INSTRUMENT', '') not in ('', '0', 'false', 'off'),
+                        help="Append per-stage timings of the run to instrumentation.jsonl in the data directory "
+                             "(default: $K8S_QUEUE_MONITOR_INSTRUMENT)")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=os.environ.get('K8S_QUEUE_MONITOR_PROFILE') or None,
+                        help="Also dump a cProfile ('cpu') and/or tracemalloc ('memory') profile of the run "
+                             "to profiles/ (default: $K8S_QUEUE_MONITOR_PROFILE, off)")
+    args = parser.parse_args()
+
+    # Instrumentation records go to the data directory the collector writes to
+    data_dir = (os.path.dirname(os.path.abspath(args.path)) if args.path else
+                os.environ.get('K8S_QUEUE_MONITOR_OUTPUT_DIR', os.path.expanduser("~/k8s-queue-monitor-data")))
+    instrumentation = Instrumentation.from_settings(data_dir, args.instrument, args.profile)
+    with instrumentation.tick("report"):
+        generate_reports(args)
+
+def generate_reports(args):
+    """Run the report selected by the command line arguments"""
+
     # Get input file from command line argument or environment variable
-    if len(sys.argv) > 1:
-        raw_logs_path = sys.argv[1]
+    if args.path:
+        raw_logs_path = args.path
     else:
         # Use environment variable or default path
-        output_dir = os.environ.get('K8S_QUEUE_MONITOR_OUTPUT_DIR', 
+        output_dir = os.environ.get('K8S_QUEUE_MONITOR_OUTPUT_DIR',
                                    os.path.expanduser("~/k8s-queue-monitor-data"))
-        raw_logs_path = os.path.join(output_dir, "queue_time_history.csv")
+        raw_logs_path = os.path.join(output_dir, "history")
+
+    if args.pending:
+        data_dir = os.path.dirname(raw_logs_path)
+        output_dir = os.path.join(data_dir, "reports")
+        os.makedirs(output_dir, exist_ok=True)
+        pending_report(data_dir, output_dir)
+        return
 
     # Check if input file exists
     if not os.path.exists(raw_logs_path):
@@ -30,86 +485,124 @@ def main():
     output_dir = os.path.join(os.path.dirname(raw_logs_path), "reports")
     os.makedirs(output_dir, exist_ok=True)
 
-    # Load the raw data
-    print(f"Loading data from: {raw_logs_path}")
-    raw_data = pd.read_csv(raw_logs_path)
-
-    # Check if data was loaded successfully
-    if raw_data.empty:
-        print("No data found in the raw logs")
-        sys.exit(1)
-
-    print(f"Number of records in raw data: {len(raw_data)}")
+    if args.trend:
+        since = args.since or datetime.datetime.now() - datetime.timedelta(days=TREND_DAYS[args.trend])
+        rollups_path = os.path.join(os.path.dirname(raw_logs_path), "rollups")
+        trend_report(rollups_path, args.trend, since, args.until, output_dir)
+        return
 
-    # Ensure timestamp is proper datetime
-    raw_data['Timestamp'] = pd.to_datetime(raw_data['Timestamp'])
+    if args.workloads:
+        since = args.since or datetime.datetime.now() - datetime.timedelta(days=7)
+        workloads_path = os.path.join(os.path.dirname(raw_logs_path), "workloads")
+        workload_report(workloads_path, since, args.until, args.top, output_dir)
+        return
 
-    # Deduplicate by keeping only the first occurrence of each pod
-    dedup_data = raw_data.sort_values('Timestamp').drop_duplicates(subset=['PodUID'])
+    # The collector keeps hourly aggregates next to the history directory
+    aggregates_path = os.path.join(os.path.dirname(raw_logs_path), "aggregates")
+    use_aggregates = (not (args.exact or args.chunked) and os.path.isdir(raw_logs_path)
+                      and os.path.isdir(aggregates_path) and os.listdir(aggregates_path))
 
-    # Calculate overall statistics
-    true_avg_queue_time = dedup_data['QueueTime'].mean()
-    max_queue_time = dedup_data['QueueTime'].max()
-    min_queue_time = dedup_data['QueueTime'].min()
-    median_queue_time = dedup_data['QueueTime'].median()
+    dedup_data = None
+    if use_aggregates:
+        since = args.since or datetime.datetime.now() - datetime.timedelta(days=7)
+        overall, ns_stats, sketches = aggregate_stats(aggregates_path, since, args.until)
+    elif args.chunked:
+        overall, ns_stats, sketches = chunked_stats(raw_logs_path, args.since, args.until, args.workers,
+                                                    args.chunk_rows)
+    else:
+        overall, ns_stats, dedup_data, sketches = exact_stats(raw_logs_path, args.since, args.until)
 
     print("\n" + "="*70)
-    print("7-DAY KUBERNETES QUEUE TIME ANALYSIS")
+    if args.since or args.until:
+        window = f"{args.since or 'start'} TO {args.until or 'now'}"
+        print(f"KUBERNETES QUEUE TIME ANALYSIS ({window})")
+    else:
+        print("7-DAY KUBERNETES QUEUE TIME ANALYSIS")
     print("="*70)
-    print(f"Total unique pods: {len(dedup_data):,}")
-    print(f"7-day average queue time: {format_time(true_avg_queue_time)} ({true_avg_queue_time:.2f}s)")
-    print(f"Maximum queue time: {format_time(max_queue_time)} ({max_queue_time:.2f}s)")
-    print(f"Minimum queue time: {format_time(min_queue_time)} ({min_queue_time:.2f}s)")
-    print(f"Median queue time: {format_time(median_queue_time)} ({median_queue_time:.2f}s)")
+    print(f"Total unique pods: {overall['count']:,}")
+    print(f"7-day average queue time: {format_time(overall['mean'])} ({overall['mean']:.2f}s)")
+    print(f"Maximum queue time: {format_time(overall['max'])} ({overall['max']:.2f}s)")
+    print(f"Minimum queue time: {format_time(overall['min'])} ({overall['min']:.2f}s)")
+    median_note = " (approx. within 1%)" if use_aggregates or args.chunked else ""
+    print(f"Median queue time: {format_time(overall['median'])} ({overall['median']:.2f}s){median_note}")
 
-    # Create namespace statistics
-    ns_stats = dedup_data.groupby('Namespace').agg({
-        'QueueTime': ['mean', 'max', 'count']
-    }).sort_values(('QueueTime', 'mean'), ascending=False)
+    # Namespace statistics, highest average first
+    ns_stats = ns_stats.sort_values('mean', ascending=False)
 
     # Create formatted version
     formatted_stats = []
     for namespace, row in ns_stats.iterrows():
-        mean_time = row[('QueueTime', 'mean')]
-        max_time = row[('QueueTime', 'max')]
-        count = row[('QueueTime', 'count')]
-        
-        formatted_stats.append({
+        mean_time = row['mean']
+        max_time = row['max']
+        count = int(row['count'])
+
+        formatted = {
             'Namespace': namespace,
             'Mean_Queue_Time': format_time(mean_time),
             'Mean_Seconds': f"{mean_time:.2f}",
             'Max_Queue_Time': format_time(max_time),
             'Max_Seconds': f"{max_time:.2f}",
             'Pod_Count': count
-        })
+        }
+        for q in PERCENTILES:
+            label = percentile_label(q)
+            formatted[f'{label.upper()}_Seconds'] = f"{row[label]:.2f}"
+        for name in PHASE_COLUMNS:
+            for stat in PHASE_STATS:
+                value = row[f'{name}_{stat}']
+                formatted[f'{name}_{stat.capitalize()}_Seconds'] = "" if pd.isna(value) else f"{value:.2f}"
+        formatted_stats.append(formatted)
 
     # Create and display formatted DataFrame
     formatted_df = pd.DataFrame(formatted_stats)
-    
+
     print(f"\nTOP NAMESPACES BY AVERAGE QUEUE TIME:")
     print("-"*70)
+    print(f"{'Namespace':<25} {'Average':<15} {'p99':<15} Pods")
     for _, row in formatted_df.head(10).iterrows():
         ns_name = row['Namespace'][:25]
         avg_time = row['Mean_Queue_Time']
+        p99_time = format_time(float(row['P99_Seconds']))
         pod_count = row['Pod_Count']
-        print(f"{ns_name:<25} {avg_time:<15} ({pod_count} pods)")
-    
+        print(f"{ns_name:<25} {avg_time:<15} {p99_time:<15} ({pod_count} pods)")
+
+    # Where the wait of the same namespaces went, from the pods' conditions
+    phase_means = ns_stats[[f'{name}_mean' for name in PHASE_COLUMNS]].head(10)
+    if phase_means.notna().any().any():
+        print(f"\nQUEUE PHASES OF THE TOP NAMESPACES (average seconds):")
+        print("-"*70)
+        print(f"{'Namespace':<25}" + "".join(f"{name.removesuffix('Wait'):>11}" for name in PHASE_COLUMNS))
+        for namespace, row in phase_means.iterrows():
+            print(f"{namespace[:25]:<25}" + "".join(f"{'-':>11}" if pd.isna(value) else f"{value:>11.1f}"
+                                                    for value in row))
+
     print("="*70)
 
     # Save reports
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    
+
     # Save formatted namespace stats
     ns_stats_file = os.path.join(output_dir, f"namespace_stats_{timestamp}.csv")
-    formatted_df.to_csv(ns_stats_file, index=False)
-    
-    # Save deduplicated data
-    dedup_file = os.path.join(output_dir, f"deduplicated_data_{timestamp}.csv")
-    dedup_data.to_csv(dedup_file, index=False)
+    with stage("write"):
+        formatted_df.to_csv(ns_stats_file, index=False)
+
+    # Save per-namespace queue time histograms
+    histogram_file = os.path.join(output_dir, f"namespace_histograms_{timestamp}.csv")
+    with stage("histograms"):
+        histograms = histogram_frame(sketches)
+    with stage("write"):
+        histograms.to_csv(histogram_file, index=False)
 
     print(f"\nReports saved to: {output_dir}")
     print(f"- Namespace stats: {os.path.basename(ns_stats_file)}")
-    print(f"- Processed data: {os.path.basename(dedup_file)}")
+    print(f"- Histograms: {os.path.basename(histogram_file)}")
+
+    # Save deduplicated data (only available from a raw scan)
+    if dedup_data is not None:
+        dedup_file = os.path.join(output_dir, f"deduplicated_data_{timestamp}.csv")
+        with stage("write"):
+            readable_times(dedup_data).to_csv(dedup_file, index=False)
+        print(f"- Processed data: {os.path.basename(dedup_file)}")
 
 if __name__ == "__main__":
     main()
@@ -1,23 +1,122 @@
 #!/usr/bin/env python3
-import subprocess
-import json
-import pandas as pd
 import time
 import os
 import datetime
 from pathlib import Path
 import sys
+import argparse
+import signal
+import threading
+from concurrent.futures import Future, wait
+
+import kube_api
+from aggregates import AggregateStore
+from rollups import RollupStore
+from history_store import HistoryStore
+from instrumentation import PROFILE_MODES, Instrumentation, count, stage, timed_iter
+from metrics import QueueTimeMetrics, serve_metrics
+from pending_index import PendingExitLog, PendingPodIndex
+from pod_parser import (MAX_QUEUE_TIME_SECS, PHASE_COLUMNS, QueueTimeRows, extract_pod_columns,
+                        k8s_epoch, pending_field_selector, pod_field_selector, pod_list_args, pod_list_params,
+                        pod_owner, prune_pod, queue_phases, queue_time_rows, stream_pod_rows)
+from pod_watch import PodWatcher
+from scheduler import AdaptiveSchedule, ChurnTracker, IntervalSchedule
+from uid_index import SeenPodIndex
+from workloads import WorkloadStore
+
+class ClusterDeadline:
+    def __init__(self, timeout_secs):
+        """
+        Bound one cluster's whole collection, not only each request
+
+        Once timeout_secs pass, the API request in progress is aborted and
+        kubectl is killed, so the collection ends instead of running on.
+
+        Args:
+            timeout_secs: Seconds the cluster's listings may take together
+        """
+        self.timeout_secs = timeout_secs
+        self.expired = threading.Event()
+        self.api_clients = []
+        self.processes = []
+        self.lock = threading.Lock()
+        self.timer = threading.Timer(timeout_secs, self.expire)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def expire(self):
+        with self.lock:
+            self.expired.set()
+            for api_client in self.api_clients:
+                api_client.abort()
+            for proc in self.processes:
+                proc.kill()
+
+    def track_api(self, api_client):
+        """Abort api_client's request at the deadline; pass self.expired to its iter_pods as well"""
+        with self.lock:
+            self.api_clients.append(api_client)
+
+    def track_process(self, proc):
+        """Kill proc at the deadline (now, if it has passed); an on_spawn for stream_pod_rows"""
+        with self.lock:
+            self.processes.append(proc)
+            if self.expired.is_set():
+                proc.kill()
+
+    def check(self):
+        """Raise TimeoutError once the deadline has passed"""
+        if self.expired.is_set():
+            raise TimeoutError(f"no answer within {self.timeout_secs}s")
+
+    def cancel(self):
+        self.timer.cancel()
+
 
 class QueueTimeCollector:
-    def __init__(self, output_dir=None, exclude_namespaces=None):
-        """Initialize the collector with configurable parameters"""
+    def __init__(self, output_dir=None, exclude_namespaces=None, contexts=None, cluster_timeout=None,
+                 label_selector=None, instrumentation=None):
+        """
+        Initialize the collector with configurable parameters
+
+        Args:
+            output_dir: Data directory (default: $K8S_QUEUE_MONITOR_OUTPUT_DIR or ~/k8s-queue-monitor-data)
+            exclude_namespaces: List of namespaces to exclude (default: ['kube-system'])
+            contexts: kubeconfig contexts to collect concurrently
+                (default: comma-separated $K8S_QUEUE_MONITOR_CONTEXTS, or just the current context)
+            cluster_timeout: Seconds to wait for each cluster per collection
+                (default: $K8S_QUEUE_MONITOR_CLUSTER_TIMEOUT or 120)
+            label_selector: Only collect pods matching this label selector
+                (default: $K8S_QUEUE_MONITOR_LABEL_SELECTOR, or all pods)
+            instrumentation: Instrumentation recording each tick's stages (default: off)
+        """
         self.exclude_namespaces = exclude_namespaces or ['kube-system']
 
+        # Filtering pushed to the API server so excluded pods are never sent
+        self.field_selector = pod_field_selector(self.exclude_namespaces)
+        self.label_selector = label_selector or os.environ.get('K8S_QUEUE_MONITOR_LABEL_SELECTOR') or None
+
+        # Clusters to collect; None stands for the kubeconfig's current context
+        if contexts is None:
+            contexts = [c.strip() for c in os.environ.get('K8S_QUEUE_MONITOR_CONTEXTS', '').split(',') if c.strip()]
+        self.contexts = contexts or [None]
+        self.cluster_timeout = cluster_timeout or int(os.environ.get('K8S_QUEUE_MONITOR_CLUSTER_TIMEOUT', 120))
+
         # Get paths from environment variables or use defaults
         self.kubeconfig = os.environ.get('K8S_QUEUE_MONITOR_KUBECONFIG', 
                                         os.path.expanduser("~/.kube/config"))
         self.kubectl_path = os.environ.get('K8S_QUEUE_MONITOR_KUBECTL_PATH', 
                                           "/usr/local/bin/kubectl")
+
+        # Talk to each API server directly when the kubeconfig allows it
+        # (K8S_QUEUE_MONITOR_API=off forces kubectl)
+        self.api_clients = {}
+        if os.environ.get('K8S_QUEUE_MONITOR_API', 'auto') != 'off':
+            for context in self.contexts:
+                self.api_clients[context] = kube_api.connect(self.kubeconfig, context, timeout=self.cluster_timeout)
+        # Futures of cluster fetches that overran cluster_timeout, by context;
+        # a context is not fetched again until its last fetch has ended
+        self.in_flight = {}
         
         # Output directory - configurable via env var or parameter
         if output_dir:
@@ -29,19 +128,61 @@ class QueueTimeCollector:
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # Path for persistent data
-        self.persistent_db_path = os.path.join(self.output_dir, "queue_time_history.csv")
+        # Partitioned history store; the single CSV it replaces is migrated once
+        self.persistent_db_path = os.path.join(self.output_dir, "history")
+        self.legacy_csv_path = os.path.join(self.output_dir, "queue_time_history.csv")
+        self.store = HistoryStore(self.persistent_db_path, retention_days=7)
 
-        # Load existing data or create new dataframe
-        if os.path.exists(self.persistent_db_path):
-            self.historical_data = pd.read_csv(self.persistent_db_path)
-            print(f"Loaded {len(self.historical_data)} historical queue time records")
-        else:
-            self.historical_data = pd.DataFrame(columns=[
-                'Timestamp', 'Namespace', 'Pod', 'PodUID', 'QueueTime',
-                'CreationTime', 'StartTime'
-            ])
+        # PodUIDs already in history; queue time never changes once a pod has
+        # started, so each pod is written only the first time it is seen
+        self.seen_pods = SeenPodIndex(os.path.join(self.output_dir, "seen_uids"), retention_days=7)
+
+        # Running hourly per-namespace aggregates for process_logs.py
+        self.aggregates = AggregateStore(os.path.join(self.output_dir, "aggregates"), retention_days=7)
+
+        # The same hourly aggregates per workload (controlling owner), for --workloads reports
+        self.workloads = WorkloadStore(os.path.join(self.output_dir, "workloads"), retention_days=7)
+
+        # Hourly/daily summaries derived from the aggregates, kept for trend reports
+        self.rollups = RollupStore(os.path.join(self.output_dir, "rollups"), retention_days=365)
+
+        # Pods waiting to start right now, carried between runs, and the waits
+        # that ended since the last save (see track_pending)
+        self.pending_pods = PendingPodIndex(os.path.join(self.output_dir, "pending_pods.json"))
+        self.pending_exits = PendingExitLog(os.path.join(self.output_dir, "pending_exits"), retention_days=7)
+        self.completed_waits = []
+
+        # Live /metrics, only in the resident modes (see enable_metrics)
+        self.metrics = None
+
+        # Per-stage timing records, off unless --instrument/--profile
+        self.instrumentation = instrumentation or Instrumentation()
+
+        if os.path.exists(self.legacy_csv_path) and not self.store.partitions():
+            self.migrate_legacy_csv()
+        elif not self.store.partitions():
             print("Created new persistent queue time database")
+        elif not self.aggregates.days():
+            # History predates the aggregates; build them once from it
+            self.aggregates.add(self.store.load(columns=['Timestamp', 'Namespace', 'QueueTime'] + PHASE_COLUMNS))
+            print("Built hourly aggregates from existing history")
+
+        if not self.rollups.days() and self.aggregates.days():
+            self.rollups.refresh(self.aggregates, self.aggregates.days())
+            print("Built hourly/daily rollups from existing aggregates")
+
+    def migrate_legacy_csv(self):
+        """Import queue_time_history.csv into the partitioned store and set it aside"""
+        import pandas as pd
+
+        legacy_data = pd.read_csv(self.legacy_csv_path, dtype={'Timestamp': str})
+        legacy_data = legacy_data.sort_values('Timestamp').drop_duplicates(subset=['PodUID'])
+        self.store.append(legacy_data)
+        self.aggregates.add(legacy_data)
+        self.rollups.refresh(self.aggregates, self.aggregates.days())
+        self.seen_pods.add(legacy_data['PodUID'])
+        os.replace(self.legacy_csv_path, self.legacy_csv_path + ".migrated")
+        print(f"Migrated {len(legacy_data)} historical queue time records from {self.legacy_csv_path}")
 
     def format_time(self, seconds):
         """Format seconds into days, hours, minutes, seconds"""
@@ -50,95 +191,468 @@ class QueueTimeCollector:
         minutes, seconds = divmod(remainder, 60)
         return f"{int(days)}d {int(hours)}h {int(minutes)}m {round(seconds, 2)}s"
 
-    def collect_queue_times(self):
-        """Collect current queue times from the cluster"""
+    def enable_metrics(self, port):
+        """Serve live queue time metrics at http://0.0.0.0:<port>/metrics"""
+        self.metrics = QueueTimeMetrics()
+        return serve_metrics(self.metrics, port)
+
+    def kubectl_command(self, context=None, field_selector=None):
+        """kubectl command that lists the selected pods of one cluster as projected columns"""
+        kubectl_cmd = [self.kubectl_path, f"--kubeconfig={self.kubeconfig}"]
+        if context:
+            kubectl_cmd.append(f"--context={context}")
+        return kubectl_cmd + [f"--request-timeout={self.cluster_timeout}s"] + pod_list_args(
+            field_selector or self.field_selector, self.label_selector)
+
+    def list_pending_pods(self, context, deadline):
+        """Pruned Pending pods of one cluster; a separate, usually short listing"""
+        field_selector = pending_field_selector(self.exclude_namespaces)
+        api_client = self.api_clients.get(context)
+        if api_client:
+            try:
+                return [prune_pod(pod) for pod in
+                        api_client.iter_pods(pod_list_params(field_selector, self.label_selector), deadline.expired)]
+            except kube_api.KubeApiError as e:
+                deadline.check()
+                print(f"API request failed ({e}), falling back to kubectl")
+                api_client.close()
+        return list(stream_pod_rows(self.kubectl_command(context, field_selector), deadline.track_process))
+
+    def collect_cluster(self, context, timestamp, listed_uids=None):
+        """Queue times of new pods in one cluster within cluster_timeout; listed UIDs go to listed_uids"""
+        deadline = ClusterDeadline(self.cluster_timeout)
         try:
-            # Run kubectl command
-            kubectl_cmd = [self.kubectl_path, f"--kubeconfig={self.kubeconfig}", 
-                          "get", "pods", "--all-namespaces", "-o", "json"]
-            result = subprocess.run(kubectl_cmd, capture_output=True, text=True, check=True)
+            fetched = self.fetch_cluster(context, timestamp, deadline)
+        finally:
+            deadline.cancel()
+        return self.apply_cluster(context, timestamp, fetched, listed_uids)
 
-            # Parse JSON output
-            pods_data = json.loads(result.stdout)
+    def fetch_cluster(self, context, timestamp, deadline):
+        """
+        List one cluster until the ClusterDeadline passes, without touching shared state
 
-            # Process pod data
-            queue_times = []
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        Returns (rows of new pods with a Cluster column, Pending pods or None,
+        UIDs of all listed started pods, source, fetch seconds) for
+        apply_cluster. Raises TimeoutError once the deadline has passed.
+        """
+        api_client = self.api_clients.get(context)
+        if api_client:
+            deadline.track_api(api_client)
+        try:
+            return self._fetch_cluster(context, timestamp, api_client, deadline)
+        except Exception:
+            # Failures caused by the abort/kill are the timeout
+            deadline.check()
+            raise
 
-            for pod in pods_data['items']:
-                namespace = pod['metadata']['namespace']
+    def _fetch_cluster(self, context, timestamp, api_client, deadline):
+        # Pending pods are listed first, so a pod that starts in between shows
+        # up in both listings rather than in neither
+        try:
+            with stage("pending_list"):
+                pending_pods = self.list_pending_pods(context, deadline)
+            count("pending_pods", len(pending_pods))
+        except Exception as e:
+            deadline.check()
+            print(f"Error listing pending pods: {str(e)}")
+            pending_pods = None
 
-                # Skip excluded namespaces
-                if namespace in self.exclude_namespaces:
-                    continue
+        # Extract columns in one pass over the streamed pods, skipping pods
+        # already stored, then compute queue times column-wise
+        listed_uids = []
+        columns = None
+        fetch_start = time.monotonic()
+        if api_client:
+            try:
+                pods = api_client.iter_pods(pod_list_params(self.field_selector, self.label_selector),
+                                            deadline.expired)
+                with stage("extract"):
+                    columns = extract_pod_columns(timed_iter("parse", pods), self.exclude_namespaces,
+                                                  skip_uids=self.seen_pods, listed_uids=listed_uids)
+                source = "api"
+            except kube_api.KubeApiError as e:
+                deadline.check()
+                print(f"API request failed ({e}), falling back to kubectl")
+                api_client.close()
+                listed_uids = []
+                fetch_start = time.monotonic()
+        if columns is None:
+            pods = stream_pod_rows(self.kubectl_command(context), deadline.track_process)
+            with stage("extract"):
+                columns = extract_pod_columns(timed_iter("parse", pods), self.exclude_namespaces,
+                                              skip_uids=self.seen_pods, listed_uids=listed_uids)
+            source = "kubectl"
+        fetch_secs = time.monotonic() - fetch_start
 
-                if pod.get('status', {}).get('startTime'):
-                    pod_name = pod['metadata']['name']
-                    pod_uid = pod['metadata']['uid']
+        with stage("queue_times"):
+            df = queue_time_rows(columns, timestamp, cluster=context or "")
 
-                    # Parse timestamps
-                    created_time = pd.to_datetime(pod['metadata']['creationTimestamp'])
-                    start_time = pd.to_datetime(pod['status']['startTime'])
+            # Skip unreasonable queue times
+            keep = [i for i, queue_time in enumerate(df['QueueTime']) if queue_time <= MAX_QUEUE_TIME_SECS]
+            if len(keep) < len(df):
+                df = df.take(keep)
+        count("new_pods", len(df))
+        return df, pending_pods, listed_uids, source, fetch_secs
 
-                    # Calculate queue time in seconds
-                    queue_time = (start_time - created_time).total_seconds()
+    def apply_cluster(self, context, timestamp, fetched, listed_uids=None):
+        """Fold a fetch_cluster result into the metrics and the pending index (main thread only); returns its rows"""
+        df, pending_pods, fetched_uids, source, fetch_secs = fetched
+        if listed_uids is not None:
+            listed_uids.extend(fetched_uids)
+        if self.metrics:
+            self.metrics.record_fetch(context or "", source, fetch_secs)
+            with stage("metrics"):
+                for namespace, queue_time in zip(df['Namespace'], df['QueueTime']):
+                    self.metrics.observe(context or "", namespace, queue_time)
+        if pending_pods is not None:
+            with stage("pending_track"):
+                self.track_pending(context or "", pending_pods, df, timestamp)
+        return df
 
-                    # Skip unreasonable queue times
-                    if queue_time > 30 * 24 * 60 * 60:
-                        continue
+    def track_pending(self, cluster, pending_pods, new_data, timestamp):
+        """Diff one cluster's Pending listing into the index; pods that left it are completed waits"""
+        started_uids = set(new_data['PodUID'])
+        for uid, _, namespace, name, wait in self.pending_pods.update(cluster, pending_pods):
+            outcome = "started" if uid in started_uids or uid in self.seen_pods else "gone"
+            self.completed_waits.append((timestamp, cluster, namespace, name, uid, round(wait, 3), outcome))
 
-                    queue_times.append({
-                        'Timestamp': timestamp,
-                        'Namespace': namespace,
-                        'Pod': pod_name,
-                        'PodUID': pod_uid,
-                        'QueueTime': queue_time,
-                        'CreationTime': pod['metadata']['creationTimestamp'],
-                        'StartTime': pod['status']['startTime']
-                    })
+        if self.metrics:
+            counts, oldest = {}, {}
+            for pod_cluster, namespace, _, _, wait in self.pending_pods.waits():
+                if pod_cluster == cluster:
+                    counts[namespace] = counts.get(namespace, 0) + 1
+                    oldest[namespace] = max(oldest.get(namespace, 0.0), wait)
+            self.metrics.set_pending(cluster, counts, oldest)
 
-            return pd.DataFrame(queue_times)
+    def save_pending(self):
+        """Log the completed waits and save the pending index"""
+        with stage("pending_save"):
+            exits, self.completed_waits = self.completed_waits, []
+            self.pending_exits.append(exits)
+            self.pending_pods.save()
+            self.pending_exits.expire()
 
-        except Exception as e:
-            print(f"Error collecting queue times: {str(e)}")
-            return pd.DataFrame()
+    def print_pending_summary(self):
+        """One line on the current backlog and the waits completed since the last save"""
+        waits = self.pending_pods.waits()
+        if waits:
+            cluster, namespace, name, _, wait = max(waits, key=lambda row: row[4])
+            print(f"Pending pods: {len(waits)}, oldest waiting {self.format_time(wait)} "
+                  f"({'/'.join(part for part in (cluster, namespace, name) if part)})")
+        else:
+            print("Pending pods: 0")
+        if self.completed_waits:
+            print(f"Pods that left Pending since the last save: {len(self.completed_waits)}")
 
-    def update_persistent_storage(self, new_data):
-        """Update persistent storage with new data and maintain 7-day window"""
-        if not new_data.empty:
-            # Add new data
-            self.historical_data = pd.concat([self.historical_data, new_data], ignore_index=True)
+    def collect_queue_times(self, listed_uids=None):
+        """Collect current queue times from every cluster; the UIDs of all listed started pods go to listed_uids"""
+        started = time.monotonic()
+        try:
+            return self.collect_clusters(listed_uids)
+        finally:
+            if self.metrics:
+                self.metrics.record_collection(time.monotonic() - started)
+
+    def collect_clusters(self, listed_uids=None):
+        """Collect every cluster, concurrently when there are several"""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if len(self.contexts) == 1:
+            try:
+                return self.collect_cluster(self.contexts[0], timestamp, listed_uids)
+            except Exception as e:
+                print(f"Error collecting queue times: {str(e)}")
+                if self.metrics:
+                    self.metrics.record_error(self.contexts[0] or "")
+                return QueueTimeRows()
+
+        # Clusters are fetched concurrently; a failing or slow cluster only
+        # loses its own data for this run. Fetch threads touch no shared state,
+        # their results are applied here, so a fetch that overruns is dropped.
+        rows = QueueTimeRows()
+        futures = {}
+        for context in self.contexts:
+            previous = self.in_flight.pop(context, None)
+            if previous is not None and not previous.done():
+                self.in_flight[context] = previous
+                print(f"Skipping {context}: its fetch from an earlier run has not ended")
+                if self.metrics:
+                    self.metrics.record_error(context)
+                continue
+            futures[self.start_fetch(context, timestamp)] = context
+        done, not_done = wait(futures, timeout=self.cluster_timeout)
+        for future in done:
+            try:
+                rows.extend(self.apply_cluster(futures[future], timestamp, future.result(), listed_uids))
+            except Exception as e:
+                print(f"Error collecting queue times from {futures[future]}: {str(e)}")
+                if self.metrics:
+                    self.metrics.record_error(futures[future] or "")
+        for future in not_done:
+            print(f"Timed out collecting queue times from {futures[future]} after {self.cluster_timeout}s")
+            self.in_flight[futures[future]] = future
+            if self.metrics:
+                self.metrics.record_error(futures[future] or "")
+        return rows
+
+    def start_fetch(self, context, timestamp):
+        """Future of fetch_cluster on a daemon thread, so a hung cluster never holds up the exit"""
+        future = Future()
+
+        def fetch():
+            deadline = ClusterDeadline(self.cluster_timeout)
+            try:
+                future.set_result(self.fetch_cluster(context, timestamp, deadline))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                deadline.cancel()
 
-            # Keep only last 7 days of data
-            self.historical_data['Timestamp'] = pd.to_datetime(self.historical_data['Timestamp'])
-            cutoff_date = pd.Timestamp.now() - pd.Timedelta(days=7)
-            self.historical_data = self.historical_data[self.historical_data['Timestamp'] >= cutoff_date]
+        threading.Thread(target=fetch, name=f"fetch-{context}", daemon=True).start()
+        return future
 
-            # Convert back to string for storage
-            self.historical_data['Timestamp'] = self.historical_data['Timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S")
+    def update_persistent_storage(self, new_data):
+        """Append new data to persistent storage and drop partitions outside the 7-day window"""
+        if not new_data.empty:
+            # Only the new rows are written; live partitions are never rewritten.
+            # UIDs are indexed after the rows are durable, so a crash in between
+            # at worst writes a pod twice.
+            with stage("store_append"):
+                self.store.append(new_data)
+            with stage("aggregates"):
+                days = self.aggregates.add(new_data)
+            with stage("workloads"):
+                self.workloads.add(new_data)
+            with stage("rollups"):
+                self.rollups.refresh(self.aggregates, days)
+            with stage("seen_index"):
+                self.seen_pods.add(new_data['PodUID'])
+            with stage("expire"):
+                expired = self.store.expire()
+                self.aggregates.expire()
+                self.workloads.expire()
+                self.seen_pods.expire()
+                self.rollups.expire()
+            count("stored_rows", len(new_data))
 
-            # Save to disk
-            self.historical_data.to_csv(self.persistent_db_path, index=False)
             print(f"Updated persistent storage with {len(new_data)} new records")
-            print(f"Total records in 7-day window: {len(self.historical_data)}")
+            if expired:
+                print(f"Removed {len(expired)} expired partitions")
+            print(f"Total records in 7-day window: {self.store.count_rows()}")
 
     def run_collection(self):
         """Run a single collection cycle"""
         print(f"Starting collection at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-        # Collect data
-        new_data = self.collect_queue_times()
+        with self.instrumentation.tick("collection"):
+            # Collect data
+            new_data = self.collect_queue_times()
 
-        if not new_data.empty:
-            # Update storage
-            self.update_persistent_storage(new_data)
-            print("Collection completed successfully")
-        else:
-            print("No data collected in this run")
+            if not new_data.empty:
+                # Update storage
+                self.update_persistent_storage(new_data)
+                print("Collection completed successfully")
+            else:
+                print("No new pods collected in this run")
 
+            self.print_pending_summary()
+            self.save_pending()
         print(f"Data stored in: {self.persistent_db_path}")
 
+    def run_watch(self, flush_secs=60, watchers=None):
+        """
+        Collect continuously from one pod watch per context, flushing new records to storage periodically
+
+        watchers maps each context to its PodWatcher (default: kubectl watches
+        of self.contexts). Each watch runs in its own thread until Ctrl-C.
+        """
+        watchers = watchers or {
+            context: PodWatcher(self.kubectl_path, self.kubeconfig, self.exclude_namespaces,
+                                label_selector=self.label_selector, context=context)
+            for context in self.contexts}
+        pending = QueueTimeRows()
+        last_flush = time.monotonic()
+        # Guards pending, the seen index and the stores across the watch threads
+        lock = threading.Lock()
+        stop_event = threading.Event()
+
+        def flush():
+            nonlocal pending, last_flush
+            if not pending.empty:
+                with self.instrumentation.tick("flush"):
+                    self.update_persistent_storage(pending)
+                pending = QueueTimeRows()
+            last_flush = time.monotonic()
+
+        def on_record(cluster, pod, queue_time):
+            phases = queue_phases(pod['status'].get('conditions'), pod['metadata']['creationTimestamp'])
+            with lock:
+                # The watch relists on start; skip pods stored by an earlier run
+                if pod['metadata']['uid'] in self.seen_pods:
+                    return
+                if self.metrics:
+                    self.metrics.observe(cluster, pod['metadata']['namespace'], queue_time)
+                pending.append({
+                    'Timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'Cluster': cluster,
+                    'Namespace': pod['metadata']['namespace'],
+                    'Pod': pod['metadata']['name'],
+                    'PodUID': pod['metadata']['uid'],
+                    'Owner': pod_owner(pod['metadata'].get('ownerReferences')),
+                    'QueueTime': queue_time,
+                    'CreationTime': k8s_epoch(pod['metadata']['creationTimestamp']),
+                    'StartTime': k8s_epoch(pod['status']['startTime']),
+                    **dict(zip(PHASE_COLUMNS, phases)),
+                })
+                if time.monotonic() - last_flush >= flush_secs:
+                    flush()
+
+        def watch(context, watcher):
+            cluster = context or ""
+            watcher.run(lambda pod, queue_time: on_record(cluster, pod, queue_time), should_stop=stop_event.is_set)
+
+        print(f"Starting watch collection of {len(watchers)} cluster(s) at "
+              f"{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        threads = [threading.Thread(target=watch, args=(context, watcher), name=f"watch-{context or 'current'}",
+                                    daemon=True)
+                   for context, watcher in watchers.items()]
+        for thread in threads:
+            thread.start()
+        try:
+            # Short joins, so Ctrl-C reaches the main thread
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(1)
+        except KeyboardInterrupt:
+            print("Watch stopped")
+        finally:
+            # The watch threads are daemons; records arriving after this flush are dropped
+            stop_event.set()
+            with lock:
+                flush()
+
+    def run_daemon(self, interval_secs=900, flush_secs=300, min_interval_secs=None, max_interval_secs=None):
+        """
+        Stay resident and collect every interval_secs until SIGTERM/SIGINT
+
+        State (seen PodUIDs, aggregates, open store) lives in memory between
+        ticks, so each tick only pays for the pod fetch. New rows are buffered
+        and flushed to storage every flush_secs and on shutdown. With
+        min_interval_secs and max_interval_secs the interval follows pod churn
+        within those bounds (see AdaptiveSchedule); either way each tick
+        reports the estimated coverage loss.
+        """
+        stop_event = threading.Event()
+
+        def request_stop(signum, frame):
+            print(f"Received signal {signum}, shutting down after the current tick")
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        pending = QueueTimeRows()
+
+        def flush():
+            nonlocal pending
+            if not pending.empty:
+                self.update_persistent_storage(pending)
+                pending = QueueTimeRows()
+            self.save_pending()
+
+        tracker = ChurnTracker()
+        if min_interval_secs and max_interval_secs:
+            schedule = AdaptiveSchedule(interval_secs, min_interval_secs, max_interval_secs, tracker=tracker)
+            print(f"Starting collector daemon: every {schedule.interval_secs}s, adapting between "
+                  f"{min_interval_secs}s and {max_interval_secs}s, flushing every {flush_secs}s")
+        else:
+            schedule = IntervalSchedule(interval_secs)
+            print(f"Starting collector daemon: every {interval_secs}s, flushing every {flush_secs}s")
+        next_flush = time.monotonic() + flush_secs
+
+        while not stop_event.is_set():
+            print(f"Starting collection at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            with self.instrumentation.tick("collection"):
+                listed_uids = []
+                new_data = self.collect_queue_times(listed_uids)
+                with stage("churn"):
+                    if isinstance(schedule, AdaptiveSchedule):
+                        schedule.observe(listed_uids, len(new_data), len(self.pending_pods))
+                    else:
+                        tracker.observe(listed_uids, len(new_data), len(self.pending_pods))
+                        tracker.smooth_rate()
+                print(f"Churn: {tracker.summary()}; next collection in {schedule.interval_secs:.0f}s")
+                if self.metrics:
+                    self.metrics.set_schedule(schedule.interval_secs, tracker.coverage_loss())
+                if not new_data.empty:
+                    pending.extend(new_data)
+                    # Skip these pods on later ticks; persisted with their rows on flush
+                    with stage("seen_index"):
+                        self.seen_pods.add(new_data['PodUID'], flush=False)
+                print(f"Collected {len(new_data)} new pods")
+                self.print_pending_summary()
+
+                if time.monotonic() >= next_flush:
+                    flush()
+                    next_flush = time.monotonic() + flush_secs
+
+            skipped = schedule.advance()
+            if skipped:
+                print(f"WARNING: Collection overran its interval, skipped {skipped} ticks")
+            schedule.wait(stop_event)
+
+        with self.instrumentation.tick("flush"):
+            flush()
+        print("Collector daemon stopped")
+
 # Main execution
 if __name__ == "__main__":
-    collector = QueueTimeCollector()
-    collector.run_collection()
+    parser = argparse.ArgumentParser(description="Collect Kubernetes pod queue times")
+    parser.add_argument("--watch", action="store_true",
+                        help="Stay running and collect from a pod watch instead of a single full listing")
+    parser.add_argument("--contexts",
+                        help="Comma-separated kubeconfig contexts to collect concurrently "
+                             "(default: $K8S_QUEUE_MONITOR_CONTEXTS or the current context)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Stay running and collect every --interval-secs instead of exiting after one run")
+    parser.add_argument("--interval-secs", type=int, default=900,
+                        help="Seconds between collections in daemon mode (default: 900)")
+    parser.add_argument("--min-interval-secs", type=int,
+                        default=int(os.environ.get('K8S_QUEUE_MONITOR_MIN_INTERVAL_SECS', 0)) or None,
+                        help="With --max-interval-secs, adapt the daemon interval to pod churn between these bounds "
+                             "(default: $K8S_QUEUE_MONITOR_MIN_INTERVAL_SECS, fixed interval)")
+    parser.add_argument("--max-interval-secs", type=int,
+                        default=int(os.environ.get('K8S_QUEUE_MONITOR_MAX_INTERVAL_SECS', 0)) or None,
+                        help="Longest adaptive interval in daemon mode (default: $K8S_QUEUE_MONITOR_MAX_INTERVAL_SECS)")
+    parser.add_argument("--flush-secs", type=int, default=None,
+                        help="How often new records are written to storage in watch/daemon mode "
+                             "(default: 60 for watch, 300 for daemon)")
+    parser.add_argument("--metrics-port", type=int,
+                        default=int(os.environ.get('K8S_QUEUE_MONITOR_METRICS_PORT', 0)),
+                        help="Serve Prometheus metrics on this port in watch/daemon mode "
+                             "(default: $K8S_QUEUE_MONITOR_METRICS_PORT, off)")
+    parser.add_argument("--instrument", action="store_true",
+                        default=os.environ.get('K8S_QUEUE_MONITOR_INSTRUMENT', '') not in ('', '0', 'false', 'off'),
+                        help="Append per-stage timings of each tick to instrumentation.jsonl in the data directory "
+                             "(default: $K8S_QUEUE_MONITOR_INSTRUMENT)")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=os.environ.get('K8S_QUEUE_MONITOR_PROFILE') or None,
+                        help="Also dump a cProfile ('cpu') and/or tracemalloc ('memory') profile of each tick "
+                             "to profiles/ (default: $K8S_QUEUE_MONITOR_PROFILE, off)")
+    args = parser.parse_args()
+
+    contexts = [c.strip() for c in args.contexts.split(',') if c.strip()] if args.contexts else None
+    output_dir = os.environ.get('K8S_QUEUE_MONITOR_OUTPUT_DIR', os.path.expanduser("~/k8s-queue-monitor-data"))
+    collector = QueueTimeCollector(contexts=contexts, instrumentation=Instrumentation.from_settings(
+        output_dir, args.instrument, args.profile))
+    if args.metrics_port and (args.watch or args.daemon):
+        collector.enable_metrics(args.metrics_port)
+    elif args.metrics_port:
+        print("--metrics-port is only used with --watch or --daemon")
+    if (args.min_interval_secs or args.max_interval_secs) and not args.daemon:
+        print("--min-interval-secs/--max-interval-secs are only used with --daemon")
+    if args.watch:
+        collector.run_watch(flush_secs=args.flush_secs or 60)
+    elif args.daemon:
+        collector.run_daemon(interval_secs=args.interval_secs, flush_secs=args.flush_secs or 300,
+                             min_interval_secs=args.min_interval_secs, max_interval_secs=args.max_interval_secs)
+    else:
+        collector.run_collection()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Output formats for raw per-pod report data.
+
+Raw data can run to hundreds of thousands of rows, which pandas' openpyxl
+writer holds in memory as a full workbook before saving. Each format here
+writes rows as a stream instead:
+
+    csv       plain CSV
+    csv.gz    gzip-compressed CSV
+    parquet   columnar, compressed (needs pyarrow or fastparquet)
+    xlsx      openpyxl write-only workbook, constant memory
+
+xlsx is skipped above a row cap (Excel tops out at 1,048,576 rows and large
+sheets are slow to open); the other formats still carry the full data.
+"""
+import os
+
+DEFAULT_FORMATS = ['csv', 'xlsx']
+DEFAULT_XLSX_MAX_ROWS = 100000
+
+# Rows converted to Python values at a time when streaming to xlsx
+XLSX_BATCH_ROWS = 10000
+
+
+def write_csv(df, path):
+    df.to_csv(path, index=False)
+
+
+def write_csv_gz(df, path):
+    df.to_csv(path, index=False, compression="gzip")
+
+
+def write_parquet(df, path):
+    df.to_parquet(path, index=False)
+
+
+def write_xlsx(df, path, sheet_name="Sheet1"):
+    """Stream df into a write-only workbook, one batch of rows at a time"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append([str(col) for col in df.columns])
+    for start in range(0, len(df), XLSX_BATCH_ROWS):
+        batch = df.iloc[start:start + XLSX_BATCH_ROWS].astype(object)
+        for row in batch.itertuples(index=False):
+            worksheet.append(list(row))
+    workbook.save(path)
+
+
+WRITERS = {
+    'csv': write_csv,
+    'csv.gz': write_csv_gz,
+    'parquet': write_parquet,
+    'xlsx': write_xlsx,
+}
+
+
+def parse_formats(value):
+    """Formats from a comma-separated string (e.g. "csv.gz,parquet"), or the defaults"""
+    formats = [f.strip().lower() for f in (value or "").split(",") if f.strip()]
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown:
+        print(f"Unknown raw data formats ignored: {', '.join(unknown)} (choose from {', '.join(WRITERS)})")
+    return [f for f in formats if f in WRITERS] or list(DEFAULT_FORMATS)
+
+
+def write_raw_data(df, output_dir, basename, formats=None, xlsx_max_rows=DEFAULT_XLSX_MAX_ROWS):
+    """
+    Write df as output_dir/basename.<format> for each format
+
+    Returns the paths written. xlsx is skipped above xlsx_max_rows, and parquet
+    falls back to csv.gz when no parquet engine is installed.
+    """
+    formats = formats or DEFAULT_FORMATS
+    paths = []
+    for fmt in formats:
+        if fmt == 'xlsx' and xlsx_max_rows is not None and len(df) > xlsx_max_rows:
+            print(f"Skipping {basename}.xlsx: {len(df):,} rows is above the {xlsx_max_rows:,} row cap")
+            continue
+
+        path = os.path.join(output_dir, f"{basename}.{fmt}")
+        try:
+            WRITERS[fmt](df, path)
+        except ImportError as e:
+            print(f"Can't write {basename}.{fmt} ({e}), writing {basename}.csv.gz instead")
+            if 'csv.gz' in formats:
+                continue
+            path = os.path.join(output_dir, f"{basename}.csv.gz")
+            write_csv_gz(df, path)
+        paths.append(path)
+    return paths
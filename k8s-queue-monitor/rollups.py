@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Hourly and daily per-namespace queue time summaries, kept for a year.
+
+Raw history and the hourly sketches in aggregates/ only cover 7 days. Each
+time a day's aggregates change, that day's rollup file is rebuilt from them:
+one row per (hour, namespace) and one per (day, namespace) with count, mean,
+p95 and max. Trend reports over weeks or months read only these small files.
+
+Layout under the rollups root, one CSV per day:
+
+    2026-10-16.csv       Granularity,Period,Namespace,Count,Mean,P95,Max
+                         hour,2026-10-16T18,team-a,42,81.5,240.1,310.0
+                         day,2026-10-16,team-a,977,77.2,251.9,1204.0
+
+P95 is within the sketches' 1% error; rollups can't be merged into exact
+percentiles over longer periods, so multi-day views show each period's own p95.
+"""
+import csv
+import datetime
+import os
+
+from aggregates import DAY_FORMAT, QueueTimeSketch
+
+ROLLUP_COLUMNS = ['Granularity', 'Period', 'Namespace', 'Count', 'Mean', 'P95', 'Max']
+
+
+def summary_row(granularity, period, namespace, sketch):
+    return [granularity, period, namespace, sketch.count, round(sketch.mean, 3),
+            round(sketch.quantile(0.95), 3), round(sketch.max, 3)]
+
+
+class RollupStore:
+    def __init__(self, root, retention_days=365):
+        """
+        Initialize the store
+
+        Args:
+            root: Directory holding one rollup file per day (created if missing)
+            retention_days: Day files older than this are removed by expire()
+        """
+        self.root = root
+        self.retention_days = retention_days
+        os.makedirs(self.root, exist_ok=True)
+
+    def day_path(self, day):
+        return os.path.join(self.root, f"{day}.csv")
+
+    def days(self):
+        """Sorted days with rollup files (oldest first)"""
+        return sorted(name[:-4] for name in os.listdir(self.root)
+                      if name.endswith(".csv") and not name.startswith("."))
+
+    def refresh(self, aggregates, days):
+        """Rebuild the rollup files of the given days from an AggregateStore"""
+        for day in days:
+            hours = aggregates.load_day(day)
+            if not hours:
+                continue
+
+            rows = []
+            daily = {}
+            for hour in sorted(hours):
+                for namespace in sorted(hours[hour]):
+                    sketch = hours[hour][namespace]
+                    rows.append(summary_row("hour", f"{day}T{hour}", namespace, sketch))
+                    daily.setdefault(namespace, QueueTimeSketch()).merge(sketch)
+            for namespace in sorted(daily):
+                rows.append(summary_row("day", day, namespace, daily[namespace]))
+
+            tmp_path = os.path.join(self.root, f".tmp-{day}.csv")
+            with open(tmp_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(ROLLUP_COLUMNS)
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.day_path(day))
+
+    def load(self, granularity, since=None, until=None):
+        """
+        Rollup rows of one granularity ('hour' or 'day') for periods from `since`
+        up to (not including) `until`, as a DataFrame
+        """
+        import pandas as pd
+
+        since_key = since.strftime(f"{DAY_FORMAT}T%H") if since else None
+        until_key = until.strftime(f"{DAY_FORMAT}T%H") if until else None
+        if granularity == "day":
+            since_key, until_key = since_key and since_key[:10], until_key and until_key[:10]
+
+        frames = []
+        for day in self.days():
+            if (since_key and day < since_key[:10]) or (until_key and day > until_key[:10]):
+                continue
+            df = pd.read_csv(self.day_path(day), dtype={'Namespace': str})
+            df = df[df['Granularity'] == granularity]
+            if since_key:
+                df = df[df['Period'] >= since_key]
+            if until_key:
+                df = df[df['Period'] < until_key]
+            frames.append(df)
+
+        if not frames:
+            return pd.DataFrame(columns=ROLLUP_COLUMNS)
+        return pd.concat(frames, ignore_index=True).drop(columns='Granularity')
+
+    def expire(self, now=None):
+        """Remove day files older than the retention window"""
+        now = now or datetime.datetime.now()
+        cutoff = (now - datetime.timedelta(days=self.retention_days)).strftime(DAY_FORMAT)
+        expired = [day for day in self.days() if day < cutoff]
+        for day in expired:
+            os.remove(self.day_path(day))
+        return expired
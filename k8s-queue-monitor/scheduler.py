@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Fixed-rate tick scheduling against the monotonic clock.
+
+`time.sleep(interval)` after each collection drifts by however long the
+collection took. IntervalSchedule keeps ticks on a fixed grid instead, and
+skips (rather than bunches up) slots missed by a tick that overran.
+
+AdaptiveSchedule moves the interval between bounds as pod churn changes,
+using a ChurnTracker fed with every tick's listing. The tracker counts, per
+pod, the listings it appeared in; when a pod leaves the listings for good,
+a pod seen only once or twice means others may have come and gone unseen.
+Chao1's estimator (a Good-Turing style estimate from the singleton and
+doubleton counts) gives the number of pods missed entirely, reported as
+the estimated coverage loss.
+"""
+import time
+from collections import deque
+
+# Ticks of retired-pod counts the coverage loss is estimated over
+DEFAULT_WINDOW = 8
+
+# Estimated coverage loss above which an adaptive interval is shortened
+DEFAULT_TARGET_LOSS = 0.05
+
+# Fewer new or newly pending pods than this never count as a burst
+BURST_PODS = 10
+
+# Weight of the latest tick in the smoothed new-pod rate
+RATE_SMOOTHING = 0.3
+
+
+class IntervalSchedule:
+    def __init__(self, interval_secs, start=None):
+        """
+        Initialize the schedule
+
+        Args:
+            interval_secs: Seconds between tick start times
+            start: Monotonic time of the first tick (default: now)
+        """
+        self.interval_secs = interval_secs
+        self.next_due = time.monotonic() if start is None else start
+
+    def advance(self):
+        """Move to the next slot in the future; returns how many slots were skipped"""
+        self.next_due += self.interval_secs
+        now = time.monotonic()
+        skipped = 0
+        if self.next_due <= now:
+            skipped = int((now - self.next_due) // self.interval_secs) + 1
+            self.next_due += skipped * self.interval_secs
+        return skipped
+
+    def seconds_until_due(self):
+        return max(0.0, self.next_due - time.monotonic())
+
+    def wait(self, stop_event=None):
+        """Sleep until the next slot; returns False if stop_event was set while waiting"""
+        if stop_event is not None:
+            return not stop_event.wait(self.seconds_until_due())
+        time.sleep(self.seconds_until_due())
+        return True
+
+
+class ChurnTracker:
+    """New-pod rate, pending trend and estimated coverage loss across listings"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        """
+        Initialize the tracker
+
+        Args:
+            window: Ticks of retired pods the coverage loss is estimated over
+        """
+        self.sightings = None  # uid -> listings seen in, for the pods of the last listing
+        self.retired = deque(maxlen=window)  # per tick: (seen once, seen twice, retired)
+        self.new_pod_rate = None  # smoothed new pods per second
+        self.last_rate = None
+        self.pending = None
+        self.previous_pending = None
+        self.last_observed = None
+
+    def observe(self, listed_uids, new_pods, pending_pods=None, now=None):
+        """
+        Record one tick
+
+        Args:
+            listed_uids: UIDs of every started pod in the listing, stored before or not
+            new_pods: Pods stored for the first time this tick
+            pending_pods: Pods in the Pending phase right now (None: unknown)
+            now: Monotonic time of the tick (default: now)
+        """
+        now = time.monotonic() if now is None else now
+        # Pods already running at the first listing were seen for an unknown
+        # while, so they never count as singletons or doubletons
+        first_listing = self.sightings is None
+        previous = self.sightings or {}
+        sightings = {}
+        for uid in listed_uids:
+            sightings[uid] = 3 if first_listing else previous.get(uid, 0) + 1
+
+        once = twice = retired = 0
+        for uid, seen in previous.items():
+            if uid not in sightings:
+                retired += 1
+                once += seen == 1
+                twice += seen == 2
+        self.sightings = sightings
+        self.retired.append((once, twice, retired))
+
+        if self.last_observed is not None and now > self.last_observed:
+            self.last_rate = new_pods / (now - self.last_observed)
+        self.last_observed = now
+        self.previous_pending, self.pending = self.pending, pending_pods
+
+    def smooth_rate(self):
+        """Fold the last tick's rate into the smoothed new-pod rate"""
+        if self.last_rate is not None:
+            self.new_pod_rate = (self.last_rate if self.new_pod_rate is None else
+                                 RATE_SMOOTHING * self.last_rate + (1 - RATE_SMOOTHING) * self.new_pod_rate)
+
+    def missed_pods(self):
+        """Chao1 estimate of the pods that came and went between listings, over the window"""
+        once = sum(tick[0] for tick in self.retired)
+        twice = sum(tick[1] for tick in self.retired)
+        if twice:
+            return once * once / (2 * twice)
+        return once * (once - 1) / 2
+
+    def coverage_loss(self):
+        """Estimated fraction of pods never seen by a listing, over the window"""
+        seen = sum(tick[2] for tick in self.retired)
+        missed = self.missed_pods()
+        return missed / (seen + missed) if seen + missed else 0.0
+
+    def burst(self, new_pods):
+        """True if new pods or pending pods jumped well above their recent level"""
+        if self.pending is not None and self.previous_pending is not None:
+            growth = self.pending - self.previous_pending
+            if growth >= BURST_PODS and self.pending > 2 * self.previous_pending:
+                return True
+        return (self.new_pod_rate is not None and self.last_rate is not None and new_pods >= BURST_PODS
+                and self.last_rate > 2 * self.new_pod_rate)
+
+    def summary(self):
+        rate = self.new_pod_rate if self.new_pod_rate is not None else self.last_rate
+        parts = [f"new pods {rate or 0.0:.2f}/s"]
+        if self.pending is not None:
+            parts.append(f"pending {self.pending}")
+        parts.append(f"est. coverage loss {self.coverage_loss():.1%}")
+        return ", ".join(parts)
+
+
+class AdaptiveSchedule(IntervalSchedule):
+    def __init__(self, interval_secs, min_secs, max_secs, target_loss=DEFAULT_TARGET_LOSS, tracker=None,
+                 start=None):
+        """
+        Initialize the schedule
+
+        Args:
+            interval_secs: Starting interval, clamped to [min_secs, max_secs]
+            min_secs: Shortest interval, used while pods churn fast
+            max_secs: Longest interval, approached while the cluster is quiet
+            target_loss: Estimated coverage loss above which the interval is halved
+            tracker: ChurnTracker fed by observe() (default: a new one)
+            start: Monotonic time of the first tick (default: now)
+        """
+        super().__init__(min(max(interval_secs, min_secs), max_secs), start)
+        self.min_secs = min_secs
+        self.max_secs = max_secs
+        self.target_loss = target_loss
+        self.tracker = tracker or ChurnTracker()
+
+    def observe(self, listed_uids, new_pods, pending_pods=None, now=None):
+        """
+        Record one tick (see ChurnTracker.observe) and adjust the interval
+
+        The interval is halved when the estimated coverage loss exceeds the
+        target or new/pending pods burst, and grows by a quarter while the loss
+        stays under half the target and neither count is rising. It takes
+        effect from the next advance().
+        """
+        tracker = self.tracker
+        tracker.observe(listed_uids, new_pods, pending_pods, now)
+        loss = tracker.coverage_loss()
+        rising = ((tracker.pending or 0) > (tracker.previous_pending or 0)
+                  or (tracker.last_rate or 0.0) > (tracker.new_pod_rate or 0.0))
+        if loss > self.target_loss or tracker.burst(new_pods):
+            self.interval_secs = max(self.min_secs, self.interval_secs / 2)
+        elif loss <= self.target_loss / 2 and not rising:
+            self.interval_secs = min(self.max_secs, self.interval_secs * 1.25)
+        tracker.smooth_rate()
+        return self.interval_secs
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""QueueTimeSketch accuracy and merging, and the per-day AggregateStore files"""
+import os
+import random
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import aggregates
+from aggregates import ALPHA, PERCENTILES, AggregateStore, QueueTimeSketch
+from pod_parser import PHASE_COLUMNS
+
+QUANTILES = [0.0, 0.01, 0.1, 0.25] + PERCENTILES + [1.0]
+
+
+def skewed_queue_times(n, seed=0):
+    """Mostly short waits with a heavy tail, some zero or negative (clock skew), some whole seconds"""
+    rng = random.Random(seed)
+    values = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.05:
+            values.append(float(rng.randint(-3, 0)))
+        elif kind < 0.6:
+            values.append(float(int(rng.expovariate(1 / 20))))
+        else:
+            values.append(rng.lognormvariate(5, 2))
+    return values
+
+
+def exact(values, q):
+    """Exact lower-nearest-rank quantile, the rank the sketch answers at"""
+    return float(np.percentile(values, q * 100, method='lower'))
+
+
+class QueueTimeSketchTest(unittest.TestCase):
+    def assert_within_alpha(self, sketch, values):
+        for q in QUANTILES:
+            expected = exact(values, q)
+            actual = sketch.quantile(q)
+            if expected <= 0:
+                self.assertLessEqual(actual, 0.0, f"q={q}")
+            else:
+                self.assertLessEqual(abs(actual - expected), ALPHA * expected, f"q={q}: {actual} vs {expected}")
+
+    def test_quantiles_within_one_percent(self):
+        for seed in range(3):
+            values = skewed_queue_times(20000, seed)
+            one_by_one, batched = QueueTimeSketch(), QueueTimeSketch()
+            for value in values:
+                one_by_one.add(value)
+            batched.add_values(values)
+
+            self.assert_within_alpha(batched, values)
+            self.assertEqual(batched.to_dict(), one_by_one.to_dict())
+            self.assertEqual(batched.count, len(values))
+            self.assertAlmostEqual(batched.mean, float(np.mean(values)), places=6)
+            self.assertEqual((batched.min, batched.max), (min(values), max(values)))
+
+    def test_merge_matches_one_sketch(self):
+        values = skewed_queue_times(10000, seed=7)
+        whole = QueueTimeSketch()
+        whole.add_values(values)
+        whole.add_phase_values(PHASE_COLUMNS[0], values[:5000])
+
+        parts = []
+        for start in range(0, len(values), 3000):
+            part = QueueTimeSketch()
+            part.add_values(values[start:start + 3000])
+            part.add_phase_values(PHASE_COLUMNS[0], values[start:min(start + 3000, 5000)])
+            parts.append(part)
+        merged = QueueTimeSketch()
+        for part in parts:
+            merged.merge(part)
+
+        self.assertEqual(merged.buckets, whole.buckets)
+        self.assertEqual((merged.count, merged.zero_count, merged.min, merged.max),
+                         (whole.count, whole.zero_count, whole.min, whole.max))
+        self.assertAlmostEqual(merged.total, whole.total, places=6)
+        self.assertEqual([merged.quantile(q) for q in QUANTILES], [whole.quantile(q) for q in QUANTILES])
+        self.assertEqual(merged.phases[PHASE_COLUMNS[0]].buckets, whole.phases[PHASE_COLUMNS[0]].buckets)
+        self.assert_within_alpha(merged, values)
+
+        # Merging copies phases; the parts are left as they were
+        self.assertEqual(parts[0].phases[PHASE_COLUMNS[0]].count, 3000)
+
+    def test_empty(self):
+        sketch = QueueTimeSketch()
+        self.assertTrue(np.isnan(sketch.quantile(0.5)))
+        self.assertTrue(np.isnan(sketch.mean))
+
+    def test_index_cache_is_bounded(self):
+        with mock.patch.object(aggregates, "_INDEX_CACHE", {}), mock.patch.object(aggregates, "_INDEX_CACHE_MAX", 50):
+            values = [i + 0.5 for i in range(200)]
+            sketch, expected = QueueTimeSketch(), QueueTimeSketch()
+            sketch.add_values(values)
+            for value in values:
+                expected.add(value)
+            self.assertEqual(len(aggregates._INDEX_CACHE), 50)
+            self.assertEqual(sketch.buckets, expected.buckets)
+
+
+class AggregateStoreTest(unittest.TestCase):
+    def test_day_files_round_trip(self):
+        values = skewed_queue_times(3000, seed=3)
+        rng = random.Random(3)
+        df = pd.DataFrame({
+            'Timestamp': [f"2024-01-0{8 + i % 2} {10 + i % 3}:15:00" for i in range(len(values))],
+            'Cluster': ["", "east"] * (len(values) // 2),
+            'Namespace': [rng.choice(["team-a", "team-b"]) for _ in values],
+            'QueueTime': values,
+            **{name: [float(rng.randint(0, 30)) if rng.random() < 0.8 else float('nan') for _ in values]
+               for name in PHASE_COLUMNS},
+        })
+        with tempfile.TemporaryDirectory() as root:
+            store = AggregateStore(root)
+            self.assertEqual(store.add(df), ["2024-01-08", "2024-01-09"])
+            reloaded = AggregateStore(root)
+            for day in reloaded.days():
+                hours = reloaded.load_day(day)
+                self.assertEqual(sorted(hours), ["10", "11", "12"])
+
+            sketches = reloaded.merged()
+            self.assertEqual(sorted(sketches), ["east/team-a", "east/team-b", "team-a", "team-b"])
+            for label, sketch in sketches.items():
+                cluster, _, namespace = label.rpartition("/")
+                rows = df[(df['Cluster'] == cluster) & (df['Namespace'] == namespace)]
+                self.assertEqual(sketch.count, len(rows))
+                self.assert_matches(sketch, rows['QueueTime'].tolist())
+                for name in PHASE_COLUMNS:
+                    self.assert_matches(sketch.phases[name], rows[name].dropna().tolist())
+
+            # A second add into the same hours merges into the stored buckets
+            store.add(df)
+            self.assertEqual(sum(s.count for s in AggregateStore(root).merged().values()), 2 * len(df))
+
+    def assert_matches(self, sketch, values):
+        expected = QueueTimeSketch()
+        expected.add_values(values)
+        self.assertEqual(sketch.buckets, expected.buckets)
+        self.assertEqual((sketch.count, sketch.zero_count, sketch.min, sketch.max),
+                         (expected.count, expected.zero_count, expected.min, expected.max))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""QueueTimeCollector collecting several clusters when one of them is slow"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+MONITOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MONITOR_DIR)
+sys.path.insert(0, os.path.join(MONITOR_DIR, "benchmarks"))
+from synthetic_pods import make_pod_list, write_kubectl_fixture
+
+
+class SlowClusterTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.pod_list = make_pod_list(100, namespace_count=3, seed=3, pending_fraction=0.2)
+        fixture_dir = os.path.join(self.work_dir.name, "fixture")
+        write_kubectl_fixture(fixture_dir, self.pod_list)
+
+        # kubectl stand-in; the "slow" context hangs until killed
+        kubectl = os.path.join(self.work_dir.name, "kubectl")
+        with open(kubectl, "w") as f:
+            f.write('#!/bin/sh\ncase "$*" in *--context=slow*) exec sleep 60;; esac\n'
+                    f'exec {sys.executable} {os.path.join(MONITOR_DIR, "benchmarks", "fake_kubectl.py")} "$@"\n')
+        os.chmod(kubectl, 0o755)
+
+        env = mock.patch.dict(os.environ, K8S_QUEUE_MONITOR_API="off", K8S_QUEUE_MONITOR_KUBECTL_PATH=kubectl,
+                              K8S_QUEUE_MONITOR_BENCH_FIXTURE=fixture_dir,
+                              K8S_QUEUE_MONITOR_OUTPUT_DIR=os.path.join(self.work_dir.name, "data"))
+        env.start()
+        self.addCleanup(env.stop)
+        from queue_time_collector import QueueTimeCollector
+        self.collector = QueueTimeCollector(contexts=["fast", "slow"], cluster_timeout=1)
+        self.started = [pod['metadata']['uid'] for pod in self.pod_list['items']
+                        if pod['metadata']['namespace'] != "kube-system" and pod['status']['phase'] != "Pending"]
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_timeout_kills_kubectl(self):
+        fetch_cluster = self.collector.fetch_cluster
+        fetches = []
+
+        def fetch(context, timestamp, deadline):
+            fetches.append(context)
+            return fetch_cluster(context, timestamp, deadline)
+
+        self.collector.fetch_cluster = fetch
+        start = time.monotonic()
+        listed_uids = []
+        rows = self.collector.collect_queue_times(listed_uids)
+        self.assertEqual(set(rows['Cluster']), {"fast"})
+        self.assertEqual(sorted(listed_uids), sorted(self.started))
+
+        # The hung kubectl is killed at the deadline, so the fetch ends with a TimeoutError
+        future = self.collector.in_flight.get("slow")
+        if future is not None:
+            self.assertIsInstance(future.exception(timeout=10), TimeoutError)
+        self.assertLess(time.monotonic() - start, 10)
+
+        # The next run fetches it again instead of skipping it
+        rows = self.collector.collect_queue_times()
+        self.assertEqual(set(rows['Cluster']), {"fast"})
+        self.assertEqual(sorted(fetches), ["fast", "fast", "slow", "slow"])
+
+    def test_overrunning_fetch_is_skipped_and_dropped(self):
+        release = threading.Event()
+        fetch_cluster, apply_cluster = self.collector.fetch_cluster, self.collector.apply_cluster
+        fetches, applied = [], []
+
+        def fetch(context, timestamp, deadline):
+            fetches.append(context)
+            if context == "slow":
+                # Ignores the deadline, like a request stuck beyond its reach
+                release.wait(30)
+                context = "fast"
+            return fetch_cluster(context, timestamp, deadline)
+
+        def apply(context, timestamp, fetched, listed_uids=None):
+            applied.append(context)
+            return apply_cluster(context, timestamp, fetched, listed_uids)
+
+        self.collector.fetch_cluster, self.collector.apply_cluster = fetch, apply
+        self.collector.collect_queue_times()
+        late = self.collector.in_flight["slow"]
+        listed_uids = []
+        rows = self.collector.collect_queue_times(listed_uids)
+
+        # "slow" is not fetched again while its first fetch runs
+        self.assertEqual(sorted(fetches), ["fast", "fast", "slow"])
+        self.assertIs(self.collector.in_flight["slow"], late)
+        self.assertEqual(set(rows['Cluster']), {"fast"})
+        self.assertEqual(sorted(listed_uids), sorted(self.started))
+
+        # Its late result is never applied
+        release.set()
+        late.exception(timeout=10)
+        self.collector.collect_queue_times()
+        self.assertEqual(sorted(applied), ["fast", "fast", "fast", "slow"])
+        self.assertEqual(sorted(fetches), ["fast", "fast", "fast", "slow", "slow"])
+
+if __name__ == "__main__":
+    unittest.main()
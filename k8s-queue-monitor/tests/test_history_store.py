@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""HistoryStore chunks: round trips, atomic writes, expiry and older history formats"""
+import array
+import datetime
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from history_store import HistoryStore, collection_epochs, read_chunk, read_frame, write_chunk
+from pod_parser import PHASE_COLUMNS, QueueTimeRows
+
+
+def utc_epoch(value):
+    return int(datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+               .replace(tzinfo=datetime.timezone.utc).timestamp())
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.work_dir.cleanup)
+        self.root = os.path.join(self.work_dir.name, "history")
+
+    def test_chunk_round_trip(self):
+        columns = {
+            'Timestamp': array.array('q', [1704708000, 1704708060]),
+            'Namespace': ["team-a", "tëam-b"],
+            'QueueTime': array.array('d', [1.5, 86400.25]),
+            'Scheduling': array.array('f', [0.5, float('nan')]),
+            'Count': [3, -4],
+            'Owner': ["Job/train", None],
+        }
+        path = os.path.join(self.work_dir.name, "chunk.qtc")
+        write_chunk(path, columns)
+
+        chunk = read_chunk(path)
+        self.assertEqual(list(chunk), list(columns))
+        self.assertEqual(chunk['Timestamp'], columns['Timestamp'])
+        self.assertEqual(chunk['QueueTime'], columns['QueueTime'])
+        self.assertEqual(chunk['Scheduling'].typecode, 'f')
+        self.assertEqual(chunk['Scheduling'][0], 0.5)
+        self.assertNotEqual(chunk['Scheduling'][1], chunk['Scheduling'][1])
+        self.assertEqual(list(chunk['Count']), [3, -4])
+        self.assertEqual(chunk['Namespace'], ["team-a", "tëam-b"])
+        self.assertEqual(chunk['Owner'], ["Job/train", None])
+        self.assertEqual(read_chunk(path, columns=['QueueTime']), {'QueueTime': columns['QueueTime']})
+
+    def test_append_round_trip(self):
+        store = HistoryStore(self.root)
+        rows = QueueTimeRows()
+        for i, timestamp in enumerate(["2024-01-08 10:59:00", "2024-01-08 11:00:00", "2024-01-08 11:30:00"]):
+            rows.append({'Timestamp': timestamp, 'Cluster': "", 'Namespace': "team-a", 'Pod': f"p{i}",
+                         'PodUID': f"uid-{i}", 'Owner': None, 'QueueTime': float(i),
+                         'CreationTime': 1704708000 + i, 'StartTime': 1704708000 + 2 * i,
+                         **dict.fromkeys(PHASE_COLUMNS, float(i))})
+        self.assertEqual(store.append(rows), 3)
+
+        # One chunk per collection hour
+        self.assertEqual(store.partitions(), ["2024-01-08T10", "2024-01-08T11"])
+        self.assertEqual(store.count_rows(), 3)
+        df = store.load()
+        self.assertEqual(list(df['Pod']), ["p0", "p1", "p2"])
+        self.assertEqual(list(df['QueueTime']), [0.0, 1.0, 2.0])
+        self.assertEqual(list(df['Timestamp']),
+                         collection_epochs(["2024-01-08 10:59:00", "2024-01-08 11:00:00", "2024-01-08 11:30:00"]))
+        self.assertEqual(list(df['StartTime']), [1704708000, 1704708002, 1704708004])
+        self.assertEqual(list(df[PHASE_COLUMNS[0]]), [0.0, 1.0, 2.0])
+
+    def test_failed_write_leaves_nothing(self):
+        path = os.path.join(self.work_dir.name, "chunk.qtc")
+        with mock.patch("history_store.os.fsync", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_chunk(path, {'QueueTime': array.array('d', [1.0, 2.0])})
+        self.assertEqual(os.listdir(self.work_dir.name), [])
+
+        # An earlier chunk at the same path is left as it was
+        write_chunk(path, {'QueueTime': array.array('d', [1.0])})
+        with mock.patch("history_store.os.replace", side_effect=OSError("interrupted")):
+            with self.assertRaises(OSError):
+                write_chunk(path, {'QueueTime': array.array('d', [5.0, 6.0])})
+        self.assertEqual(os.listdir(self.work_dir.name), ["chunk.qtc"])
+        self.assertEqual(list(read_chunk(path)['QueueTime']), [1.0])
+
+    def test_expire(self):
+        store = HistoryStore(self.root, retention_days=7)
+        for partition in ["2024-01-01T09", "2024-01-01T10", "2024-01-01T11", "2024-01-08T10"]:
+            os.makedirs(os.path.join(self.root, partition))
+
+        expired = store.expire(now=datetime.datetime(2024, 1, 8, 10, 30))
+        self.assertEqual(expired, ["2024-01-01T09"])
+        self.assertEqual(store.partitions(), ["2024-01-01T10", "2024-01-01T11", "2024-01-08T10"])
+        self.assertEqual(store.expire(now=datetime.datetime(2024, 1, 8, 10, 30)), [])
+
+    def test_string_time_chunk(self):
+        """Chunks written before times were epochs load with epoch times"""
+        path = os.path.join(self.work_dir.name, "old.qtc")
+        write_chunk(path, {
+            'Timestamp': ["2024-01-08 10:00:00", "2024-01-08 10:05:00"],
+            'Namespace': ["team-a", "team-b"],
+            'QueueTime': array.array('d', [90.0, 10.0]),
+            'CreationTime': ["2024-01-08T10:00:00Z", "2024-01-08T10:04:00Z"],
+            'StartTime': ["2024-01-08T10:01:30Z", "2024-01-08T10:04:10Z"],
+        })
+        df = read_frame(path)
+        self.assertEqual(list(df['Timestamp']), collection_epochs(["2024-01-08 10:00:00", "2024-01-08 10:05:00"]))
+        self.assertEqual(list(df['CreationTime']), [utc_epoch("2024-01-08T10:00:00Z"), utc_epoch("2024-01-08T10:04:00Z")])
+        self.assertEqual(list(df['StartTime']), [utc_epoch("2024-01-08T10:01:30Z"), utc_epoch("2024-01-08T10:04:10Z")])
+
+    def test_legacy_csv(self):
+        """The collector migrates queue_time_history.csv into epoch-time chunks"""
+        output_dir = os.path.join(self.work_dir.name, "data")
+        os.makedirs(output_dir)
+        with open(os.path.join(output_dir, "queue_time_history.csv"), "w") as f:
+            f.write("Timestamp,Namespace,Pod,PodUID,QueueTime,CreationTime,StartTime\n"
+                    "2024-01-08 10:00:00,team-a,p0,uid-0,90.0,2024-01-08T10:00:00Z,2024-01-08T10:01:30Z\n"
+                    "2024-01-08 11:00:00,team-a,p0,uid-0,90.0,2024-01-08T10:00:00Z,2024-01-08T10:01:30Z\n"
+                    "2024-01-08 11:00:00,team-b,p1,uid-1,10.0,2024-01-08T10:50:00Z,2024-01-08T10:50:10Z\n")
+
+        with mock.patch.dict(os.environ, K8S_QUEUE_MONITOR_API="off"):
+            from queue_time_collector import QueueTimeCollector
+            collector = QueueTimeCollector(output_dir=output_dir)
+
+        self.assertTrue(os.path.exists(os.path.join(output_dir, "queue_time_history.csv.migrated")))
+        df = collector.store.load()
+        self.assertEqual(list(df['PodUID']), ["uid-0", "uid-1"])
+        self.assertEqual(list(df['CreationTime']), [utc_epoch("2024-01-08T10:00:00Z"), utc_epoch("2024-01-08T10:50:00Z")])
+        self.assertEqual(list(df['StartTime']), [utc_epoch("2024-01-08T10:01:30Z"), utc_epoch("2024-01-08T10:50:10Z")])
+        self.assertIn("uid-1", collector.seen_pods)
+
+
+if __name__ == "__main__":
+    unittest.main()
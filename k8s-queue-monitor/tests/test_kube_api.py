@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+kube_api against a local http.server serving canned pod list pages
+
+Run with `python -m pytest tests` (or `python -m unittest discover tests`)
+from the k8s-queue-monitor directory.
+"""
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+MONITOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MONITOR_DIR)
+sys.path.insert(0, os.path.join(MONITOR_DIR, "benchmarks"))
+import kube_api
+from pod_parser import pod_list_params
+from synthetic_pods import make_pod_list, write_kubectl_fixture
+
+PAGE_SIZE = 40
+
+
+class CannedPodServer(HTTPServer):
+    """Serves a pod list as pages of page_size, chained by continue tokens"""
+
+    def __init__(self, items, page_size):
+        super().__init__(("127.0.0.1", 0), PodListHandler)
+        self.pages = [items[i:i + page_size] for i in range(0, len(items), page_size)] or [[]]
+        self.requests = []
+        self.connections = 0
+        # Seconds to stall before each page
+        self.delay = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class PodListHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the API server
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        self.server.requests.append((url.path, params))
+        time.sleep(self.server.delay)
+        index = int(params.get('continue', 0))
+        metadata = {'continue': str(index + 1)} if index + 1 < len(self.server.pages) else {}
+        body = json.dumps({'kind': 'PodList', 'metadata': metadata, 'items': self.server.pages[index]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def closed_port():
+    """A local port nothing listens on"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class KubeApiClientTest(unittest.TestCase):
+    def setUp(self):
+        self.pod_list = make_pod_list(150, namespace_count=3, seed=1)
+        self.server = CannedPodServer(self.pod_list['items'], PAGE_SIZE)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_pages_over_one_connection(self):
+        client = kube_api.KubeApiClient(self.server.url, page_size=PAGE_SIZE)
+        params = pod_list_params("status.phase!=Pending", "app=train")
+        uids = [pod['metadata']['uid'] for pod in client.iter_pods(params)]
+        client.close()
+
+        self.assertEqual(uids, [pod['metadata']['uid'] for pod in self.pod_list['items']])
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(self.server.connections, 1)
+        for index, (path, query) in enumerate(self.server.requests):
+            self.assertEqual(path, "/api/v1/pods")
+            self.assertEqual(query['limit'], str(PAGE_SIZE))
+            self.assertEqual(query['fieldSelector'], "status.phase!=Pending")
+            self.assertEqual(query['labelSelector'], "app=train")
+            self.assertEqual(query.get('continue'), str(index) if index else None)
+
+    def test_connect_from_kubeconfig(self):
+        kubeconfig = {
+            'current-context': 'local',
+            'contexts': [{'name': 'local', 'context': {'cluster': 'local', 'user': 'local'}}],
+            'clusters': [{'name': 'local', 'cluster': {'server': self.server.url}}],
+            'users': [{'name': 'local', 'user': {'token': 'secret'}}],
+        }
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(kubeconfig, f)
+        try:
+            client = kube_api.connect(f.name, page_size=PAGE_SIZE)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(len(list(client.iter_pods())), len(self.pod_list['items']))
+        self.assertEqual(client.headers['Authorization'], "Bearer secret")
+
+    def test_cancelled_mid_listing(self):
+        """A ClusterDeadline bounds the whole listing, though each page is within the socket timeout"""
+        from queue_time_collector import ClusterDeadline
+
+        self.server.delay = 0.4
+        client = kube_api.KubeApiClient(self.server.url, page_size=PAGE_SIZE, timeout=60)
+        deadline = ClusterDeadline(1)
+        deadline.track_api(client)
+        start = time.monotonic()
+        with self.assertRaises(kube_api.KubeApiError):
+            list(client.iter_pods(cancelled=deadline.expired))
+        deadline.cancel()
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertLess(len(self.server.requests), 4)
+
+    def test_server_down(self):
+        client = kube_api.KubeApiClient(f"http://127.0.0.1:{closed_port()}", timeout=5)
+        with self.assertRaises(kube_api.KubeApiError):
+            list(client.iter_pods())
+        self.assertIsNone(client.connection)
+
+
+class KubectlFallbackTest(unittest.TestCase):
+    """The collector lists pods with kubectl when the API server can't be reached"""
+
+    def test_falls_back_to_kubectl(self):
+        pod_list = make_pod_list(200, namespace_count=3, seed=2, pending_fraction=0.2)
+        with tempfile.TemporaryDirectory() as work_dir:
+            fixture_dir = os.path.join(work_dir, "fixture")
+            write_kubectl_fixture(fixture_dir, pod_list)
+            kubectl = os.path.join(work_dir, "kubectl")
+            with open(kubectl, "w") as f:
+                f.write(f"#!/bin/sh\nexec {sys.executable} "
+                        f"{os.path.join(MONITOR_DIR, 'benchmarks', 'fake_kubectl.py')} \"$@\"\n")
+            os.chmod(kubectl, 0o755)
+
+            env = dict(K8S_QUEUE_MONITOR_API="off", K8S_QUEUE_MONITOR_KUBECTL_PATH=kubectl,
+                       K8S_QUEUE_MONITOR_BENCH_FIXTURE=fixture_dir,
+                       K8S_QUEUE_MONITOR_OUTPUT_DIR=os.path.join(work_dir, "data"))
+            with mock.patch.dict(os.environ, env):
+                from queue_time_collector import QueueTimeCollector
+                collector = QueueTimeCollector(contexts=[None])
+                self.assertEqual(collector.api_clients, {})
+
+                client = kube_api.KubeApiClient(f"http://127.0.0.1:{closed_port()}", timeout=5)
+                collector.api_clients[None] = client
+                rows = collector.collect_cluster(None, "2024-01-08 00:00:00")
+
+            started = [pod for pod in pod_list['items'] if pod['metadata']['namespace'] != "kube-system"
+                       and pod['status']['phase'] != "Pending"]
+            self.assertEqual(len(rows), len(started))
+            self.assertEqual(sorted(rows['PodUID']), sorted(pod['metadata']['uid'] for pod in started))
+            self.assertIsNone(client.connection)
+
+
+if __name__ == "__main__":
+    unittest.main()
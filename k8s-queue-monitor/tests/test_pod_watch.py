@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""PodWatcher replaying recorded watch streams through open_stream"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pod_watch import PodWatcher
+
+
+def pod_event(event_type, name, resource_version, start_time=None, namespace="team-a"):
+    status = {'phase': 'Running', 'startTime': start_time} if start_time else {'phase': 'Pending'}
+    return {'type': event_type, 'object': {
+        'kind': 'Pod',
+        'metadata': {'name': name, 'namespace': namespace, 'uid': f"uid-{name}",
+                     'creationTimestamp': "2024-01-08T10:00:00Z", 'resourceVersion': resource_version},
+        'status': status}}
+
+
+def bookmark(resource_version):
+    return {'type': 'BOOKMARK', 'object': {'kind': 'Pod', 'metadata': {'resourceVersion': resource_version}}}
+
+
+def expired():
+    return {'type': 'ERROR', 'object': {'kind': 'Status', 'code': 410, 'message': "too old resource version"}}
+
+
+# One list per connection, in order
+STREAMS = [
+    [pod_event('ADDED', "train-0", "10"),
+     pod_event('MODIFIED', "train-0", "11", start_time="2024-01-08T10:01:30Z"),
+     pod_event('MODIFIED', "train-0", "12", start_time="2024-01-08T10:01:30Z"),
+     pod_event('ADDED', "coredns", "13", start_time="2024-01-08T10:00:05Z", namespace="kube-system"),
+     bookmark("20")],
+    [expired()],
+    # The relist replays every pod as ADDED
+    [pod_event('ADDED', "train-0", "30", start_time="2024-01-08T10:01:30Z"),
+     pod_event('ADDED', "train-1", "31", start_time="2024-01-08T10:00:10Z")],
+]
+
+
+class ReplayedWatch:
+    """open_stream that serves STREAMS as small text chunks and records the resourceVersions asked for"""
+
+    def __init__(self, streams, chunk_size=7):
+        self.streams = list(streams)
+        self.chunk_size = chunk_size
+        self.resource_versions = []
+
+    @property
+    def done(self):
+        return len(self.resource_versions) > len(STREAMS)
+
+    def __call__(self, resource_version, timeout_secs):
+        self.resource_versions.append(resource_version)
+        if not self.streams:
+            return []
+        text = "".join(json.dumps(event) + "\n" for event in self.streams.pop(0))
+        # Chunks split events mid-line, as pipe reads do
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+
+class PodWatcherReplayTest(unittest.TestCase):
+    def test_replay(self):
+        stream = ReplayedWatch(STREAMS)
+        watcher = PodWatcher(open_stream=stream)
+        records = []
+        watcher.run(lambda pod, queue_time: records.append((pod['metadata']['name'], queue_time)),
+                    should_stop=lambda: stream.done, retry_secs=0)
+
+        # Recorded once, when the start time appears; the relist doesn't record train-0 again
+        self.assertEqual(records, [("train-0", 90.0), ("train-1", 10.0)])
+        # The watch resumes after the bookmark, then relists (no resourceVersion) after 410 Gone
+        self.assertEqual(stream.resource_versions, [None, "20", None, "31"])
+        self.assertEqual(watcher.recorded_uids, {"uid-train-0", "uid-train-1"})
+
+    def test_deleted_pod_is_forgotten(self):
+        watcher = PodWatcher(open_stream=lambda resource_version, timeout_secs: [])
+        self.assertIsNotNone(watcher.handle_event(pod_event('ADDED', "train-0", "1", "2024-01-08T10:00:30Z")))
+        self.assertIsNone(watcher.handle_event(pod_event('DELETED', "train-0", "2", "2024-01-08T10:00:30Z")))
+        self.assertEqual(watcher.recorded_uids, set())
+        self.assertEqual(watcher.resource_version, "2")
+
+
+class KubectlStreamTest(unittest.TestCase):
+    def test_chatty_stderr(self):
+        """A kubectl writing more than a pipe buffer of warnings still streams its events"""
+        script = ("import json, sys; sys.stderr.write('W1008 warning\\n' * 20000); sys.stderr.flush(); "
+                  f"print(json.dumps({bookmark('42')!r}))")
+        with tempfile.TemporaryDirectory() as work_dir:
+            kubectl = os.path.join(work_dir, "kubectl")
+            with open(kubectl, "w") as f:
+                f.write(f"#!/bin/sh\nexec {sys.executable} -c \"{script}\"\n")
+            os.chmod(kubectl, 0o755)
+
+            watcher = PodWatcher(kubectl_path=kubectl)
+            lines = list(watcher.open_stream(None, 5))
+        self.assertEqual([json.loads(line) for line in lines], [bookmark("42")])
+
+
+class RecordedWatcher:
+    """Stands in for a PodWatcher: records the started pods of one replayed stream, then returns"""
+
+    def __init__(self, events):
+        self.watcher = PodWatcher(open_stream=lambda resource_version, timeout_secs: [])
+        self.events = events
+
+    def run(self, on_record, should_stop=None):
+        for event in self.events:
+            record = self.watcher.handle_event(event)
+            if record:
+                on_record(*record)
+
+
+class CollectorWatchTest(unittest.TestCase):
+    def test_one_watch_per_context(self):
+        with tempfile.TemporaryDirectory() as work_dir, \
+                mock.patch.dict(os.environ, K8S_QUEUE_MONITOR_API="off", K8S_QUEUE_MONITOR_OUTPUT_DIR=work_dir):
+            from queue_time_collector import QueueTimeCollector
+            collector = QueueTimeCollector(contexts=["east", "west"])
+            flushed = []
+            collector.update_persistent_storage = flushed.append
+            collector.run_watch(watchers={"east": RecordedWatcher(STREAMS[0]), "west": RecordedWatcher(STREAMS[2])})
+
+        rows = sorted(zip(*(flushed[0][column] for column in ('Cluster', 'Pod', 'QueueTime'))))
+        self.assertEqual(rows, [("east", "train-0", 90.0), ("west", "train-0", 90.0), ("west", "train-1", 10.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
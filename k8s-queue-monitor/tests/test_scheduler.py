@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""ChurnTracker's coverage loss estimate and the interval rules of the schedules"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scheduler import AdaptiveSchedule, ChurnTracker, IntervalSchedule
+
+# Long-running pods listed on every tick; they never retire, so the loss stays 0
+STEADY = [f"steady-{i}" for i in range(50)]
+
+
+class ChurnTrackerTest(unittest.TestCase):
+    def test_first_listing_is_never_a_singleton(self):
+        tracker = ChurnTracker()
+        tracker.observe(["a", "b"], 2, now=0)
+        tracker.observe([], 0, now=60)
+        self.assertEqual(tracker.retired[-1], (0, 0, 2))
+        self.assertEqual(tracker.coverage_loss(), 0.0)
+
+    def test_chao1_from_singletons_and_doubletons(self):
+        tracker = ChurnTracker()
+        listings = [
+            STEADY,
+            STEADY + ["d", "e"],     # d, e seen once
+            STEADY + ["f", "g"],     # d, e retire as singletons
+            STEADY + ["g"],          # f retires as a singleton
+            STEADY,                  # g retires as a doubleton
+        ]
+        for tick, listed in enumerate(listings):
+            tracker.observe(listed, 0, now=tick * 60)
+
+        self.assertEqual([tick[:2] for tick in tracker.retired], [(0, 0), (0, 0), (2, 0), (1, 0), (0, 1)])
+        # Chao1: f1^2 / (2 f2) = 3^2 / 2 missed, against 4 retired pods seen
+        self.assertEqual(tracker.missed_pods(), 4.5)
+        self.assertAlmostEqual(tracker.coverage_loss(), 4.5 / 8.5)
+
+    def test_chao1_without_doubletons(self):
+        tracker = ChurnTracker()
+        for tick, listed in enumerate([STEADY, STEADY + ["a", "b", "c"], STEADY]):
+            tracker.observe(listed, 0, now=tick * 60)
+        # Bias-corrected form f1 (f1 - 1) / 2
+        self.assertEqual(tracker.missed_pods(), 3.0)
+        self.assertEqual(tracker.coverage_loss(), 0.5)
+
+    def test_window(self):
+        tracker = ChurnTracker(window=2)
+        for tick, listed in enumerate([STEADY, STEADY + ["a"], STEADY, STEADY, STEADY]):
+            tracker.observe(listed, 0, now=tick * 60)
+        # The singleton retired three ticks ago has left the window
+        self.assertEqual(tracker.missed_pods(), 0.0)
+
+
+class AdaptiveScheduleTest(unittest.TestCase):
+    def quiet_ticks(self, schedule, ticks, start_tick=0, new_pods=5):
+        for tick in range(start_tick, start_tick + ticks):
+            schedule.observe(STEADY, new_pods, pending_pods=3, now=tick * 60.0)
+        return start_tick + ticks
+
+    def test_quiet_ticks_grow_within_max(self):
+        schedule = AdaptiveSchedule(60, 15, 240, start=0)
+        intervals = []
+        for tick in range(12):
+            intervals.append(schedule.observe(STEADY, 5, pending_pods=3, now=tick * 60.0))
+        # The first pending count and the first rate count as rising; then x1.25 per quiet tick, capped at max
+        self.assertEqual(intervals[:4], [60, 60, 75.0, 93.75])
+        self.assertEqual(intervals[-1], 240)
+        self.assertTrue(all(a <= b for a, b in zip(intervals, intervals[1:])))
+
+    def test_new_pod_burst_halves(self):
+        schedule = AdaptiveSchedule(200, 15, 240, start=0)
+        tick = self.quiet_ticks(schedule, 6)
+        self.assertEqual(schedule.interval_secs, 240)
+
+        self.assertEqual(schedule.observe(STEADY, 100, pending_pods=3, now=tick * 60.0), 120)
+        # A jump below BURST_PODS is not a burst
+        schedule = AdaptiveSchedule(200, 15, 240, start=0)
+        tick = self.quiet_ticks(schedule, 6, new_pods=1)
+        self.assertEqual(schedule.observe(STEADY, 9, pending_pods=3, now=tick * 60.0), 240)
+
+    def test_pending_burst_halves(self):
+        schedule = AdaptiveSchedule(240, 15, 240, start=0)
+        tick = self.quiet_ticks(schedule, 4)
+        self.assertEqual(schedule.observe(STEADY, 5, pending_pods=40, now=tick * 60.0), 120)
+
+    def test_coverage_loss_halves_down_to_min(self):
+        schedule = AdaptiveSchedule(60, 15, 240, start=0)
+        intervals = []
+        for tick in range(6):
+            # Every tick lists a fresh batch of short-lived pods, gone by the next
+            listed = STEADY + [f"short-{tick}-{i}" for i in range(5)]
+            intervals.append(schedule.observe(listed, 5, pending_pods=3, now=tick * 60.0))
+        self.assertGreater(schedule.tracker.coverage_loss(), schedule.target_loss)
+        # The first batch retires after the first listing, so losses start with the second
+        self.assertEqual(intervals[:2], [60, 60])
+        self.assertEqual(intervals[2:], [30.0, 15, 15, 15])
+
+    def test_starting_interval_is_clamped(self):
+        self.assertEqual(AdaptiveSchedule(5, 15, 240, start=0).interval_secs, 15)
+        self.assertEqual(AdaptiveSchedule(900, 15, 240, start=0).interval_secs, 240)
+
+
+class IntervalScheduleTest(unittest.TestCase):
+    def test_fixed_grid(self):
+        with mock.patch("scheduler.time.monotonic", return_value=103.0):
+            schedule = IntervalSchedule(10, start=100.0)
+            self.assertEqual(schedule.advance(), 0)
+            self.assertEqual(schedule.next_due, 110.0)
+            # The next slot is on the grid, not 10s after the tick ended
+            self.assertEqual(schedule.seconds_until_due(), 7.0)
+
+    def test_skips_missed_slots(self):
+        schedule = IntervalSchedule(10, start=100.0)
+        with mock.patch("scheduler.time.monotonic", return_value=137.0):
+            # The tick overran the slots at 110, 120 and 130
+            self.assertEqual(schedule.advance(), 3)
+            self.assertEqual(schedule.next_due, 140.0)
+            self.assertEqual(schedule.seconds_until_due(), 3.0)
+        with mock.patch("scheduler.time.monotonic", return_value=150.0):
+            # Due exactly now: that slot is skipped too
+            self.assertEqual(schedule.advance(), 1)
+            self.assertEqual(schedule.next_due, 160.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""SeenPodIndex and uid_key: deduplication, flushing and expiry of day files"""
+import datetime
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from uid_index import RECORD_SIZE, SeenPodIndex, uid_key
+
+POD_UID = "3f2b8c1e-9a4d-4e6f-8b7a-1c2d3e4f5a6b"
+
+
+class UidKeyTest(unittest.TestCase):
+    def test_hex_uid(self):
+        self.assertEqual(uid_key(POD_UID), uuid.UUID(POD_UID).bytes)
+        # Case and other UUID spellings give the same key
+        self.assertEqual(uid_key(POD_UID.upper()), uid_key(POD_UID))
+        self.assertEqual(uid_key("{" + POD_UID + "}"), uid_key(POD_UID))
+        self.assertEqual(uid_key(POD_UID.replace("-", "")), uid_key(POD_UID))
+
+    def test_non_hex_uid(self):
+        # 36 characters, but not hex: hashed, not mistaken for a UUID
+        odd = "zz2b8c1e-9a4d-4e6f-8b7a-1c2d3e4f5a6b"
+        self.assertEqual(uid_key(odd), hashlib.blake2b(odd.encode(), digest_size=RECORD_SIZE).digest())
+        self.assertEqual(len(uid_key("uid-1")), RECORD_SIZE)
+        self.assertEqual(uid_key("uid-1"), uid_key("uid-1"))
+        self.assertNotEqual(uid_key("uid-1"), uid_key("uid-2"))
+        self.assertEqual(len(uid_key(None)), RECORD_SIZE)
+
+
+class SeenPodIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.work_dir.cleanup)
+        self.root = os.path.join(self.work_dir.name, "seen_uids")
+
+    def test_dedupes_hex_and_non_hex(self):
+        index = SeenPodIndex(self.root)
+        self.assertEqual(index.add([POD_UID, "uid-1"], now=datetime.datetime(2024, 1, 8)), 2)
+        self.assertEqual(index.add([POD_UID.upper(), "uid-1", "uid-2"], now=datetime.datetime(2024, 1, 8)), 1)
+        self.assertEqual(len(index), 3)
+
+        reloaded = SeenPodIndex(self.root)
+        for pod_uid in [POD_UID, POD_UID.upper(), "uid-1", "uid-2"]:
+            self.assertIn(pod_uid, reloaded)
+        self.assertNotIn("uid-3", reloaded)
+        self.assertNotIn(str(uuid.UUID(int=1)), reloaded)
+
+    def test_unflushed_uids_persist_on_flush(self):
+        index = SeenPodIndex(self.root)
+        index.add(["uid-1", POD_UID], flush=False)
+        self.assertIn("uid-1", index)
+        self.assertEqual(index.day_files(), [])
+        self.assertNotIn("uid-1", SeenPodIndex(self.root))
+
+        index.flush(now=datetime.datetime(2024, 1, 8, 10))
+        self.assertEqual(index.day_files(), ["2024-01-08.uid"])
+        reloaded = SeenPodIndex(self.root)
+        self.assertIn("uid-1", reloaded)
+        self.assertIn(POD_UID, reloaded)
+        # Nothing is written twice
+        index.flush(now=datetime.datetime(2024, 1, 8, 11))
+        self.assertEqual(os.path.getsize(os.path.join(self.root, "2024-01-08.uid")), 2 * RECORD_SIZE)
+
+    def test_torn_record_is_ignored(self):
+        index = SeenPodIndex(self.root)
+        index.add(["uid-1"], now=datetime.datetime(2024, 1, 8))
+        with open(os.path.join(self.root, "2024-01-08.uid"), "ab") as f:
+            f.write(uid_key("uid-2")[:5])
+        reloaded = SeenPodIndex(self.root)
+        self.assertEqual(len(reloaded), 1)
+        self.assertIn("uid-1", reloaded)
+
+    def test_day_files_expire_with_the_window(self):
+        index = SeenPodIndex(self.root, retention_days=7)
+        index.add(["uid-old"], now=datetime.datetime(2024, 1, 1, 23))
+        index.add(["uid-edge"], now=datetime.datetime(2024, 1, 2, 9))
+        index.add(["uid-new"], now=datetime.datetime(2024, 1, 8, 9))
+
+        expired = index.expire(now=datetime.datetime(2024, 1, 9, 10))
+        self.assertEqual(expired, ["2024-01-01.uid"])
+        self.assertEqual(index.day_files(), ["2024-01-02.uid", "2024-01-08.uid"])
+        # An expired pod is no longer seen, so it is stored again if still listed
+        self.assertNotIn("uid-old", index)
+        self.assertIn("uid-edge", index)
+        self.assertNotIn("uid-old", SeenPodIndex(self.root))
+
+
+if __name__ == "__main__":
+    unittest.main()
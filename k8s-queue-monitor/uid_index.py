@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Persistent set of PodUIDs that have already been written to history.
+
+A pod's queue time never changes once it has started, so the collector only
+needs to store it the first time the pod is seen. UIDs are kept as raw
+16-byte values in one append-only file per day:
+
+    seen_uids/
+        2026-10-16.uid
+
+Day files older than the retention window are deleted, in step with the
+history store. A pod still running after that is written once more.
+"""
+import datetime
+import hashlib
+import os
+import uuid
+
+RECORD_SIZE = 16
+DAY_FORMAT = "%Y-%m-%d"
+SUFFIX = ".uid"
+
+
+def uid_key(pod_uid):
+    """Compact 16-byte key for a pod UID"""
+    # Pod UIDs are canonical UUIDs; decoding the hex directly gives the same
+    # bytes as uuid.UUID at a fraction of the cost
+    if isinstance(pod_uid, str) and len(pod_uid) == 36:
+        try:
+            key = bytes.fromhex(pod_uid.replace("-", ""))
+        except ValueError:
+            key = None
+        if key is not None and len(key) == RECORD_SIZE:
+            return key
+    try:
+        return uuid.UUID(pod_uid).bytes
+    except (ValueError, TypeError, AttributeError):
+        # Not a UUID (e.g. test fixtures); hash it to the same width
+        return hashlib.blake2b(str(pod_uid).encode(), digest_size=RECORD_SIZE).digest()
+
+
+class SeenPodIndex:
+    def __init__(self, root, retention_days=7):
+        """
+        Load the index from disk
+
+        Args:
+            root: Directory holding the per-day UID files (created if missing)
+            retention_days: Day files older than this are removed by expire()
+        """
+        self.root = root
+        self.retention_days = retention_days
+        os.makedirs(self.root, exist_ok=True)
+
+        self.keys = set()
+        self.unflushed = []
+        for name in self.day_files():
+            with open(os.path.join(self.root, name), "rb") as f:
+                data = f.read()
+            # Ignore a torn final record from an interrupted append
+            usable = len(data) - len(data) % RECORD_SIZE
+            self.keys.update(data[i:i + RECORD_SIZE] for i in range(0, usable, RECORD_SIZE))
+
+    def __contains__(self, pod_uid):
+        return uid_key(pod_uid) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def day_files(self):
+        """Sorted per-day UID file names (oldest first)"""
+        return sorted(name for name in os.listdir(self.root) if name.endswith(SUFFIX))
+
+    def add(self, pod_uids, now=None, flush=True):
+        """
+        Record UIDs as seen
+
+        New UIDs are appended to today's file, or with flush=False only held in
+        memory until flush() (e.g. while their rows are still buffered).
+        """
+        added = 0
+        for pod_uid in pod_uids:
+            key = uid_key(pod_uid)
+            if key not in self.keys:
+                self.keys.add(key)
+                self.unflushed.append(key)
+                added += 1
+
+        if flush:
+            self.flush(now)
+        return added
+
+    def flush(self, now=None):
+        """Append UIDs held in memory to today's file"""
+        if not self.unflushed:
+            return
+        day = (now or datetime.datetime.now()).strftime(DAY_FORMAT)
+        with open(os.path.join(self.root, f"{day}{SUFFIX}"), "ab") as f:
+            f.write(b"".join(self.unflushed))
+            f.flush()
+            os.fsync(f.fileno())
+        self.unflushed = []
+
+    def expire(self, now=None):
+        """Drop day files older than the retention window and forget their UIDs"""
+        now = now or datetime.datetime.now()
+        cutoff = (now - datetime.timedelta(days=self.retention_days)).strftime(DAY_FORMAT)
+        expired = [name for name in self.day_files() if name[:-len(SUFFIX)] < cutoff]
+        for name in expired:
+            path = os.path.join(self.root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            self.keys.difference_update(data[i:i + RECORD_SIZE] for i in range(0, len(data), RECORD_SIZE))
+            os.remove(path)
+        return expired
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Running, mergeable queue time aggregates per workload and hour.
+
+A workload is a pod's controlling owner (pod_parser.pod_owner): a Job,
+ReplicaSet, StatefulSet, DaemonSet or a custom controller such as a training
+job operator. Pods without one are left out. The store has the same layout
+and sketches as the namespace aggregates, with each bucket keyed by
+workload_label instead of namespace_label:
+
+    2026-10-16.json      {"18": {"team-a Job/train-7": {sketch}, "prod/team-b ReplicaSet/api-5d8f9c": ...}}
+
+Every collection folds its new pods into the touched hours, so a report only
+merges the buckets of its window; it never regroups the raw history. A
+ReplicaSet is reported as itself, not its Deployment, since the Deployment
+is not on the pod.
+"""
+import heapq
+
+from aggregates import PERCENTILES, AggregateStore, namespace_label, percentile_label
+from pod_parser import PHASE_COLUMNS
+
+WORKLOAD_COLUMNS = (['Namespace', 'Kind', 'Workload', 'Pod_Count', 'Mean_Seconds', 'Max_Seconds']
+                    + [f'{percentile_label(q).upper()}_Seconds' for q in PERCENTILES]
+                    + [f'{name}_Mean_Seconds' for name in PHASE_COLUMNS])
+
+
+def workload_label(cluster, namespace, owner):
+    """Bucket key of a workload; names and kinds can't contain spaces"""
+    return f"{namespace_label(cluster, namespace)} {owner}"
+
+
+def split_workload_label(label):
+    """(namespace label, kind, name) of a workload_label"""
+    namespace, _, owner = label.rpartition(" ")
+    kind, _, name = owner.partition("/")
+    return namespace, kind, name
+
+
+class WorkloadStore(AggregateStore):
+    """Hourly per-workload sketches; rows without an Owner are left out"""
+
+    def row_labels(self, df, clusters):
+        if 'Owner' not in df:
+            # History written before owners were collected
+            return [None] * len(df)
+        return [workload_label(cluster, namespace, owner) if isinstance(owner, str) and owner else None
+                for cluster, namespace, owner in zip(clusters, df['Namespace'], df['Owner'])]
+
+
+def top_workloads(sketches, n=10):
+    """The n workload labels with the highest mean queue time, slowest first"""
+    return heapq.nlargest(n, sketches, key=lambda label: sketches[label].mean)
+
+
+def workload_frame(sketches, labels=None):
+    """One row of WORKLOAD_COLUMNS per workload (all, or the given labels in order), slowest first"""
+    import pandas as pd
+
+    if labels is None:
+        labels = sorted(sketches, key=lambda label: sketches[label].mean, reverse=True)
+    rows = []
+    for label in labels:
+        sketch = sketches[label]
+        namespace, kind, name = split_workload_label(label)
+        phases = [sketch.phases[phase].mean if phase in sketch.phases else None for phase in PHASE_COLUMNS]
+        rows.append([namespace, kind, name, sketch.count, round(sketch.mean, 2), round(sketch.max, 2)]
+                    + [round(sketch.quantile(q), 2) for q in PERCENTILES]
+                    + [None if mean is None else round(mean, 2) for mean in phases])
+    return pd.DataFrame(rows, columns=WORKLOAD_COLUMNS)
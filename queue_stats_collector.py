@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import subprocess
 import json
+import numpy as np
 import pandas as pd
 import time
 import os
@@ -8,8 +9,23 @@ import datetime
 from pathlib import Path
 import sys
 
+# Shared helpers live alongside the 7-day monitor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "k8s-queue-monitor"))
+import kube_api
+from instrumentation import Instrumentation, count, stage, timed_iter
+from pending_index import EXIT_COLUMNS, PendingPodIndex, backlog_frame, oldest_frame, wait_summary
+from pod_buffer import PodBuffer
+from pod_parser import (MAX_QUEUE_TIME_SECS, PHASE_COLUMNS, extract_pod_columns,
+                        pending_field_selector, pod_field_selector, pod_list_args, pod_list_params, pod_owner,
+                        prune_pod, queue_phases, queue_time_frame, stream_pod_rows)
+from pod_watch import PodWatcher
+from report_writers import DEFAULT_XLSX_MAX_ROWS, parse_formats, write_raw_data
+from scheduler import AdaptiveSchedule, ChurnTracker, IntervalSchedule
+
 class QueueTimeStatsCollector:
-    def __init__(self, duration_mins=5, interval_secs=60, output_dir=None, exclude_namespaces=None, kubeconfig=None):
+    def __init__(self, duration_mins=5, interval_secs=60, output_dir=None, exclude_namespaces=None, kubeconfig=None,
+                 watch=False, label_selector=None, raw_formats=None, xlsx_max_rows=DEFAULT_XLSX_MAX_ROWS,
+                 instrument=False, profile=None, min_interval_secs=None, max_interval_secs=None):
         """
         Initialize the collector
         
@@ -19,10 +35,29 @@ class QueueTimeStatsCollector:
             output_dir: Directory to store results (default: auto-generated)
             exclude_namespaces: List of namespaces to exclude (default: ['kube-system'])
             kubeconfig: Path to kubeconfig file (default: None, will use hardcoded path)
+            watch: Collect from a single pod watch instead of polling every interval_secs
+            label_selector: Only collect pods matching this label selector (default: all pods)
+            raw_formats: Formats for all_queue_times (csv, csv.gz, parquet, xlsx; default: csv and xlsx)
+            xlsx_max_rows: Skip all_queue_times.xlsx above this many rows (None: no cap)
+            instrument: Append per-stage timings of each tick and of the reports to instrumentation.jsonl
+            profile: Also dump a 'cpu' (cProfile), 'memory' (tracemalloc) or 'all' profile of each tick
+            min_interval_secs: With max_interval_secs, adapt the interval to pod churn between these bounds
+            max_interval_secs: Longest adaptive interval (default: fixed interval_secs)
         """
         self.duration_mins = duration_mins
         self.interval_secs = interval_secs
+        self.min_interval_secs = min_interval_secs
+        self.max_interval_secs = max_interval_secs
+        self.watch = watch
         self.exclude_namespaces = exclude_namespaces or ['kube-system']
+
+        # Excluded namespaces and unstarted pods are filtered on the API server
+        self.field_selector = pod_field_selector(self.exclude_namespaces)
+        self.label_selector = label_selector
+
+        # Raw data goes out through streaming writers; the summary workbooks stay small
+        self.raw_formats = raw_formats or parse_formats(None)
+        self.xlsx_max_rows = xlsx_max_rows
         
         # Hardcode the kubeconfig path to /root/.kube/config
         self.kubeconfig = "/root/.kube/config"
@@ -32,6 +67,12 @@ class QueueTimeStatsCollector:
             print(f"WARNING: Kubeconfig file not found at {self.kubeconfig}")
         else:
             print(f"Using hardcoded kubeconfig: {self.kubeconfig}")
+
+        # Reuse one API connection for every collection when the kubeconfig allows it
+        # (K8S_QUEUE_MONITOR_API=off forces kubectl)
+        self.api_client = None
+        if os.environ.get('K8S_QUEUE_MONITOR_API', 'auto') != 'off' and os.path.exists(self.kubeconfig):
+            self.api_client = kube_api.connect(self.kubeconfig)
         
         # Create timestamp for output directory
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -39,10 +80,21 @@ class QueueTimeStatsCollector:
         
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
+
+        # Per-stage timing records, off by default
+        self.instrumentation = Instrumentation.from_settings(self.output_dir, instrument, profile)
         
-        # Initialize DataFrame to store all collected data
-        self.all_data = pd.DataFrame(columns=['Timestamp', 'Namespace', 'Pod', 'QueueTime', 'QueueTimeFormatted', 
-                                             'Days', 'Hours', 'Minutes', 'Seconds'])
+        # Each pod is recorded once, compactly; the report frame is built after collection
+        self.buffer = PodBuffer()
+        self.all_data = pd.DataFrame()
+
+        # Pod churn between ticks and the estimated share of pods no listing saw
+        self.churn = ChurnTracker()
+
+        # Pods still waiting to start, diffed by UID each tick; pods leaving it are completed waits
+        self.pending_pods = PendingPodIndex()
+        self.completed_waits = []
+        self.report = None
         
         print(f"Starting queue time statistics collection for {duration_mins} minutes.")
         print(f"Excluding namespaces: {', '.join(self.exclude_namespaces)}")
@@ -62,67 +114,97 @@ class QueueTimeStatsCollector:
             'Formatted': f"{int(days)}d {int(hours)}h {int(minutes)}m {round(seconds, 2)}s"
         }
     
-    def collect_queue_times(self):
-        """Run kubectl command and collect queue times for all namespaces (except excluded ones)"""
+    def format_time_columns(self, seconds):
+        """Vectorized format_time_components over a Series of seconds"""
+        days, remainder = np.divmod(seconds.to_numpy(dtype=float), 86400)
+        hours, remainder = np.divmod(remainder, 3600)
+        minutes, secs = np.divmod(remainder, 60)
+        days, hours, minutes = days.astype(int), hours.astype(int), minutes.astype(int)
+        secs = [round(s, 2) for s in secs.tolist()]
+
+        return pd.DataFrame({
+            'QueueTimeFormatted': [f"{d}d {h}h {m}m {s}s" for d, h, m, s in zip(days.tolist(), hours.tolist(), minutes.tolist(), secs)],
+            'Days': days,
+            'Hours': hours,
+            'Minutes': minutes,
+            'Seconds': secs
+        }, index=seconds.index)
+    
+    def list_pending_pods(self):
+        """Pruned Pending pods; a separate, usually short listing"""
+        field_selector = pending_field_selector(self.exclude_namespaces)
+        if self.api_client:
+            try:
+                return [prune_pod(pod) for pod in
+                        self.api_client.iter_pods(pod_list_params(field_selector, self.label_selector))]
+            except kube_api.KubeApiError as e:
+                print(f"API request failed ({e}), falling back to kubectl")
+                self.api_client.close()
+        return list(stream_pod_rows(["kubectl", f"--kubeconfig={self.kubeconfig}"] + pod_list_args(
+            field_selector, self.label_selector)))
+
+    def track_pending(self, pending_pods, new_data, timestamp):
+        """Diff the Pending listing into the index; pods that left it are completed waits"""
+        started_uids = set(new_data['PodUID']) if not new_data.empty else set()
+        for uid, _, namespace, name, wait in self.pending_pods.update("", pending_pods):
+            outcome = "started" if uid in started_uids or uid in self.buffer else "gone"
+            self.completed_waits.append((timestamp, "", namespace, name, uid, round(wait, 3), outcome))
+
+    def collect_queue_times(self, listed_uids=None):
+        """
+        Run kubectl command and collect queue times of pods not yet recorded (except excluded namespaces)
+
+        The UIDs of all listed started pods, recorded or not, go to listed_uids.
+        """
+        # Pending pods are listed first, so a pod that starts in between shows
+        # up in both listings rather than in neither
+        try:
+            with stage("pending_list"):
+                pending_pods = self.list_pending_pods()
+            count("pending_pods", len(pending_pods))
+        except Exception as e:
+            print(f"Error listing pending pods: {str(e)}")
+            pending_pods = None
+
         try:
             # Build kubectl command with properly expanded kubeconfig path
-            kubectl_cmd = ["kubectl", f"--kubeconfig={self.kubeconfig}", "get", "pods", "--all-namespaces", "-o", "json"]
+            kubectl_cmd = ["kubectl", f"--kubeconfig={self.kubeconfig}"] + pod_list_args(
+                self.field_selector, self.label_selector)
             
-            # Print the command for debugging
-            print(f"DEBUG: Running command: {' '.join(kubectl_cmd)}")
-            
-            # Run kubectl command
-            result = subprocess.run(
-                kubectl_cmd,
-                capture_output=True, text=True, check=True
-            )
-            
-            # Parse JSON output
-            pods_data = json.loads(result.stdout)
-            
-            # Process pod data
-            queue_times = []
+            # Stream pods from the API server (or kubectl's output) and extract
+            # columns in one pass, then compute queue times column-wise
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            for pod in pods_data['items']:
-                namespace = pod['metadata']['namespace']
-                
-                # Skip excluded namespaces
-                if namespace in self.exclude_namespaces:
-                    continue
-                    
-                if pod.get('status', {}).get('startTime'):
-                    pod_name = pod['metadata']['name']
-                    
-                    # Parse timestamps
-                    created_time = pd.to_datetime(pod['metadata']['creationTimestamp'])
-                    start_time = pd.to_datetime(pod['status']['startTime'])
-                    # Calculate queue time in seconds
-                    queue_time = (start_time - created_time).total_seconds()
-                    
-                    # Skip unreasonable queue times (more than 30 days)
-                    if queue_time > 30 * 24 * 60 * 60:
-                        print(f"WARNING: Skipping pod {namespace}/{pod_name} with unreasonable queue time: {queue_time:.2f} seconds")
-                        continue
-                    
-                    # Format queue time into components
-                    time_components = self.format_time_components(queue_time)
-                    
-                    queue_times.append({
-                        'Timestamp': timestamp,
-                        'Namespace': namespace,
-                        'Pod': pod_name,
-                        'QueueTime': queue_time,
-                        'QueueTimeFormatted': time_components['Formatted'],
-                        'Days': time_components['Days'],
-                        'Hours': time_components['Hours'],
-                        'Minutes': time_components['Minutes'],
-                        'Seconds': time_components['Seconds'],
-                        'CreationTime': pod['metadata']['creationTimestamp'],
-                        'StartTime': pod['status']['startTime']
-                    })
-            
-            return pd.DataFrame(queue_times)
+            columns = None
+            if self.api_client:
+                try:
+                    pods = self.api_client.iter_pods(pod_list_params(self.field_selector, self.label_selector))
+                    with stage("extract"):
+                        columns = extract_pod_columns(timed_iter("parse", pods), self.exclude_namespaces,
+                                                      skip_uids=self.buffer, listed_uids=listed_uids)
+                except kube_api.KubeApiError as e:
+                    print(f"API request failed ({e}), falling back to kubectl")
+                    self.api_client.close()
+            if columns is None:
+                # Print the command for debugging
+                print(f"DEBUG: Running command: {' '.join(kubectl_cmd)}")
+                with stage("extract"):
+                    columns = extract_pod_columns(timed_iter("parse", stream_pod_rows(kubectl_cmd)),
+                                                  self.exclude_namespaces, skip_uids=self.buffer,
+                                                  listed_uids=listed_uids)
+            with stage("queue_times"):
+                df = queue_time_frame(columns, timestamp)
+            count("new_pods", len(df))
+            if pending_pods is not None:
+                with stage("pending_track"):
+                    self.track_pending(pending_pods, df, timestamp)
+            if df.empty:
+                return df
+
+            # Skip unreasonable queue times (more than 30 days)
+            too_long = df['QueueTime'] > MAX_QUEUE_TIME_SECS
+            for row in df[too_long].itertuples():
+                print(f"WARNING: Skipping pod {row.Namespace}/{row.Pod} with unreasonable queue time: {row.QueueTime:.2f} seconds")
+            return df[~too_long].reset_index(drop=True)
             
         except subprocess.CalledProcessError as e:
             print(f"Error running kubectl command: {e}")
@@ -135,23 +217,65 @@ class QueueTimeStatsCollector:
             print(f"Unexpected error: {str(e)}")
             return pd.DataFrame()
     
+    def run_watch_collection(self, watcher=None):
+        """Collect data from a pod watch for the specified duration, recording each pod once"""
+        watcher = watcher or PodWatcher("kubectl", self.kubeconfig, self.exclude_namespaces,
+                                        label_selector=self.label_selector)
+
+        def on_record(pod, queue_time):
+            metadata = pod['metadata']
+            self.buffer.add(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), metadata['namespace'],
+                            metadata['name'], metadata.get('uid'), queue_time, metadata['creationTimestamp'],
+                            pod['status']['startTime'],
+                            phases=queue_phases(pod['status'].get('conditions'), metadata['creationTimestamp']),
+                            owner=pod_owner(metadata.get('ownerReferences')))
+
+        print(f"Watching pods for {self.duration_mins} minutes...")
+        watcher.run(on_record, deadline=time.monotonic() + self.duration_mins * 60)
+        print(f"  Recorded queue times for {len(self.buffer)} pods")
+
     def run_collection(self):
         """Collect data at regular intervals for the specified duration"""
+        if self.watch:
+            self.run_watch_collection()
+            return
+
         # Calculate number of iterations
         iterations = int(self.duration_mins * 60 / self.interval_secs)
-        
-        for i in range(1, iterations + 1):
-            print(f"[{i}/{iterations}] Collecting data...")
+        # Ticks stay on a fixed monotonic grid regardless of collection time;
+        # an adaptive interval instead runs ticks until the duration is up
+        adaptive = bool(self.min_interval_secs and self.max_interval_secs)
+        if adaptive:
+            schedule = AdaptiveSchedule(self.interval_secs, self.min_interval_secs, self.max_interval_secs,
+                                        tracker=self.churn)
+            deadline = schedule.next_due + self.duration_mins * 60
+        else:
+            schedule = IntervalSchedule(self.interval_secs)
+
+        i = 0
+        while adaptive or i < iterations:
+            i += 1
+            print(f"[{i}] Collecting data..." if adaptive else f"[{i}/{iterations}] Collecting data...")
             
             # Collect data
-            df = self.collect_queue_times()
+            with self.instrumentation.tick("collection"):
+                listed_uids = []
+                df = self.collect_queue_times(listed_uids)
+                if not df.empty:
+                    with stage("buffer"):
+                        self.buffer.add_frame(df)
+                with stage("churn"):
+                    if adaptive:
+                        schedule.observe(listed_uids, len(df), len(self.pending_pods))
+                    else:
+                        self.churn.observe(listed_uids, len(df), len(self.pending_pods))
+                        self.churn.smooth_rate()
             
             if not df.empty:
-                # Add to overall dataset
-                self.all_data = pd.concat([self.all_data, df], ignore_index=True)
                 
                 # Print current stats
-                print(f"  Collected data for {len(df)} pods across {df['Namespace'].nunique()} namespaces")
+                print(f"  Collected data for {len(df)} new pods across {df['Namespace'].nunique()} namespaces "
+                      f"({len(self.buffer)} total)")
                 
                 # Calculate and print overall stats for this iteration
                 avg_queue = df['QueueTime'].mean()
@@ -166,120 +290,211 @@ class QueueTimeStatsCollector:
                 print(f"  Average queue time: {avg_formatted} ({avg_queue:.2f} seconds)")
                 print(f"  Maximum queue time: {max_formatted} ({max_queue:.2f} seconds) in {max_ns}/{max_pod}")
             else:
-                print("  No data collected in this iteration")
+                print("  No new pods in this iteration")
+
+            if len(self.pending_pods):
+                _, ns, pod, _, wait = self.pending_pods.oldest(1)[0]
+                print(f"  Pending pods: {len(self.pending_pods)}, oldest waiting "
+                      f"{self.format_time_components(wait)['Formatted']} ({ns}/{pod})")
+            print(f"  Churn: {self.churn.summary()}" + (f"; interval {schedule.interval_secs:.0f}s" if adaptive else ""))
             
             # Wait for next interval if not the last iteration
-            if i < iterations:
-                print(f"Waiting {self.interval_secs} seconds until next collection...")
-                time.sleep(self.interval_secs)
+            if not adaptive and i == iterations:
+                break
+            schedule.advance()
+            if adaptive and schedule.next_due >= deadline:
+                break
+            print(f"Waiting {schedule.seconds_until_due():.0f} seconds until next collection...")
+            schedule.wait()
+
+        print(f"Estimated coverage loss: {self.churn.coverage_loss():.1%} of pods started and left between "
+              f"listings unseen (~{self.churn.missed_pods():.0f} pods over the last {len(self.churn.retired)} ticks)")
     
+    def build_report_frame(self):
+        """All recorded pods with formatted queue time columns, for the reports"""
+        df = self.buffer.to_frame()
+        time_components = self.format_time_columns(df['QueueTime'])
+        return pd.concat([df[['Timestamp', 'Namespace', 'Pod', 'Owner', 'QueueTime']], time_components,
+                          df[['CreationTime', 'StartTime'] + PHASE_COLUMNS]], axis=1)
+
+    def top_pods(self, n=10):
+        """The n pods with the longest queue times, one row per Namespace/Pod"""
+        # nlargest on a few candidates instead of sorting every row; widen only
+        # if duplicate Namespace/Pod names leave fewer than n
+        candidates = n
+        while True:
+            top = self.all_data.nlargest(candidates, 'QueueTime').drop_duplicates(['Namespace', 'Pod'])
+            if len(top) >= n or candidates >= len(self.all_data):
+                return top.head(n)
+            candidates *= 4
+
+    def top_workloads(self, n=10):
+        """The n workloads (controlling owners) with the highest average queue time"""
+        data = self.all_data[self.all_data['Owner'] != ""]
+        workloads = data.groupby(['Namespace', 'Owner'], observed=True).agg(
+            PodCount=('Pod', 'size'),
+            AvgQueueTime=('QueueTime', 'mean'),
+            MaxQueueTime=('QueueTime', 'max'),
+        ).reset_index()
+        return workloads.nlargest(n, 'AvgQueueTime').astype({'Namespace': str, 'Owner': str})
+
+    def compute_report(self):
+        """
+        Compute every statistic shown on the console and in the workbooks in one pass
+
+        Returns a dict with 'overall' (dict of values and formatted strings),
+        'ns_stats' (per-namespace DataFrame, highest average first) and
+        'top_pods' and 'top_workloads' (DataFrames).
+        """
+        data = self.all_data
+        max_row = data.loc[data['QueueTime'].idxmax()]
+        overall_avg = data['QueueTime'].mean()
+        overall_max = max_row['QueueTime']
+        overall = {
+            'total_pods': data['Pod'].nunique(),
+            'total_namespaces': data['Namespace'].nunique(),
+            'avg': overall_avg,
+            'max': overall_max,
+            'max_namespace': max_row['Namespace'],
+            'max_pod': max_row['Pod'],
+            'avg_formatted': self.format_time_components(overall_avg)['Formatted'],
+            'max_formatted': self.format_time_components(overall_max)['Formatted'],
+        }
+
+        ns_stats = data.groupby('Namespace', observed=True).agg(
+            PodCount=('Pod', 'nunique'),
+            AvgQueueTime=('QueueTime', 'mean'),
+            MaxQueueTime=('QueueTime', 'max'),
+            MinQueueTime=('QueueTime', 'min'),
+            StdQueueTime=('QueueTime', 'std'),
+            # Mean seconds per queue phase over the pods whose phase is known
+            **{f'Avg{name}': (name, 'mean') for name in PHASE_COLUMNS}
+        ).reset_index()
+
+        # Split each stat into formatted/time component columns, vectorized
+        stats = ['AvgQueueTime', 'MaxQueueTime', 'MinQueueTime']
+        components = {stat: self.format_time_columns(ns_stats[stat]) for stat in stats}
+        for stat in stats:
+            ns_stats[f'{stat}Formatted'] = components[stat]['QueueTimeFormatted']
+        for stat in stats:
+            for part in ['Days', 'Hours', 'Minutes', 'Seconds']:
+                ns_stats[f'{stat}{part}'] = components[stat][part]
+
+        ns_stats['Namespace'] = ns_stats['Namespace'].astype(str)
+        ns_stats = ns_stats.sort_values('AvgQueueTime', ascending=False)
+
+        return {'overall': overall, 'ns_stats': ns_stats, 'top_pods': self.top_pods(10),
+                'top_workloads': self.top_workloads(10)}
+
     def generate_statistics(self):
         """Generate and print statistics from collected data"""
         if self.all_data.empty:
             print("No data collected, cannot generate statistics.")
             return
         
-        # Save raw data to CSV and Excel
-        self.all_data.to_csv(os.path.join(self.output_dir, "all_queue_times.csv"), index=False)
-        self.all_data.to_excel(os.path.join(self.output_dir, "all_queue_times.xlsx"), index=False, engine='openpyxl')
+        # Save raw data in the configured formats
+        with stage("raw_data"):
+            write_raw_data(self.all_data, self.output_dir, "all_queue_times", self.raw_formats, self.xlsx_max_rows)
+
+        # Console output, CSVs and the summary workbook all render from this
+        with stage("compute"):
+            self.report = self.compute_report()
+        overall = self.report['overall']
         
-        # Calculate overall statistics
+        # Overall statistics
         print("\n=== OVERALL QUEUE TIME STATISTICS ===")
-        total_pods = len(self.all_data['Pod'].unique())
-        total_namespaces = len(self.all_data['Namespace'].unique())
-        overall_avg = self.all_data['QueueTime'].mean()
-        overall_max = self.all_data['QueueTime'].max()
-        max_ns = self.all_data.loc[self.all_data['QueueTime'].idxmax(), 'Namespace'] if not self.all_data.empty else "N/A"
-        max_pod = self.all_data.loc[self.all_data['QueueTime'].idxmax(), 'Pod'] if not self.all_data.empty else "N/A"
-        
-        # Format times for display
-        avg_formatted = self.format_time_components(overall_avg)['Formatted']
-        max_formatted = self.format_time_components(overall_max)['Formatted']
+        print(f"Total unique pods: {overall['total_pods']}")
+        print(f"Total namespaces: {overall['total_namespaces']}")
+        print(f"Overall average queue time: {overall['avg_formatted']} ({overall['avg']:.2f} seconds)")
+        print(f"Overall maximum queue time: {overall['max_formatted']} ({overall['max']:.2f} seconds) "
+              f"in {overall['max_namespace']}/{overall['max_pod']}")
         
-        print(f"Total unique pods: {total_pods}")
-        print(f"Total namespaces: {total_namespaces}")
-        print(f"Overall average queue time: {avg_formatted} ({overall_avg:.2f} seconds)")
-        print(f"Overall maximum queue time: {max_formatted} ({overall_max:.2f} seconds) in {max_ns}/{max_pod}")
-        
-        # Calculate namespace-level statistics
+        # Namespace-level statistics
         print("\n=== QUEUE TIME STATISTICS BY NAMESPACE ===")
-        
-        # Create a function to calculate formatted times for agg operations
-        def format_time(seconds):
-            return self.format_time_components(seconds)['Formatted']
-        
-        # Group by namespace and calculate stats
-        ns_stats = self.all_data.groupby('Namespace').agg(
-            PodCount=('Pod', 'nunique'),
-            AvgQueueTime=('QueueTime', 'mean'),
-            MaxQueueTime=('QueueTime', 'max'),
-            MinQueueTime=('QueueTime', 'min'),
-            StdQueueTime=('QueueTime', 'std')
-        ).reset_index()
-        
-        # Add formatted time columns
-        ns_stats['AvgQueueTimeFormatted'] = ns_stats['AvgQueueTime'].apply(format_time)
-        ns_stats['MaxQueueTimeFormatted'] = ns_stats['MaxQueueTime'].apply(format_time)
-        ns_stats['MinQueueTimeFormatted'] = ns_stats['MinQueueTime'].apply(format_time)
-        
-        # Create component columns for Excel
-        for stat in ['AvgQueueTime', 'MaxQueueTime', 'MinQueueTime']:
-            ns_stats[f'{stat}Days'] = ns_stats[stat].apply(lambda x: self.format_time_components(x)['Days'])
-            ns_stats[f'{stat}Hours'] = ns_stats[stat].apply(lambda x: self.format_time_components(x)['Hours'])
-            ns_stats[f'{stat}Minutes'] = ns_stats[stat].apply(lambda x: self.format_time_components(x)['Minutes'])
-            ns_stats[f'{stat}Seconds'] = ns_stats[stat].apply(lambda x: self.format_time_components(x)['Seconds'])
-        
-        # Sort by average queue time (descending)
-        ns_stats = ns_stats.sort_values('AvgQueueTime', ascending=False)
-        
-        # Create a formatted DataFrame for display
+        ns_stats = self.report['ns_stats']
         display_cols = ['Namespace', 'PodCount', 'AvgQueueTimeFormatted', 'MaxQueueTimeFormatted', 'MinQueueTimeFormatted']
         print(ns_stats[display_cols].to_string(index=False))
+
+        # Where the wait went, from the pods' conditions
+        phase_cols = [f'Avg{name}' for name in PHASE_COLUMNS]
+        if ns_stats[phase_cols].notna().any().any():
+            print("\n=== AVERAGE QUEUE PHASE SECONDS BY NAMESPACE ===")
+            print(ns_stats[['Namespace'] + phase_cols].to_string(index=False, float_format="{:.1f}".format,
+                                                                   na_rep="-"))
         
         # Save namespace statistics
-        ns_stats.to_csv(os.path.join(self.output_dir, "namespace_stats.csv"), index=False)
-        ns_stats.to_excel(os.path.join(self.output_dir, "namespace_stats.xlsx"), index=False, engine='openpyxl')
+        with stage("write"):
+            ns_stats.to_csv(os.path.join(self.output_dir, "namespace_stats.csv"), index=False)
+            ns_stats.to_excel(os.path.join(self.output_dir, "namespace_stats.xlsx"), index=False, engine='openpyxl')
         
-        # Identify top pods with longest queue times
+        # Top pods with longest queue times
         print("\n=== TOP 10 PODS WITH LONGEST QUEUE TIMES ===")
-        top_pods = self.all_data.sort_values('QueueTime', ascending=False).drop_duplicates(['Namespace', 'Pod']).head(10)
-        
-        # Display with formatted time
-        top_pods_display = top_pods[['Namespace', 'Pod', 'QueueTimeFormatted', 'CreationTime', 'StartTime']].copy()
+        top_pods = self.report['top_pods']
+        top_pods_display = top_pods[['Namespace', 'Pod', 'QueueTimeFormatted', 'CreationTime', 'StartTime']]
         print(top_pods_display.to_string(index=False))
         
         # Save top pods data
-        top_pods.to_csv(os.path.join(self.output_dir, "top_pods.csv"), index=False)
-        top_pods.to_excel(os.path.join(self.output_dir, "top_pods.xlsx"), index=False, engine='openpyxl')
+        with stage("write"):
+            top_pods.to_csv(os.path.join(self.output_dir, "top_pods.csv"), index=False)
+            top_pods.to_excel(os.path.join(self.output_dir, "top_pods.xlsx"), index=False, engine='openpyxl')
+
+        # Workloads (Jobs, ReplicaSets, ...) with the longest average queue times
+        top_workloads = self.report['top_workloads']
+        if not top_workloads.empty:
+            print("\n=== TOP 10 WORKLOADS WITH LONGEST AVERAGE QUEUE TIMES ===")
+            print(top_workloads.to_string(index=False, float_format="{:.1f}".format))
+            with stage("write"):
+                top_workloads.to_csv(os.path.join(self.output_dir, "top_workloads.csv"), index=False)
     
+    def generate_pending_report(self):
+        """Print and save the pods still pending at the end of the run and the waits that ended during it"""
+        if self.watch:
+            return
+        backlog = backlog_frame(self.pending_pods).drop(columns='Cluster')
+        oldest = oldest_frame(self.pending_pods, 10).drop(columns='Cluster')
+        completed = pd.DataFrame(self.completed_waits, columns=EXIT_COLUMNS).drop(columns='Cluster')
+        waits = wait_summary(self.pending_pods)
+
+        print("\n=== PODS STILL PENDING AT END OF RUN ===")
+        print(f"Pending pods: {len(self.pending_pods)} in {len(backlog)} namespaces")
+        if waits.count:
+            print(f"Current wait: median {self.format_time_components(waits.quantile(0.5))['Formatted']}, "
+                  f"p99 {self.format_time_components(waits.quantile(0.99))['Formatted']}, "
+                  f"max {self.format_time_components(waits.max)['Formatted']}")
+            print(backlog[['Namespace', 'Pending', 'Oldest_Wait_Seconds', 'P50_Wait_Seconds']].to_string(index=False))
+            print("\nLongest-waiting pods:")
+            print(oldest[['Namespace', 'Pod', 'Wait_Seconds']].to_string(index=False))
+        if not completed.empty:
+            print(f"\nPods that left Pending during the run: "
+                  + ", ".join(f"{count} {outcome}" for outcome, count in completed['Outcome'].value_counts().items()))
+
+        backlog.to_csv(os.path.join(self.output_dir, "pending_backlog.csv"), index=False)
+        oldest.to_csv(os.path.join(self.output_dir, "pending_oldest.csv"), index=False)
+        completed.to_csv(os.path.join(self.output_dir, "pending_completed.csv"), index=False)
+
     def generate_summary_report(self):
         """
         Generate a standalone summary Excel report based on the final printed statistics
         """
+        if self.all_data.empty:
+            return None
+        if self.report is None:
+            self.report = self.compute_report()
+        overall = self.report['overall']
+
         # File path for the Excel report
         summary_file = os.path.join(self.output_dir, "queue_time_summary.xlsx")
         
         # Create a Pandas Excel writer using openpyxl as the engine
         with pd.ExcelWriter(summary_file, engine='openpyxl') as writer:
             # 1. Overall Statistics
-            # Get the calculated values from instance variables
-            total_pods = len(self.all_data['Pod'].unique())
-            total_namespaces = len(self.all_data['Namespace'].unique())
-            overall_avg = self.all_data['QueueTime'].mean()
-            overall_max = self.all_data['QueueTime'].max()
-            max_ns = self.all_data.loc[self.all_data['QueueTime'].idxmax(), 'Namespace'] if not self.all_data.empty else "N/A"
-            max_pod = self.all_data.loc[self.all_data['QueueTime'].idxmax(), 'Pod'] if not self.all_data.empty else "N/A"
-            
-            # Format times for display
-            avg_formatted = self.format_time_components(overall_avg)['Formatted']
-            max_formatted = self.format_time_components(overall_max)['Formatted']
-            
             overall_stats = pd.DataFrame([
                 ["=== OVERALL QUEUE TIME STATISTICS ===", ""],
-                ["Total unique pods", total_pods],
-                ["Total namespaces", total_namespaces],
-                ["Overall average queue time", f"{avg_formatted} ({overall_avg:.2f} seconds)"],
-                ["Overall maximum queue time", f"{max_formatted} ({overall_max:.2f} seconds) in {max_ns}/{max_pod}"],
+                ["Total unique pods", overall['total_pods']],
+                ["Total namespaces", overall['total_namespaces']],
+                ["Overall average queue time", f"{overall['avg_formatted']} ({overall['avg']:.2f} seconds)"],
+                ["Overall maximum queue time", f"{overall['max_formatted']} ({overall['max']:.2f} seconds) "
+                                               f"in {overall['max_namespace']}/{overall['max_pod']}"],
             ])
             overall_stats.to_excel(writer, sheet_name='Overall Statistics', index=False, header=False)
             
@@ -289,29 +504,9 @@ class QueueTimeStatsCollector:
                 max_len = max(overall_stats[col].astype(str).map(len).max(), len(str(col)))
                 worksheet.column_dimensions[chr(65 + idx)].width = max_len + 5
             
-            # 2. Namespace Statistics
-            # Get namespace stats from the grouped data
-            ns_stats = self.all_data.groupby('Namespace').agg(
-                PodCount=('Pod', 'nunique'),
-                AvgQueueTime=('QueueTime', 'mean'),
-                MaxQueueTime=('QueueTime', 'max'),
-                MinQueueTime=('QueueTime', 'min')
-            ).reset_index()
-            
-            # Add formatted time columns
-            ns_stats['AvgQueueTimeFormatted'] = ns_stats['AvgQueueTime'].apply(
-                lambda x: self.format_time_components(x)['Formatted'])
-            ns_stats['MaxQueueTimeFormatted'] = ns_stats['MaxQueueTime'].apply(
-                lambda x: self.format_time_components(x)['Formatted'])
-            ns_stats['MinQueueTimeFormatted'] = ns_stats['MinQueueTime'].apply(
-                lambda x: self.format_time_components(x)['Formatted'])
-            
-            # Sort by average queue time (descending)
-            ns_stats = ns_stats.sort_values('AvgQueueTime', ascending=False)
-            
-            # Prepare the data for Excel - use only the formatted columns for display
-            ns_display = ns_stats[['Namespace', 'PodCount', 'AvgQueueTimeFormatted', 
-                                'MaxQueueTimeFormatted', 'MinQueueTimeFormatted']].copy()
+            # 2. Namespace Statistics - only the formatted columns for display
+            ns_display = self.report['ns_stats'][['Namespace', 'PodCount', 'AvgQueueTimeFormatted',
+                                                  'MaxQueueTimeFormatted', 'MinQueueTimeFormatted']].copy()
             
             # Rename the columns to match the display format
             ns_display.columns = ['Namespace', 'PodCount', 'AvgQueueTime', 'MaxQueueTime', 'MinQueueTime']
@@ -332,11 +527,8 @@ class QueueTimeStatsCollector:
                 worksheet.column_dimensions[chr(65 + idx)].width = max_len + 2
             
             # 3. Top 10 Pods
-            # Get the top 10 pods with longest queue times
-            top_pods = self.all_data.sort_values('QueueTime', ascending=False).drop_duplicates(['Namespace', 'Pod']).head(10)
-            
-            # Create display dataframe
-            top_pods_display = top_pods[['Namespace', 'Pod', 'QueueTimeFormatted', 'CreationTime', 'StartTime']].copy()
+            top_pods_display = self.report['top_pods'][['Namespace', 'Pod', 'QueueTimeFormatted',
+                                                        'CreationTime', 'StartTime']].copy()
             top_pods_display.columns = ['Namespace', 'Pod', 'MaxQueueTime', 'CreationTime', 'StartTime']
             
             # Add a header row with the section title
@@ -360,9 +552,15 @@ class QueueTimeStatsCollector:
     def run(self):
         """Run the entire collection and analysis process"""
         self.run_collection()
-        self.generate_statistics()
-        # Generate the summary report
-        self.generate_summary_report()
+        with self.instrumentation.tick("report"):
+            with stage("report_frame"):
+                self.all_data = self.build_report_frame()
+            self.generate_statistics()
+            with stage("pending_report"):
+                self.generate_pending_report()
+            # Generate the summary report
+            with stage("summary_workbook"):
+                self.generate_summary_report()
         print("\nCollection and analysis complete!")
         print(f"Excel files are available in: {self.output_dir}/")
 
@@ -371,6 +569,10 @@ if __name__ == "__main__":
     # Parse command-line arguments
     duration = 5  # Default 5 minutes
     interval = 60  # Default 60 seconds
+
+    # --watch may appear anywhere; the remaining arguments are positional
+    watch = "--watch" in sys.argv
+    sys.argv = [arg for arg in sys.argv if arg != "--watch"]
     
     if len(sys.argv) > 1:
         try:
@@ -390,5 +592,16 @@ if __name__ == "__main__":
         del os.environ['KUBECONFIG']
     
     # Create and run collector
-    collector = QueueTimeStatsCollector(duration_mins=duration, interval_secs=interval)
+    xlsx_max_rows = int(os.environ.get('K8S_QUEUE_MONITOR_XLSX_MAX_ROWS', DEFAULT_XLSX_MAX_ROWS)) or None
+    collector = QueueTimeStatsCollector(duration_mins=duration, interval_secs=interval, watch=watch,
+                                        label_selector=os.environ.get('K8S_QUEUE_MONITOR_LABEL_SELECTOR'),
+                                        raw_formats=parse_formats(os.environ.get('K8S_QUEUE_MONITOR_RAW_FORMATS')),
+                                        xlsx_max_rows=xlsx_max_rows,
+                                        instrument=os.environ.get('K8S_QUEUE_MONITOR_INSTRUMENT', '') not in
+                                        ('', '0', 'false', 'off'),
+                                        profile=os.environ.get('K8S_QUEUE_MONITOR_PROFILE') or None,
+                                        min_interval_secs=int(os.environ.get('K8S_QUEUE_MONITOR_MIN_INTERVAL_SECS', 0))
+                                        or None,
+                                        max_interval_secs=int(os.environ.get('K8S_QUEUE_MONITOR_MAX_INTERVAL_SECS', 0))
+                                        or None)
     collector.run()